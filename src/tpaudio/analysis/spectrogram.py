@@ -1,17 +1,191 @@
+"""
+Espectrogramas en streaming: la STFT se calcula por bloques (soundfile.blocks
+para archivos, slices para arrays) y los frames se reducen al ancho en píxeles
+a medida que llegan, así la memoria queda acotada por (ancho × bandas) sin
+importar la duración del audio.
+"""
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.signal import stft
+import soundfile as sf
 
-def save_spectrogram(wav, sr, path_png, nperseg=1024, noverlap=None):
+DEFAULT_WIDTH = 1600
+
+
+# ----------------------------
+# Bancos de filtros (bandas)
+# ----------------------------
+def _hz_to_mel(f):
+    return 2595.0 * np.log10(1.0 + np.asarray(f) / 700.0)
+
+
+def _mel_to_hz(m):
+    return 700.0 * (10 ** (np.asarray(m) / 2595.0) - 1.0)
+
+
+def _tri_filterbank(freqs: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Triángulos entre bordes consecutivos; filas normalizadas (promedio).
+    Si una banda angosta no cubre ningún bin usa el bin más cercano."""
+    n = len(edges) - 2
+    fb = np.zeros((n, len(freqs)), dtype=np.float32)
+    for i in range(n):
+        lo, c, hi = edges[i], edges[i + 1], edges[i + 2]
+        up = (freqs - lo) / max(c - lo, 1e-9)
+        down = (hi - freqs) / max(hi - c, 1e-9)
+        w = np.clip(np.minimum(up, down), 0.0, None)
+        if not np.any(w):
+            w[np.argmin(np.abs(freqs - c))] = 1.0
+        fb[i] = w / w.sum()
+    return fb
+
+
+def log_filterbank(n_fft: int, sr: int, n_bins: int = 256, fmin: float = 30.0, fmax: float = None):
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sr)
+    edges = np.geomspace(fmin, fmax or sr / 2.0, n_bins + 2)
+    return _tri_filterbank(freqs, edges), edges[1:-1]
+
+
+def mel_filterbank(n_fft: int, sr: int, n_bins: int = 128, fmin: float = 30.0, fmax: float = None):
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sr)
+    edges = _mel_to_hz(np.linspace(_hz_to_mel(fmin), _hz_to_mel(fmax or sr / 2.0), n_bins + 2))
+    return _tri_filterbank(freqs, edges), edges[1:-1]
+
+
+# ----------------------------
+# STFT por bloques
+# ----------------------------
+def _open_source(src, sr, blocksize, channel):
+    """Devuelve (iterador de bloques mono float32, sr, n_muestras)."""
+    def _mono(b):
+        if b.ndim == 1:
+            return b
+        return b[:, channel] if channel is not None else b.mean(axis=1)
+
+    if isinstance(src, np.ndarray):
+        if sr is None:
+            raise ValueError("sr es obligatorio si la fuente es un array")
+        x = np.asarray(src, dtype=np.float32)
+        return (_mono(x[i:i + blocksize]) for i in range(0, x.shape[0], blocksize)), int(sr), x.shape[0]
+    info = sf.info(str(src))
+    blocks = sf.blocks(str(src), blocksize=blocksize, dtype="float32", always_2d=True)
+    return (_mono(b) for b in blocks), int(info.samplerate), int(info.frames)
+
+
+def n_stft_frames(n_samples: int, nperseg: int, hop: int) -> int:
+    return 1 + max(0, int(np.ceil((n_samples - nperseg) / hop)))
+
+
+def stft_frames(src, sr=None, nperseg=1024, hop=None, blocksize=1 << 16, channel=None):
+    """Generador de (índice del primer frame, |STFT| de forma (frames, nperseg//2+1)).
+    El final se completa con ceros como en scipy.signal.stft."""
+    hop = hop or nperseg // 2
+    blocks, sr, n = _open_source(src, sr, blocksize, channel)
+    total = n_stft_frames(n, nperseg, hop)
+    win = np.hanning(nperseg + 1)[:-1].astype(np.float32)   # hann periódica
+    scale = np.float32(1.0 / win.sum())
+    carry = np.zeros(0, dtype=np.float32)
+    done = 0
+
+    def _emit(buf, k):
+        frames = np.lib.stride_tricks.sliding_window_view(buf, nperseg)[::hop][:k]
+        return np.abs(np.fft.rfft(frames * win, axis=1)).astype(np.float32) * scale
+
+    for b in blocks:
+        carry = np.concatenate([carry, b])
+        k = min(total - done, (len(carry) - nperseg) // hop + 1 if len(carry) >= nperseg else 0)
+        if k > 0:
+            yield done, _emit(carry, k)
+            done += k
+            carry = carry[k * hop:]
+    if done < total:
+        need = (total - done - 1) * hop + nperseg
+        carry = np.pad(carry, (0, max(0, need - len(carry))))
+        yield done, _emit(carry, total - done)
+
+
+def spectrogram(src, sr=None, nperseg=1024, hop=None, width=DEFAULT_WIDTH,
+                scale="linear", n_bins=None, fmin=30.0, channel=None):
+    """Espectrograma reducido a 'width' columnas (máximo por grupo de frames).
+    scale: 'linear' | 'log' | 'mel'. Devuelve (t [s], f [Hz], S [dB] de forma (bandas, cols))."""
+    hop = hop or nperseg // 2
+    if isinstance(src, np.ndarray):
+        n, fs = len(src), int(sr)
+    else:
+        info = sf.info(str(src))
+        n, fs = int(info.frames), int(info.samplerate)
+    total = n_stft_frames(n, nperseg, hop)
+    group = max(1, int(np.ceil(total / max(1, width))))
+    n_cols = int(np.ceil(total / group))
+
+    if scale == "linear":
+        fb, freqs = None, np.fft.rfftfreq(nperseg, 1.0 / fs)
+    elif scale == "log":
+        fb, freqs = log_filterbank(nperseg, fs, n_bins or 256, fmin)
+    elif scale == "mel":
+        fb, freqs = mel_filterbank(nperseg, fs, n_bins or 128, fmin)
+    else:
+        raise ValueError(f"Escala no soportada: {scale}")
+
+    S = np.zeros((n_cols, len(freqs)), dtype=np.float32)
+    for i0, mag in stft_frames(src, fs, nperseg, hop, channel=channel):
+        if fb is not None:
+            mag = mag @ fb.T
+        cols = (i0 + np.arange(mag.shape[0])) // group
+        np.maximum.at(S, cols, mag)
+
+    t = (np.arange(n_cols) * group + 0.5 * (group - 1)) * hop / fs
+    return t, freqs, 20 * np.log10(S.T + 1e-9)
+
+
+def save_spectrogram_npz(path_npz, t, f, S_db, sr=None):
+    np.savez_compressed(path_npz, t=t, f=f, S_db=S_db.astype(np.float32), sr=sr or 0)
+
+
+def plot_spectrogram(ax, t, f, S_db, vmin=-120, vmax=-20, log_freq=False):
+    im = ax.pcolormesh(t, f, S_db, shading="nearest", cmap="inferno", vmin=vmin, vmax=vmax)
+    if log_freq:
+        ax.set_yscale("log")
+    ax.set_xlabel("Tiempo [s]"); ax.set_ylabel("Frecuencia [Hz]")
+    return im
+
+
+def save_spectrogram(wav, sr, path_png, nperseg=1024, noverlap=None,
+                     scale="linear", width=DEFAULT_WIDTH, path_npz=None):
+    import matplotlib.pyplot as plt
     if noverlap is None:
         noverlap = nperseg // 4
-    f, t, Z = stft(wav, sr, nperseg=nperseg, noverlap=noverlap)
-    mag = 20*np.log10(np.abs(Z)+1e-9)
-    plt.figure(figsize=(8,4))
-    plt.pcolormesh(t, f, mag, shading='gouraud')
-    plt.xlabel("Tiempo [s]"); plt.ylabel("Frecuencia [Hz]")
-    plt.title("Espectrograma")
-    plt.colorbar(label="dB")
-    plt.tight_layout()
-    plt.savefig(path_png, dpi=200)
-    plt.close()
+    t, f, mag = spectrogram(wav, sr, nperseg=nperseg, hop=nperseg - noverlap,
+                            width=width, scale=scale)
+    if path_npz:
+        save_spectrogram_npz(path_npz, t, f, mag, sr)
+    fig, ax = plt.subplots(figsize=(8, 4))
+    im = plot_spectrogram(ax, t, f, mag, vmin=None, vmax=None, log_freq=(scale != "linear"))
+    ax.set_title("Espectrograma")
+    fig.colorbar(im, ax=ax, label="dB")
+    fig.tight_layout()
+    fig.savefig(path_png, dpi=200)
+    plt.close(fig)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Espectrograma en streaming de un archivo de audio")
+    ap.add_argument("wav", help="Archivo de audio (WAV/FLAC/...)")
+    ap.add_argument("--png", default=None, help="Imagen de salida")
+    ap.add_argument("--npz", default=None, help="Guardar magnitudes reducidas en .npz")
+    ap.add_argument("--scale", default="log", choices=["linear", "log", "mel"])
+    ap.add_argument("--nperseg", type=int, default=2048)
+    ap.add_argument("--width", type=int, default=DEFAULT_WIDTH, help="Columnas (píxeles) de salida")
+    args = ap.parse_args()
+
+    sr = sf.info(args.wav).samplerate
+    if args.png:
+        save_spectrogram(args.wav, sr, args.png, nperseg=args.nperseg, noverlap=args.nperseg // 2,
+                         scale=args.scale, width=args.width, path_npz=args.npz)
+    elif args.npz:
+        t, f, S = spectrogram(args.wav, nperseg=args.nperseg, width=args.width, scale=args.scale)
+        save_spectrogram_npz(args.npz, t, f, S, sr)
+    else:
+        ap.print_help()
+
+
+if __name__ == "__main__":
+    main()
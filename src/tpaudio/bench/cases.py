@@ -0,0 +1,100 @@
+"""
+Casos fijos del benchmark. Cada caso es una función sin argumentos que devuelve
+el audio generado (para medir segundos de audio por segundo de CPU); la
+preparación (carga de samples, presets, notas) se hace fuera de la medición.
+"""
+import glob
+import os
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+import numpy as np
+
+from ..constants import SR
+from ..core.mixer import mix_tracks
+from ..effects.flanger import Flanger
+from ..effects.reverb import Reverb
+from ..midi.loader import load_notes
+from ..synth.additive import Additive
+from ..synth.piano_additive import render_note_piano_additive
+from ..synth.sample_piano import load_samples, render_note_sample
+
+NOTE_PITCH = 60
+NOTE_DUR_S = 1.0
+NOTE_VEL = 100
+FX_INPUT_S = 10.0
+DEFAULT_INST = ["nylon:ks:0-63"]
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[[], np.ndarray]
+    sr: int = SR
+    tol: Optional[dict] = None     # tolerancias propias (bench/golden.py)
+
+
+def _noise(seconds: float, sr: int = SR) -> np.ndarray:
+    return (0.3 * np.random.default_rng(0).standard_normal(int(seconds * sr))).astype(np.float32)
+
+
+def engine_cases(presets, sample_dir: Optional[str]) -> List[Case]:
+    """'presets' es una PresetLibrary (presets.load_compiled_presets)."""
+    cases = []
+    for name, ks in (presets.ks if presets else {}).items():
+        cases.append(Case(f"ks/{name}", lambda _ks=ks: _ks.render(
+            NOTE_PITCH + _ks.transpose, NOTE_DUR_S, NOTE_VEL, SR)))
+
+    if sample_dir and os.path.isdir(sample_dir):
+        samples = load_samples(sample_dir)
+        # el motor por samples no tiene presets: se mide cada capa de velocidad
+        for layer, vel in (("vH", 110), ("vL", 60)):
+            cases.append(Case(f"sample/{layer}", lambda _v=vel: render_note_sample(
+                samples, NOTE_PITCH, NOTE_DUR_S, _v, SR)))
+
+    cases.append(Case("piano_additive", lambda: render_note_piano_additive(
+        NOTE_PITCH, NOTE_DUR_S, NOTE_VEL, SR)))
+    additive = Additive()
+    cases.append(Case("additive", lambda: additive.render_note(NOTE_PITCH, NOTE_DUR_S, NOTE_VEL, SR)))
+
+    for name, kick in (presets.drums if presets else {}).items():
+        cases.append(Case(f"kick/{name}", lambda _k=kick: _k.render(
+            NOTE_PITCH, _k.params["dur_s"], 127, SR)))
+    return cases
+
+
+def effect_cases() -> List[Case]:
+    x = _noise(FX_INPUT_S)
+    tracks = [_noise(FX_INPUT_S) for _ in range(8)]
+    return [
+        Case("fx/flanger", lambda: Flanger().process(x, SR)),
+        Case("fx/reverb", lambda: Reverb().process(x, SR)),
+        Case("mix_tracks/8x10s", lambda: mix_tracks(tracks)),
+    ]
+
+
+def midi_cases(presets, sample_dir: Optional[str], midi_files: List[str],
+               max_seconds: Optional[float], instruments: List[str] = None) -> List[Case]:
+    """render_multi completo (síntesis + grafo de FX + normalización) por archivo MIDI.
+    'max_seconds' limita a las notas que empiezan antes de ese instante."""
+    from ..render_multi import render_notes_multi
+    cases = []
+    for path in midi_files:
+        try:
+            notes = load_notes(path)
+        except Exception as e:
+            print(f"[WARN] {os.path.basename(path)}: no se pudo leer ({e})")
+            continue
+        if max_seconds:
+            notes = [n for n in notes if n[1] < max_seconds]
+        if not notes:
+            continue
+        cases.append(Case(f"render_multi/{os.path.basename(path)}",
+                          lambda _n=notes: render_notes_multi(_n, instruments or DEFAULT_INST,
+                                                              presets, sample_dir, SR)))
+    return cases
+
+
+def bundled_midi_files(root: str) -> List[str]:
+    files = sorted(glob.glob(os.path.join(root, "melodia*.mid")))
+    files += sorted(glob.glob(os.path.join(root, "Seven_Nation_Army.mid")))
+    return files
@@ -0,0 +1,313 @@
+"""
+Renders de referencia (golden) con tolerancias perceptuales.
+
+    python -m tpaudio.bench.golden --update                 # guarda las referencias
+    python -m tpaudio.bench.golden                          # compara (exit 1 si algo falla)
+    python -m tpaudio.bench.golden --filter 'ks/*' --min-snr 50 --diff-dir golden_diff
+
+Una matriz fija, con semillas fijas: cada motor × preset × pitch, cada efecto
+sobre una misma frase y GOLDEN_MIDI (primeros segundos, render_multi; --all-midi
+para todos los MIDI incluidos). Las referencias del repo (golden/) salen de un
+único --update; manifest.json guarda el commit que las generó y
+tests/test_golden.py compara contra ellas.
+Cada caso se compara con su referencia (<dir>/<caso>.npy) por:
+  - max_abs: error absoluto máximo
+  - snr_db:  energía de la referencia / energía de la diferencia
+  - lsd_db:  distancia log-espectral media entre STFTs
+  - cents:   desvío del pico de la FFT (afinación)
+Los umbrales se ajustan por CLI (o por caso, Case.tol). Si un caso falla se
+escriben en --diff-dir la referencia, el render nuevo y la diferencia (WAV) con
+sus espectrogramas (PNG).
+
+Las referencias dependen de la precisión, del umbral de silencio y de la calidad activos
+(quedan en manifest.json): hay que comparar con la misma configuración.
+"""
+import argparse
+import contextlib
+import dataclasses
+import fnmatch
+import io
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import List, Optional
+import numpy as np
+
+from ..constants import SR
+from ..core import precision, quality, silence
+from ..core.rng import note_seed
+from ..presets import load_compiled_presets
+from .cases import Case, bundled_midi_files
+from .run import PROJECT_ROOT
+
+GOLDEN_SEED = 1234
+GOLDEN_DIR = os.path.join(PROJECT_ROOT, "golden")
+PITCHES = (36, 60, 84)
+NOTE_DUR_S = 0.5
+NOTE_VEL = 100
+MIDI_SECONDS = 4.0
+GOLDEN_MIDI = ("Seven_Nation_Army.mid", "melodia.mid")
+ENGINES = [("ks", None), ("ks", "nylon"), ("ks", "bass"), ("piano", None), ("modal", None),
+           ("additive", None), ("kick", "kick_additive"), ("kick", "kick_fuerte"), ("kick", "bongo")]
+EFFECTS = [{"type": "delay", "time_ms": 120, "feedback": 0.4, "mix": 0.3},
+           {"type": "flanger"}, {"type": "reverb", "mix": 0.3}, {"type": "limiter", "ceiling_dbfs": -6.0}]
+N_FFT = 2048
+LSD_FLOOR = 1e-10          # -100 dB: el ruido de fondo no domina la LSD
+
+
+@dataclass
+class Tolerances:
+    max_abs: float = 1e-3
+    min_snr_db: float = 60.0
+    max_lsd_db: float = 1.0
+    max_cents: float = 1.0
+
+    def override(self, **kw) -> "Tolerances":
+        return dataclasses.replace(self, **{k: v for k, v in kw.items() if v is not None})
+
+
+# ----------------------------
+# Métricas
+# ----------------------------
+def _pad(ref: np.ndarray, new: np.ndarray):
+    n = max(len(ref), len(new))
+    r, y = np.zeros(n), np.zeros(n)
+    r[:len(ref)], y[:len(new)] = ref, new
+    return r, y
+
+
+def _log_power(x: np.ndarray) -> np.ndarray:
+    hop = N_FFT // 2
+    x = np.concatenate([x, np.zeros(N_FFT)])
+    frames = np.lib.stride_tricks.sliding_window_view(x, N_FFT)[::hop]
+    P = np.abs(np.fft.rfft(frames * np.hanning(N_FFT), axis=1)) ** 2 / N_FFT
+    return 10.0 * np.log10(P + LSD_FLOOR)
+
+
+def peak_hz(x: np.ndarray, sr: int) -> float:
+    """Frecuencia del pico de la FFT (ventana de Hann, interpolación parabólica)."""
+    if not np.any(x):
+        return 0.0
+    n = 1 << int(np.ceil(np.log2(max(len(x), N_FFT))))
+    mag = np.log(np.abs(np.fft.rfft(x * np.hanning(len(x)), n)) + 1e-20)
+    k = int(np.argmax(mag[1:-1])) + 1
+    a, b, c = mag[k - 1], mag[k], mag[k + 1]
+    d = a - 2 * b + c
+    return (k + (0.5 * (a - c) / d if d else 0.0)) * sr / n
+
+
+def metrics(ref: np.ndarray, new: np.ndarray, sr: int = SR) -> dict:
+    r, y = _pad(np.asarray(ref, dtype=np.float64), np.asarray(new, dtype=np.float64))
+    err = y - r
+    e, s = float(np.sum(err ** 2)), float(np.sum(r ** 2))
+    f_ref, f_new = peak_hz(r, sr), peak_hz(y, sr)
+    return {
+        "max_abs": float(np.max(np.abs(err), initial=0.0)),
+        "snr_db": float("inf") if e == 0.0 else 10.0 * np.log10(max(s, 1e-30) / e),
+        "lsd_db": float(np.mean(np.sqrt(np.mean((_log_power(r) - _log_power(y)) ** 2, axis=1)))),
+        "cents": 1200.0 * abs(np.log2(f_new / f_ref)) if f_ref > 0 and f_new > 0 else 0.0,
+        "len_ref": len(ref), "len_new": len(new),
+    }
+
+
+def check(m: dict, tol: Tolerances) -> list:
+    """Métricas fuera de tolerancia: [(métrica, valor, umbral)]."""
+    out = []
+    if m["max_abs"] > tol.max_abs:
+        out.append(("max_abs", m["max_abs"], tol.max_abs))
+    if m["snr_db"] < tol.min_snr_db:
+        out.append(("snr_db", m["snr_db"], tol.min_snr_db))
+    if m["lsd_db"] > tol.max_lsd_db:
+        out.append(("lsd_db", m["lsd_db"], tol.max_lsd_db))
+    if m["cents"] > tol.max_cents:
+        out.append(("cents", m["cents"], tol.max_cents))
+    return out
+
+
+# ----------------------------
+# Casos
+# ----------------------------
+def _phrase(presets) -> np.ndarray:
+    """Entrada fija de los efectos: cuatro notas KS con silencio al final."""
+    from ..core.timeline import lay_notes_on_timeline
+    from ..registry import make_renderer
+    notes = [(0, 0.25 * i, 0.3, p, 100) for i, p in enumerate((48, 55, 60, 67))]
+    y = np.asarray(lay_notes_on_timeline(notes, make_renderer("ks", "nylon", presets), seed=GOLDEN_SEED, key="fx"))
+    return np.concatenate([y, np.zeros(SR // 2, dtype=y.dtype)])
+
+
+def golden_midi_files(root: str = PROJECT_ROOT) -> List[str]:
+    return [p for p in (os.path.join(root, f) for f in GOLDEN_MIDI) if os.path.exists(p)]
+
+
+def golden_cases(presets, sample_dir: Optional[str] = None, midi_files: List[str] = (),
+                 midi_seconds: float = MIDI_SECONDS) -> List[Case]:
+    from ..effects.graph import make_effect
+    from ..registry import make_renderer
+    cases = []
+    engines = list(ENGINES)
+    if sample_dir and os.path.isdir(sample_dir):
+        engines.append(("sample", None))
+    samples = None
+    for synth, preset in engines:
+        if synth == "sample":
+            from ..synth.sample_piano import load_samples
+            samples = load_samples(sample_dir)
+        rf = make_renderer(synth, preset, presets, samples=samples if synth == "sample" else None)
+        for p in (PITCHES[:1] if synth == "kick" else PITCHES):
+            name = f"{synth}/{preset or 'default'}/{p}"
+            cases.append(Case(name, lambda _rf=rf, _p=p, _n=name: _rf(
+                _p, NOTE_DUR_S, NOTE_VEL, SR, seed=note_seed(GOLDEN_SEED, _n, 0))))
+
+    x = _phrase(presets)
+    for decl in EFFECTS:
+        fx = make_effect(decl)
+        cases.append(Case(f"fx/{decl['type']}", lambda _fx=fx: _fx.process(x, SR)))
+
+    from ..midi.loader import load_notes
+    from ..render_multi import render_notes_multi
+    from .cases import DEFAULT_INST
+    for path in midi_files:
+        try:
+            notes = [n for n in load_notes(path) if n[1] < midi_seconds]
+        except Exception as e:
+            print(f"[WARN] {os.path.basename(path)}: no se pudo leer ({e})")
+            continue
+        if notes:
+            cases.append(Case(f"midi/{os.path.basename(path)}", lambda _n=notes: render_notes_multi(
+                _n, DEFAULT_INST, presets, sample_dir, SR, workers=1, seed=GOLDEN_SEED)))
+    return cases
+
+
+# ----------------------------
+# Referencias y reporte
+# ----------------------------
+def _file(ref_dir: str, name: str) -> str:
+    return os.path.join(ref_dir, name.replace("/", "__") + ".npy")
+
+
+def _config() -> dict:
+    return {"sr": SR, "precision": precision.get_precision(), "silence_db": silence.silence_db(),
+            "quality": quality.get_quality().name, "seed": GOLDEN_SEED}
+
+
+def _commit() -> Optional[str]:
+    """Commit del árbol que renderiza (con '-dirty' si tiene cambios sin commitear)."""
+    try:
+        git = lambda *a: subprocess.run(["git", *a], cwd=PROJECT_ROOT, capture_output=True,
+                                        text=True, check=True).stdout.strip()
+        rev = git("rev-parse", "HEAD")
+        return rev + ("-dirty" if git("status", "--porcelain", "--untracked-files=no") else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _write_diff(diff_dir: str, name: str, ref: np.ndarray, new: np.ndarray, sr: int):
+    """ref/nuevo/diferencia en WAV (float) y sus espectrogramas en PNG."""
+    import soundfile as sf
+    from ..analysis.spectrogram import save_spectrogram
+    os.makedirs(diff_dir, exist_ok=True)
+    r, y = _pad(ref, new)
+    base = os.path.join(diff_dir, name.replace("/", "__"))
+    for tag, a in (("ref", r), ("new", y), ("diff", y - r)):
+        sf.write(f"{base}.{tag}.wav", a.astype(np.float32), sr, subtype="FLOAT")
+        try:
+            save_spectrogram(a.astype(np.float32), sr, f"{base}.{tag}.png", width=800)
+        except ImportError as e:
+            print(f"[WARN] Sin espectrograma ({e})")
+            break
+
+
+def run(cases: List[Case], ref_dir: str = GOLDEN_DIR, update: bool = False, tol: Tolerances = None,
+        diff_dir: Optional[str] = None) -> dict:
+    """Renderiza los casos y los guarda (update) o compara con las referencias.
+    Devuelve {caso: {"metrics": ..., "failures": [...]}} ("missing" si no hay referencia)."""
+    tol = tol or Tolerances()
+    results = {}
+    if update:
+        commit = _commit()       # antes de escribir: las referencias pueden estar en el árbol
+        os.makedirs(ref_dir, exist_ok=True)
+    else:
+        manifest = os.path.join(ref_dir, "manifest.json")
+        if os.path.exists(manifest):
+            with open(manifest, "r", encoding="utf-8") as f:
+                stored = json.load(f).get("config", {})
+            stored = {k: v for k, v in stored.items() if k != "commit"}     # de dónde salieron
+            if stored and stored != _config():
+                print(f"[WARN] Referencias generadas con {stored}; ahora {_config()}")
+    for case in cases:
+        with contextlib.redirect_stdout(io.StringIO()):
+            y = np.asarray(case.fn())
+        path = _file(ref_dir, case.name)
+        if update:
+            np.save(path, y)
+            results[case.name] = {"metrics": None, "failures": []}
+            continue
+        if not os.path.exists(path):
+            results[case.name] = {"metrics": None, "failures": ["missing"]}
+            continue
+        ref = np.load(path)
+        m = metrics(ref, y, case.sr)
+        fails = check(m, tol.override(**(case.tol or {})))
+        results[case.name] = {"metrics": m, "failures": fails}
+        if fails and diff_dir:
+            _write_diff(diff_dir, case.name, ref, y, case.sr)
+    if update:
+        with open(os.path.join(ref_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({"config": dict(_config(), commit=commit), "cases": sorted(results)}, f, indent=2)
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Renders golden: regresiones de audio con tolerancias perceptuales")
+    ap.add_argument("--dir", default=GOLDEN_DIR, help="Directorio de las referencias (.npy)")
+    ap.add_argument("--update", action="store_true", help="Regenerar las referencias con el código actual")
+    ap.add_argument("--filter", default="*", help="Patrón glob sobre los nombres de caso (p.ej. 'ks/*')")
+    ap.add_argument("--diff-dir", default="golden_diff", help="Dónde escribir WAV/PNG de los casos que fallan")
+    ap.add_argument("--no-midi", action="store_true", help="Omitir los MIDI")
+    ap.add_argument("--all-midi", action="store_true",
+                    help="Todos los MIDI incluidos (no sólo GOLDEN_MIDI; sin referencias en el repo)")
+    ap.add_argument("--midi-seconds", type=float, default=MIDI_SECONDS,
+                    help="Notas de cada MIDI que empiezan antes de N s")
+    ap.add_argument("--max-abs", type=float, default=None, help="Error absoluto máximo (1e-3)")
+    ap.add_argument("--min-snr", type=float, default=None, help="SNR mínima en dB (60)")
+    ap.add_argument("--max-lsd", type=float, default=None, help="Distancia log-espectral máxima en dB (1.0)")
+    ap.add_argument("--max-cents", type=float, default=None, help="Desvío máximo del pico de la FFT en cents (1.0)")
+    ap.add_argument("--preset-instruments", default=os.path.join(PROJECT_ROOT, "presets", "instruments.yml"))
+    ap.add_argument("--sample-dir", default=os.path.join(PROJECT_ROOT, "samples_piano_1"))
+    args = ap.parse_args(argv)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        presets = load_compiled_presets(args.preset_instruments)
+    midi = [] if args.no_midi else bundled_midi_files(PROJECT_ROOT) if args.all_midi else golden_midi_files()
+    cases = golden_cases(presets, args.sample_dir, midi, args.midi_seconds)
+    cases = [c for c in cases if fnmatch.fnmatch(c.name, args.filter)]
+    tol = Tolerances().override(max_abs=args.max_abs, min_snr_db=args.min_snr,
+                                max_lsd_db=args.max_lsd, max_cents=args.max_cents)
+
+    results = run(cases, args.dir, update=args.update, tol=tol, diff_dir=args.diff_dir)
+    if args.update:
+        print(f"[OK] {len(results)} referencias → {args.dir}")
+        return
+    print(f"{'caso':40s} {'max_abs':>10s} {'SNR[dB]':>9s} {'LSD[dB]':>9s} {'cents':>7s}")
+    failed = 0
+    for name, r in results.items():
+        m = r["metrics"]
+        if m is None:
+            print(f"{name:40s} [FALTA] sin referencia (correr con --update)")
+            failed += 1
+            continue
+        print(f"{name:40s} {m['max_abs']:10.2e} {m['snr_db']:9.1f} {m['lsd_db']:9.3f} {m['cents']:7.2f}"
+              + ("" if not r["failures"] else "  ✗ " + ", ".join(f"{k}={v:.3g} (lím {t:g})"
+                                                              for k, v, t in r["failures"])))
+        failed += bool(r["failures"])
+    if failed:
+        print(f"[ERR] {failed} caso(s) fuera de tolerancia; diferencias en {args.diff_dir}")
+        sys.exit(1)
+    print(f"[OK] {len(results)} casos dentro de tolerancia")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark de motores, efectos y render completo.
+
+    python -m tpaudio.bench.run --out bench.json
+    python -m tpaudio.bench.run --out new.json --compare bench.json --tolerance 0.1
+
+Por caso mide tiempo de pared, tiempo de CPU, factor de tiempo real
+(segundos de audio / segundo de CPU) y pico de memoria (tracemalloc).
+"""
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from ..presets import load_compiled_presets
+from .cases import bundled_midi_files, effect_cases, engine_cases, midi_cases
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(HERE, "..", "..", ".."))
+
+# Presupuesto de arranque de la CLI (importaciones incluidas)
+STARTUP_CMD = [sys.executable, "-m", "tpaudio.main", "--help"]
+STARTUP_BUDGET_S = 0.8
+
+
+def measure(case, repeat: int = 3, warmup: int = 1, trace_memory: bool = True) -> dict:
+    """Mejor de 'repeat' corridas (tras 'warmup') + una corrida extra con tracemalloc."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            case.fn()
+        walls, cpus, y = [], [], None
+        for _ in range(max(1, repeat)):
+            w0, c0 = time.perf_counter(), time.process_time()
+            y = case.fn()
+            cpus.append(time.process_time() - c0)
+            walls.append(time.perf_counter() - w0)
+        peak = None
+        if trace_memory:
+            tracemalloc.start()
+            case.fn()
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+
+    audio_s = float(np.asarray(y).shape[0]) / case.sr
+    cpu = max(min(cpus), 1e-9)
+    return {
+        "wall_s": min(walls),
+        "cpu_s": min(cpus),
+        "audio_s": audio_s,
+        "rtf": audio_s / cpu,
+        "peak_mb": peak,
+    }
+
+
+def measure_startup(cmd=None, repeat: int = 5) -> float:
+    """Mejor tiempo de pared de 'cmd' (por defecto `python -m tpaudio.main --help`)."""
+    cmd = cmd or STARTUP_CMD
+    env = dict(os.environ, PYTHONPATH=os.path.join(PROJECT_ROOT, "src"))
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.10) -> list:
+    """Lista de regresiones: RTF que cae o memoria que crece más que 'tolerance'."""
+    regressions = []
+    cur_s, base_s = current.get("startup_s"), baseline.get("startup_s")
+    if cur_s and base_s and cur_s > base_s * (1.0 + tolerance):
+        regressions.append(("startup", "wall_s", base_s, cur_s))
+    for name, cur in current.get("cases", {}).items():
+        base = baseline.get("cases", {}).get(name)
+        if not base:
+            continue
+        if cur["rtf"] < base["rtf"] * (1.0 - tolerance):
+            regressions.append((name, "rtf", base["rtf"], cur["rtf"]))
+        if cur.get("peak_mb") and base.get("peak_mb") and cur["peak_mb"] > base["peak_mb"] * (1.0 + tolerance):
+            regressions.append((name, "peak_mb", base["peak_mb"], cur["peak_mb"]))
+    return regressions
+
+
+def _meta() -> dict:
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark de tpaudio (factor de tiempo real por caso)")
+    ap.add_argument("--out", default="bench.json", help="JSON de resultados")
+    ap.add_argument("--compare", default=None, help="JSON base contra el cual detectar regresiones")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="Tolerancia relativa (0.10 = 10%%)")
+    ap.add_argument("--filter", default="*", help="Patrón glob sobre los nombres de caso (p.ej. 'ks/*')")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--no-memory", action="store_true", help="No medir memoria (evita la corrida extra)")
+    ap.add_argument("--no-midi", action="store_true", help="Omitir los renders MIDI completos")
+    ap.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET_S,
+                    help="Tiempo máximo [s] de `python -m tpaudio.main --help` (0 = no medir)")
+    ap.add_argument("--midi-seconds", type=float, default=None,
+                    help="Limitar cada MIDI a las notas que empiezan antes de N s")
+    ap.add_argument("--inst", action="append", default=None,
+                    help="Instrumentos para render_multi (nombre:tipo:tracks, repetible)")
+    ap.add_argument("--preset-instruments", default=os.path.join(PROJECT_ROOT, "presets", "instruments.yml"))
+    ap.add_argument("--preset-effects", default=os.path.join(PROJECT_ROOT, "presets", "effects.yml"))
+    ap.add_argument("--sample-dir", default=os.path.join(PROJECT_ROOT, "samples_piano_1"))
+    args = ap.parse_args(argv)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        presets = load_compiled_presets(args.preset_instruments, args.preset_effects)
+        cases = engine_cases(presets, args.sample_dir) + effect_cases()
+    if not args.no_midi:
+        cases += midi_cases(presets, args.sample_dir, bundled_midi_files(PROJECT_ROOT),
+                            args.midi_seconds, args.inst)
+    cases = [c for c in cases if fnmatch.fnmatch(c.name, args.filter)]
+
+    results = {"meta": _meta(), "cases": {}}
+    over_budget = False
+    if args.startup_budget > 0:
+        results["startup_s"] = startup = measure_startup()
+        over_budget = startup > args.startup_budget
+        print(f"[{'WARN' if over_budget else 'OK'}] Arranque de la CLI: {startup * 1000:.0f} ms "
+              f"(presupuesto {args.startup_budget * 1000:.0f} ms)")
+    print(f"{'caso':40s} {'wall[s]':>9s} {'cpu[s]':>9s} {'RTF':>9s} {'pico[MB]':>9s}")
+    for case in cases:
+        r = measure(case, repeat=args.repeat, trace_memory=not args.no_memory)
+        results["cases"][case.name] = r
+        peak = f"{r['peak_mb']:9.1f}" if r["peak_mb"] is not None else f"{'-':>9s}"
+        print(f"{case.name:40s} {r['wall_s']:9.4f} {r['cpu_s']:9.4f} {r['rtf']:9.1f} {peak}")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"[OK] Resultados → {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regs = compare(results, baseline, args.tolerance)
+        for name, metric, old, new in regs:
+            print(f"[REGRESIÓN] {name}: {metric} {old:.3f} → {new:.3f}")
+        if regs:
+            sys.exit(1)
+        print("[OK] Sin regresiones respecto de", args.compare)
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
 SR = 48000
 BLOCK = 1024
 EPS = 1e-9
+PEAK_DBFS = -1.0     # pico de la mezcla normalizada (session.render, core/jobs.py)
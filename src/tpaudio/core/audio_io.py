@@ -1,6 +1,189 @@
+import os
+import queue
+import threading
 import numpy as np
 import soundfile as sf
 
-def write_wav(path: str, audio: np.ndarray, sr: int):
-    audio = np.clip(audio, -1.0, 1.0).astype(np.float32)
-    sf.write(path, audio, sr)
+# Bits de salida → subtipo de libsndfile
+SUBTYPES = {"float": "FLOAT", 16: "PCM_16", 24: "PCM_24"}
+FORMATS = {".wav": "WAV", ".rf64": "RF64", ".flac": "FLAC"}
+WAV_MAX_BYTES = 2 ** 32 - 2 ** 20   # margen para cabecera: más grande → RF64
+WRITE_BLOCK = 1 << 16
+
+
+def tpdf_dither(x: np.ndarray, bits: int, rng: np.random.Generator) -> np.ndarray:
+    """Suma dither TPDF (±1 LSB, triangular) in-place y devuelve x."""
+    lsb = np.float32(2.0 ** (1 - bits))
+    x += (rng.random(x.shape, dtype=np.float32) - rng.random(x.shape, dtype=np.float32)) * lsb
+    return x
+
+
+def _resolve(path, fmt, bits, n_frames=None, channels=1):
+    fmt = (fmt or FORMATS.get(os.path.splitext(str(path))[1].lower(), "WAV")).upper()
+    if bits is None:
+        bits = 24 if fmt == "FLAC" else "float"   # FLAC no admite float
+    if bits not in SUBTYPES:
+        raise ValueError(f"Bits no soportados: {bits} (usa 16, 24 o 'float')")
+    if fmt == "FLAC" and bits == "float":
+        raise ValueError("FLAC sólo admite 16 o 24 bits")
+    if fmt == "WAV" and n_frames is not None:
+        width = 4 if bits == "float" else bits // 8
+        if n_frames * channels * width > WAV_MAX_BYTES:
+            fmt = "RF64"
+    return fmt, bits
+
+
+class AudioWriter:
+    """
+    Escritor de audio por bloques (WAV / RF64 / FLAC).
+    - write(block): recorta a [-1, 1] (y aplica dither TPDF si la salida es entera)
+      sobre una única copia float32 del bloque y la encola.
+    - Un hilo de fondo escribe a disco desde una cola acotada: el render sigue
+      mientras se escribe, y la memoria queda limitada a 'queue_size' bloques.
+    - overview=True acumula las vistas reducidas (analysis/overview.py) de lo que
+      se escribe y las guarda junto al archivo al cerrar (en self.overview).
+    """
+
+    def __init__(self, path: str, sr: int, channels: int = 1, bits=None, fmt: str = None,
+                 dither: bool = True, queue_size: int = 8, seed=None, background: bool = True,
+                 n_frames: int = None, overview: bool = False):
+        self.path = str(path)
+        self.sr = int(sr)
+        self.channels = int(channels)
+        self.fmt, self.bits = _resolve(self.path, fmt, bits, n_frames, self.channels)
+        self.dither = dither and self.bits != "float"
+        self._rng = np.random.default_rng(seed)
+        self._hi = np.float32(1.0) if self.bits == "float" else np.float32(1.0 - 2.0 ** (1 - self.bits))
+        self.frames = 0
+        self._file = sf.SoundFile(self.path, "w", samplerate=self.sr, channels=self.channels,
+                                  format=self.fmt, subtype=SUBTYPES[self.bits])
+        self._error = None
+        self._overview = None
+        self.overview = None
+        if overview:
+            from ..analysis.overview import OverviewBuilder
+            self._overview = OverviewBuilder(self.sr)
+        self._queue = None
+        self._thread = None
+        if background:
+            self._queue = queue.Queue(maxsize=max(1, queue_size))
+            self._thread = threading.Thread(target=self._drain, name="AudioWriter", daemon=True)
+            self._thread.start()
+
+    def _drain(self):
+        while True:
+            block = self._queue.get()
+            if block is None:
+                return
+            if self._error is None:
+                try:
+                    self._sink(block)
+                except Exception as e:   # se re-lanza en el hilo del render
+                    self._error = e
+
+    def _sink(self, block: np.ndarray):
+        self._file.write(block)
+        if self._overview is not None:
+            self._overview.push(block)
+
+    def _prepare(self, block: np.ndarray) -> np.ndarray:
+        block = np.asarray(block)
+        if self.channels > 1 and block.ndim == 1:
+            raise ValueError(f"Se esperaban {self.channels} canales")
+        buf = np.empty(block.shape, dtype=np.float32)
+        if self.dither:
+            buf[...] = block
+            tpdf_dither(buf, self.bits, self._rng)
+            np.clip(buf, -1.0, self._hi, out=buf)
+        else:
+            np.clip(block, -1.0, self._hi, out=buf)
+        return buf
+
+    def write(self, block: np.ndarray):
+        if self._error is not None:
+            raise self._error
+        buf = self._prepare(block)
+        self.frames += buf.shape[0]
+        if self._queue is not None:
+            self._queue.put(buf)
+        else:
+            self._sink(buf)
+
+    def close(self):
+        if self._file is None:
+            return
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+        self._file.close()
+        self._file = None
+        if self._error is not None:
+            raise self._error
+        if self._overview is not None:
+            from ..analysis.overview import overview_path
+            self.overview = self._overview.finish()
+            self.overview.save(overview_path(self.path))
+            self._overview = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self._overview = None     # archivo incompleto: sin overview
+        self.close()
+
+
+def write_wav(path: str, audio: np.ndarray, sr: int, bits=None, fmt: str = None, dither: bool = True,
+              overview: bool = False):
+    """Escribe un buffer completo por bloques (sin copias del tema entero).
+    El formato sale de la extensión (.wav/.rf64/.flac); WAV muy largos pasan a RF64."""
+    audio = np.asarray(audio)
+    channels = 1 if audio.ndim == 1 else audio.shape[1]
+    with AudioWriter(path, sr, channels=channels, bits=bits, fmt=fmt, dither=dither,
+                     n_frames=audio.shape[0], overview=overview) as w:
+        for i0 in range(0, audio.shape[0], WRITE_BLOCK):
+            w.write(audio[i0:i0 + WRITE_BLOCK])
+
+
+def stem_name(key) -> str:
+    """Nombre de archivo de la pista 'key' (índice MIDI o nombre de instrumento)."""
+    if isinstance(key, (int, np.integer)):
+        return f"track{int(key):02d}"
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in str(key)) or "stem"
+
+
+def write_stems(out_dir: str, stems: dict, sr: int, bits=None, ext: str = ".wav",
+                multichannel: bool = False) -> list:
+    """Escribe {clave: audio mono} en out_dir: un archivo por pista (<stem_name><ext>) o,
+    con multichannel=True, un único stems<ext> con un canal por pista en ese orden (WAV
+    que supera 4 GB → RF64). Todas se completan con silencio hasta la más larga y se
+    leen por bloques desde los buffers recibidos, sin copiarlos. Devuelve las rutas."""
+    os.makedirs(out_dir, exist_ok=True)
+    keys = list(stems)
+    n = max((len(stems[k]) for k in keys), default=0)
+    dt = np.result_type(*(stems[k].dtype for k in keys)) if keys else np.float32   # la precisión del render
+    if multichannel:
+        path = os.path.join(out_dir, "stems" + ext)
+        buf = np.zeros((WRITE_BLOCK, len(keys)), dtype=dt)
+        with AudioWriter(path, sr, channels=len(keys), bits=bits, n_frames=n) as w:
+            for i0 in range(0, n, WRITE_BLOCK):
+                m = min(WRITE_BLOCK, n - i0)
+                for c, k in enumerate(keys):
+                    seg = stems[k][i0:i0 + m]
+                    buf[:len(seg), c] = seg
+                    buf[len(seg):m, c] = 0.0
+                w.write(buf[:m])        # write() copia el bloque: buf se reusa
+        return [path]
+    paths = []
+    silence = np.zeros(WRITE_BLOCK, dtype=dt)
+    for k in keys:
+        y = stems[k]
+        path = os.path.join(out_dir, stem_name(k) + ext)
+        with AudioWriter(path, sr, bits=bits, n_frames=n) as w:
+            for i0 in range(0, len(y), WRITE_BLOCK):
+                w.write(y[i0:i0 + WRITE_BLOCK])
+            for i0 in range(len(y), n, WRITE_BLOCK):
+                w.write(silence[:min(WRITE_BLOCK, n - i0)])
+        paths.append(path)
+    return paths
@@ -1,10 +1,10 @@
-import numpy as np
+from .precision import zeros
 
 def midi2freq(p: int) -> float:
     return 440.0 * 2 ** ((p - 69) / 12)
 
 def hp1(x, a=0.995):
-    y = np.zeros_like(x, dtype=np.float32)
+    y = zeros(len(x))
     xm1 = 0.0
     ym1 = 0.0
     for i, xi in enumerate(x):
@@ -1,4 +1,5 @@
 import numpy as np
+from .precision import empty
 
 def adsr_env(sr, dur_s, attack_ms=10, decay_ms=60, sustain=0.6, release_ms=120):
     N = int(sr * dur_s)
@@ -6,14 +7,14 @@ def adsr_env(sr, dur_s, attack_ms=10, decay_ms=60, sustain=0.6, release_ms=120):
     D = int(sr * decay_ms / 1000)
     R = int(sr * release_ms / 1000)
     S = max(N - (A + D + R), 0)
-    parts = []
-    if A > 0: parts.append(np.linspace(0.0, 1.0, A, endpoint=False))
-    if D > 0: parts.append(np.linspace(1.0, sustain, D, endpoint=False))
-    if S > 0: parts.append(np.full(S, sustain, dtype=np.float32))
-    if R > 0: parts.append(np.linspace(sustain, 0.0, R, endpoint=True))
-    if not parts:
-        return np.ones(N, dtype=np.float32)
-    env = np.concatenate(parts).astype(np.float32)
-    if len(env) < N:
-        env = np.pad(env, (0, N - len(env)))
-    return env[:N]
+    # Tramos escritos directo en el buffer final (si A+D+R > N se trunca la cola)
+    env = empty(N)
+    i = 0
+    for n, a, b, endpoint in ((A, 0.0, 1.0, False), (D, 1.0, sustain, False),
+                              (S, sustain, sustain, True), (R, sustain, 0.0, True)):
+        m = min(n, N - i)
+        if m <= 0:
+            continue
+        env[i:i + m] = a if a == b else np.linspace(a, b, n, endpoint=endpoint)[:m]
+        i += m
+    return env
@@ -0,0 +1,289 @@
+"""
+Render en segundo plano (para la GUI).
+
+Un RenderWorker toma RenderJobs de una cola y los ejecuta de a uno en un hilo
+aparte: síntesis por pista → efectos por bloques → normalización y escritura.
+El avance se publica como eventos (job_id, tipo, datos) en 'events', que la GUI
+lee con after() sin bloquear el mainloop:
+
+    ("queued",   {"position": n})
+    ("stage",    {"stage": "prepare" | "synth" | "effects" | "write"})
+    ("progress", {"stage": ..., "track": clave, "done": i, "total": n})
+    ("done",     {"out": ruta, "seconds": s})
+    ("cancelled", {}) / ("error", {"error": excepción})
+
+Las pistas pueden venir como {clave: (notas, render_fn)} (se sintetizan en este
+hilo con sparse.lay_notes_sparse, el mismo timeline que el resto) o como lista de
+parallel.TrackJob (una por proceso, ver core/parallel.py). La normalización es la
+de RenderSession.render: pico final en dBFS (core/mixer.peak_gain).
+cancel() se atiende entre notas (síntesis) y entre bloques (efectos, escritura);
+un WAV a medio escribir se borra. Junto al WAV se guarda su overview (formas de
+onda y STFT reducidas) para que la GUI lo muestre sin releer el audio.
+"""
+import itertools
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Union
+import numpy as np
+
+from ..constants import BLOCK, PEAK_DBFS, SR
+from ..effects.graph import FxGraph
+from .audio_io import AudioWriter
+from .parallel import Cancelled, render_tracks
+from .mixer import peak_gain
+from .precision import zeros
+from .rng import DEFAULT_SEED
+from .silence import is_silent, threshold, trim_tail
+from .sparse import SparseTrack, lay_notes_sparse
+from .timeline import timeline_length
+from .profiler import get_profiler
+
+PROGRESS_EVERY_S = 0.05
+
+
+@dataclass
+class RenderJob:
+    # {clave: (notas, render_fn)}, [TrackJob] o una función que devuelve alguno de
+    # los dos; la función se llama en el worker (carga de presets/samples fuera
+    # del hilo de la UI)
+    tracks: Union[dict, list, Callable]
+    out: str
+    graph: FxGraph = field(default_factory=FxGraph)
+    sr: int = SR
+    block: int = BLOCK
+    normalize: Optional[float] = PEAK_DBFS   # pico final en dBFS (None: sin normalizar), como session.render
+    overview: bool = True      # vistas reducidas junto al WAV (analysis/overview.py)
+    bits: Any = None           # 16 | 24 | "float" (ver audio_io.AudioWriter)
+    seed: int = DEFAULT_SEED   # semilla de las notas de {clave: (notas, render_fn)} (core/rng.py)
+    prof: Any = None
+    # Sólo para [TrackJob]: presets compilados, samples y procesos
+    presets: Any = None
+    sample_dir: Optional[str] = None
+    workers: Optional[int] = None
+    label: str = ""
+    id: int = 0
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise Cancelled()
+
+
+def _lay_track(job: RenderJob, key, notes, rf, emit) -> SparseTrack:
+    """Arma la pista (sólo los tramos con notas) reportando avance."""
+    if not notes:
+        return SparseTrack(1)
+    total = len(notes)
+    last = [time.perf_counter()]
+
+    def on_note(j):
+        job.check()
+        now = time.perf_counter()
+        if now - last[0] >= PROGRESS_EVERY_S:
+            emit("progress", stage="synth", track=key, done=j + 1, total=total)
+            last[0] = now
+    job.check()
+    y = lay_notes_sparse(notes, rf, timeline_length(notes, job.sr), on_note=on_note, seed=job.seed,
+                         key=key, sr=job.sr)
+    emit("progress", stage="synth", track=key, done=total, total=total)
+    return y
+
+
+def _run_graph(job: RenderJob, tracks_audio: dict, emit) -> np.ndarray:
+    """Aplica el grafo por bloques (cancelable) hasta agotar la cola de los efectos.
+    Los bloques con todas las entradas en silencio y las colas ya agotadas no se
+    procesan (quedan en cero; los efectos sólo avanzan su reloj, FxGraph.skip)."""
+    graph, block = job.graph, job.block
+    for k in tracks_audio:
+        graph.strip(k)
+    graph.reset(job.sr)
+    n = max(len(y) for y in tracks_audio.values())
+    tail = graph.tail_length
+    total = n + tail
+    out = zeros(int(np.ceil(total / block)) * block)
+    bufs = {k: zeros(block) for k in tracks_audio}
+    thr = threshold()
+    quiet = tail + 1          # muestras con entradas calladas (al inicio el grafo está en reposo)
+    last = time.perf_counter()
+    for t in range(0, total, block):
+        job.check()
+        for k, y in tracks_audio.items():
+            if isinstance(y, SparseTrack):
+                bufs[k][:] = 0.0
+                y.add_into(bufs[k], start=t)
+                continue
+            seg = y[t:t + block]
+            bufs[k][:len(seg)] = seg
+            bufs[k][len(seg):] = 0.0
+        quiet = quiet + block if all(is_silent(b, thr) for b in bufs.values()) else 0
+        if quiet < tail + block:
+            out[t:t + block] = graph.process_block(bufs, block)
+        else:
+            graph.skip(block, t)
+        now = time.perf_counter()
+        if now - last >= PROGRESS_EVERY_S:
+            emit("progress", stage="effects", track=None, done=t + block, total=total)
+            last = now
+    return trim_tail(out[:total])
+
+
+def _write(job: RenderJob, y: np.ndarray, emit):
+    step = job.block * 16
+    try:
+        with AudioWriter(job.out, job.sr, bits=job.bits, n_frames=len(y), overview=job.overview) as w:
+            for i0 in range(0, len(y), step):
+                job.check()
+                w.write(y[i0:i0 + step])
+    except BaseException:
+        if os.path.exists(job.out):
+            os.remove(job.out)
+        raise
+    emit("progress", stage="write", track=None, done=len(y), total=len(y))
+
+
+def run_job(job: RenderJob, emit: Callable = None) -> str:
+    """Ejecuta un trabajo en el hilo actual. emit(tipo, **datos) recibe el avance.
+    Lanza Cancelled si se canceló."""
+    emit = emit or (lambda kind, **data: None)
+    prof = get_profiler(job.prof)
+    tracks = job.tracks
+    if callable(tracks):
+        emit("stage", stage="prepare")
+        tracks = tracks()
+    if not tracks:
+        raise ValueError("No hay pistas para renderizar")
+
+    emit("stage", stage="synth")
+    audio = {}
+    with prof.span("synth"):
+        if isinstance(tracks, (list, tuple)):
+            audio = render_tracks(tracks, job.presets, job.sample_dir, job.workers,
+                                  progress=lambda k, d, t: emit("progress", stage="synth", track=k, done=d, total=t),
+                                  cancelled=lambda: job.cancelled, prof=prof, sr=job.sr)
+        else:
+            for k, (notes, rf) in tracks.items():
+                audio[k] = _lay_track(job, k, notes, rf, emit)
+
+    emit("stage", stage="effects")
+    with prof.span("effects"):
+        y = _run_graph(job, audio, emit)
+
+    emit("stage", stage="write")
+    with prof.span("write"):
+        if job.normalize is not None:
+            y *= peak_gain(y, job.normalize)
+        _write(job, y, emit)
+    return job.out
+
+
+class RenderWorker:
+    """Cola de trabajos + hilo de render. submit() no bloquea; los trabajos nuevos
+    esperan a que termine el actual."""
+
+    def __init__(self):
+        self.events = queue.SimpleQueue()
+        self._jobs = queue.Queue()
+        self._ids = itertools.count(1)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._outstanding = 0     # encolados + en curso
+        self.current: Optional[RenderJob] = None
+
+    def _emit(self, job: RenderJob, kind: str, **data):
+        self.events.put((job.id, kind, data))
+
+    def submit(self, job: RenderJob) -> RenderJob:
+        job.id = next(self._ids)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="RenderWorker", daemon=True)
+                self._thread.start()
+            self._emit(job, "queued", position=self._outstanding)
+            self._outstanding += 1
+            self._jobs.put(job)
+        return job
+
+    @property
+    def pending(self) -> int:
+        """Trabajos en cola sin contar el actual."""
+        return self._jobs.qsize()
+
+    @property
+    def busy(self) -> bool:
+        return self._outstanding > 0
+
+    def _finished(self):
+        with self._lock:
+            self._outstanding -= 1
+
+    def cancel(self, all: bool = False):
+        """Cancela el trabajo en curso (y, con all=True, también los encolados)."""
+        if all:
+            while True:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:       # shutdown() previo: se vuelve a encolar
+                    self._jobs.put(None)
+                    break
+                job.cancel()
+                self._emit(job, "cancelled")
+                self._finished()
+        job = self.current
+        if job is not None:
+            job.cancel()
+
+    def poll(self) -> list:
+        """Eventos pendientes (no bloquea)."""
+        out = []
+        while True:
+            try:
+                out.append(self.events.get_nowait())
+            except queue.Empty:
+                return out
+
+    def join(self, timeout: float = None) -> bool:
+        """Espera a que se vacíe la cola; False si venció el timeout."""
+        t_end = None if timeout is None else time.perf_counter() + timeout
+        while self.busy:
+            if t_end is not None and time.perf_counter() > t_end:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def shutdown(self, cancel: bool = True):
+        if cancel:
+            self.cancel(all=True)
+        self._jobs.put(None)
+
+    def _loop(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            self.current = job
+            emit = lambda kind, _job=job, **data: self._emit(_job, kind, **data)
+            t0 = time.perf_counter()
+            try:
+                if job.cancelled:
+                    raise Cancelled()
+                out = run_job(job, emit)
+                emit("done", out=out, seconds=time.perf_counter() - t0)
+            except Cancelled:
+                emit("cancelled")
+            except Exception as e:
+                emit("error", error=e)
+            finally:
+                self.current = None
+                self._finished()
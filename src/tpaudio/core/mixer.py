@@ -1,14 +1,25 @@
 import numpy as np
+from .precision import as_audio, zeros
+from .sparse import SparseTrack
+
+def peak_gain(y, ceiling_dbfs=-1.0) -> float:
+    """Ganancia que lleva el pico de y a ceiling_dbfs."""
+    return 10 ** (ceiling_dbfs / 20.0) / (np.max(np.abs(y)) + 1e-9)
+
+def normalize_peak(y, ceiling_dbfs=-1.0):
+    y = as_audio(y)
+    return y * peak_gain(y, ceiling_dbfs)
 
 def mix_tracks(tracks, normalize=True, ceiling_dbfs=-1.0):
     if not tracks:
-        return np.zeros(1, dtype=np.float32)
+        return zeros(1)
     N = max(len(t) for t in tracks)
-    y = np.zeros(N, dtype=np.float32)
+    y = zeros(N)
     for t in tracks:
-        y[:len(t)] += t.astype(np.float32)
+        if isinstance(t, SparseTrack):
+            t.add_into(y)          # sólo los tramos activos
+        else:
+            y[:len(t)] += t
     if normalize:
-        peak = np.max(np.abs(y)) + 1e-9
-        target = 10 ** (ceiling_dbfs / 20.0)
-        y = y / peak * target
-    return np.clip(y, -1.0, 1.0).astype(np.float32)
+        y *= peak_gain(y, ceiling_dbfs)
+    return np.clip(y, -1.0, 1.0, out=y)
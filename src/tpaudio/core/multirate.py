@@ -0,0 +1,67 @@
+"""
+Síntesis multi-tasa.
+
+Los motores graves (bajo KS, kicks) casi no tienen contenido sobre unos pocos
+kHz: la parte cara de la nota (el lazo KS, los parciales del kick) se puede
+sintetizar a una tasa interna menor y subir a la tasa del render con un filtro
+polifásico (scipy.signal.resample_poly) antes de la mezcla. Las etapas no
+lineales (saturación) y las pensadas para la tasa final (cuerpo KS, click) siguen
+a la tasa final.
+
+El kick aditivo es independiente de la tasa (parciales con frecuencias en Hz) y
+sale igual. El lazo KS, en cambio, está definido por muestra: a menor tasa su
+filtro apaga antes los armónicos y corre la afinación; 'rate' en KS es opcional
+y cambia el timbre.
+
+'rate' en un preset de instruments.yml:
+  - ausente/None: sin cambios (todo a la tasa del render)
+  - "auto": por nota, la menor de sr/4, sr/3, sr/2 cuyo ancho útil cubre la
+    frecuencia más alta de la nota (ver auto_rate)
+  - un número en Hz: esa tasa (si es menor que la del render)
+"""
+from math import gcd
+import numpy as np
+from .precision import as_audio
+from .quality import get_quality
+
+AUTO = "auto"
+MIN_RATE = 8000
+BANDWIDTH = 0.45        # fracción de la tasa interna que deja pasar el filtro de resample_poly
+
+
+def valid_rate(rate) -> bool:
+    return rate is None or rate == AUTO or (isinstance(rate, (int, float)) and rate >= MIN_RATE)
+
+
+def auto_rate(max_hz: float, sr: int) -> int:
+    """Menor tasa sr/k (k = 4, 3, 2) con max_hz dentro de su ancho útil; si no, sr."""
+    for k in (4, 3, 2):
+        if sr % k == 0 and max_hz <= BANDWIDTH * (sr // k):
+            return sr // k
+    return sr
+
+
+def internal_rate(rate, max_hz: float, sr: int) -> int:
+    """Tasa de síntesis para una nota según el 'rate' del preset."""
+    if rate is None:
+        return sr
+    if rate == AUTO:
+        return auto_rate(max_hz, sr)
+    return min(int(rate), sr)
+
+
+def upsample(y: np.ndarray, rate: int, sr: int, n: int = None) -> np.ndarray:
+    """y (a 'rate') → sr con resample_poly (interpolación lineal en calidad borrador,
+    ver core/quality.py); con 'n' se recorta/completa a n muestras."""
+    if get_quality().linear_resample:
+        m = len(y) * sr // rate
+        out = as_audio(np.interp(np.arange(m) * (rate / sr), np.arange(len(y)), y))
+    else:
+        from scipy.signal import resample_poly
+        g = gcd(int(sr), int(rate))
+        out = as_audio(resample_poly(y, sr // g, rate // g))
+    if n is None or len(out) == n:
+        return out
+    if len(out) > n:
+        return out[:n]
+    return np.concatenate([out, np.zeros(n - len(out), dtype=out.dtype)])
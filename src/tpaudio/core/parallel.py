@@ -0,0 +1,342 @@
+"""
+Render de pistas en paralelo (un proceso por pista).
+
+Las pistas son independientes hasta la mezcla: cada TrackJob (notas, motor,
+preset y opcionalmente el strip con sus inserts) va a un worker de un pool de
+procesos, que sintetiza la pista directamente sobre su tramo de un buffer en
+memoria compartida y le aplica los inserts ahí mismo. El audio nunca se picklea:
+sólo viajan las notas, la PresetLibrary compilada y los strips.
+
+Una pista larga se parte además en ventanas de tiempo (SEGMENT_S), cada una una
+tarea del pool que escribe sólo su tramo del buffer, con bordes exactos a la
+muestra: así una pieza de un solo instrumento también escala con los núcleos.
+  - cada ventana sintetiza las notas que suenan en ella, incluidas las que
+    empezaron antes (hasta timeline.RING_S tras su duración); cada muestra suma
+    las mismas notas en el mismo orden que el render entero: mismo audio bit a bit
+  - los inserts arrancan antes del borde, sobre un pre-roll de chain_warmup
+    muestras (la cola de la cadena) que se descarta; la diferencia con procesar
+    la pista entera queda bajo la cola de los efectos (~-100 dB), como en
+    FxGraph._run_strip_sparse. Los LFO siguen en fase (BlockProcessor.seek)
+
+La cabecera del buffer (int64) tiene una bandera de cancelación y las notas
+hechas por tarea, así el proceso padre reporta avance y puede cortar el render.
+Los stems van en el dtype de core/precision.py; cada worker adopta la precisión,
+el umbral de silencio, la calidad (y el modo de conteo de asignaciones) del
+proceso padre, y renderiza a la tasa que se pide (render_tracks(sr=...)).
+
+Con TrackJob.note_cache cada proceso guarda las notas sintetizadas (LRU acotada
+por bytes) y las reusa en trabajos siguientes: sirve a procesos de larga vida
+como server.py, donde el pool sobrevive entre renders.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_EXCEPTION
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Optional
+import numpy as np
+
+from ..constants import SR
+from . import precision
+from . import quality
+from . import silence
+from .rng import DEFAULT_SEED
+from .sparse import lay_notes_sparse
+from .timeline import lay_notes_on_timeline, timeline_length
+
+POLL_S = 0.05
+SEGMENT_S = 10.0                     # ventanas del render en el pool (render_tracks)
+NOTE_CACHE_BYTES = 256 * 2 ** 20     # por proceso
+
+
+class Cancelled(Exception):
+    pass
+
+
+@dataclass
+class TrackJob:
+    key: Any
+    notes: list
+    synth: str
+    preset: Optional[str] = None
+    strip: Any = None         # effects.graph.TrackStrip: inserts + ganancia en el worker
+    note_cache: Optional[str] = None   # espacio de nombres de la caché de notas (None = sin caché)
+    seed: int = DEFAULT_SEED           # semilla del trabajo (core/rng.py)
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+# ----------------------------
+# Worker
+# ----------------------------
+_SAMPLES = {}
+
+
+def _samples(sample_dir):
+    s = _SAMPLES.get(sample_dir)
+    if s is None:
+        from ..synth.sample_piano import load_samples
+        s = _SAMPLES[sample_dir] = load_samples(sample_dir)
+    return s
+
+
+_NOTES = OrderedDict()
+_NOTES_LOCK = threading.Lock()
+_NOTES_STATS = {"bytes": 0, "hits": 0, "misses": 0}
+
+
+def _cached_renderer(rf, ns):
+    """render_fn con caché de notas del proceso. Las notas guardadas se comparten:
+    nadie debe modificarlas in-place (lay_notes_on_timeline sólo las lee).
+    La semilla entra en la clave sólo si el motor la usa."""
+    seeded = getattr(rf, "uses_rng", False)
+
+    def render_fn(pitch, dur, vel, sr, seed=None):
+        key = (ns, pitch, dur, vel, sr, precision.get_precision(), silence.silence_db(),
+               quality.get_quality(), seed if seeded else None)
+        with _NOTES_LOCK:
+            y = _NOTES.get(key)
+            if y is not None:
+                _NOTES.move_to_end(key)
+                _NOTES_STATS["hits"] += 1
+                return y
+            _NOTES_STATS["misses"] += 1
+        y = rf(pitch, dur, vel, sr, seed=seed) if seeded else rf(pitch, dur, vel, sr)
+        if y.base is not None:      # nota recortada (vista): guardar sólo lo audible
+            y = y.copy()
+        with _NOTES_LOCK:
+            if key not in _NOTES:
+                _NOTES[key] = y
+                _NOTES_STATS["bytes"] += y.nbytes
+            while _NOTES_STATS["bytes"] > NOTE_CACHE_BYTES and _NOTES:
+                _NOTES_STATS["bytes"] -= _NOTES.popitem(last=False)[1].nbytes
+        return y
+    render_fn.uses_rng = seeded
+    return render_fn
+
+
+def note_cache_info() -> dict:
+    """Estado de la caché de notas de este proceso."""
+    with _NOTES_LOCK:
+        return dict(_NOTES_STATS, entries=len(_NOTES))
+
+
+def _renderer(job: TrackJob, presets, sample_dir):
+    from ..registry import SYNTHS, make_renderer
+    samples = _samples(sample_dir) if SYNTHS.resolve(job.synth) == "sample" else None
+    rf = make_renderer(job.synth, job.preset, presets, samples=samples)
+    if job.note_cache is not None:
+        rf = _cached_renderer(rf, (job.note_cache, job.synth, job.preset))
+    return rf
+
+
+def _progress(head, idx):
+    def on_note(i):
+        head[1 + idx] = i + 1
+        if head[0]:
+            raise Cancelled()
+    return on_note
+
+
+def _render_sparse(idx, job: TrackJob, presets, sample_dir, head, n, sr=SR):
+    """Pista sin inserts en este proceso: SparseTrack (sólo los tramos con notas)
+    con la ganancia del strip aplicada. Devuelve (pista, tiempo de síntesis)."""
+    rf = _renderer(job, presets, sample_dir)
+    t0 = time.perf_counter()
+    y = lay_notes_sparse(job.notes, rf, n, on_note=_progress(head, idx), seed=job.seed, key=job.key, sr=sr)
+    if job.strip is not None and job.strip.gain != 1.0:
+        y *= job.strip.gain
+    return y, time.perf_counter() - t0
+
+
+def _render_into(idx, job: TrackJob, presets, sample_dir, head, y, sr=SR, start=0):
+    """Sintetiza sobre y (in-place) la pista desde la muestra 'start' (la pista entera o
+    una ventana) y le aplica su strip. Devuelve tiempos.
+    En una ventana los inserts arrancan antes (pre-roll de chain_warmup muestras,
+    sintetizadas y descartadas) para llegar a 'start' con el estado que traerían."""
+    from ..effects.graph import FxGraph, chain_warmup
+    rf = _renderer(job, presets, sample_dir)
+    pre = min(start, chain_warmup(job.strip.inserts, sr)) if job.strip is not None and start else 0
+    x = y if pre == 0 else precision.zeros(pre + len(y))
+    t0 = time.perf_counter()
+    lay_notes_on_timeline(job.notes, rf, out=x, on_note=_progress(head, idx), seed=job.seed, key=job.key,
+                          sr=sr, start=start - pre)
+    t1 = time.perf_counter()
+    if job.strip is not None:
+        z = FxGraph._run_strip(job.strip, x, sr, start=start - pre)[pre:pre + len(y)]
+        y[:len(z)] = z
+        y[len(z):] = 0.0
+    return t1 - t0, time.perf_counter() - t1
+
+
+def _length(job: TrackJob, sr=SR) -> int:
+    """Buffer de la pista: notas + cola de sus inserts."""
+    n = timeline_length(job.notes, sr)
+    if job.strip is not None and job.strip.inserts:
+        from ..effects.graph import chain_tail
+        n += chain_tail(job.strip.inserts, sr)
+    return n
+
+
+def _windows(n: int, sr: int, segment_s) -> list:
+    """Ventanas [a, b) de SEGMENT_S (sin segment_s: la pista entera). La última absorbe
+    un resto menor que media ventana."""
+    w = int(segment_s * sr) if segment_s else 0
+    if w <= 0 or n <= w + w // 2:
+        return [(0, n)]
+    out = [(a, a + w) for a in range(0, n - w - w // 2, w)]
+    return out + [(out[-1][1], n)]
+
+
+def _worker(slot, job, presets, sample_dir, shm_name, n_slots, offset, n, start, sr, prec, silence_db, qual,
+            alloc_debug):
+    precision.set_precision(prec)
+    silence.set_silence_db(silence_db)
+    quality.set_quality(qual)
+    stats = precision.enable_alloc_debug() if alloc_debug else None
+    shm = shared_memory.SharedMemory(name=shm_name)
+    head = y = None
+    try:
+        head = np.ndarray((1 + n_slots,), dtype=np.int64, buffer=shm.buf)
+        y = np.ndarray((n,), dtype=precision.dtype(), buffer=shm.buf, offset=offset)
+        times = _render_into(slot, job, presets, sample_dir, head, y, sr, start)
+        return (slot,) + times + (dict(stats.sites) if stats is not None else None,)
+    finally:
+        head = y = None      # soltar las vistas antes de cerrar el segmento
+        shm.close()
+        if stats is not None:
+            precision.disable_alloc_debug()
+
+
+_POOL = None
+_POOL_WORKERS = 0
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    """Pool reutilizado entre renders (la GUI no paga el arranque cada vez)."""
+    global _POOL, _POOL_WORKERS
+    if _POOL is None or _POOL_WORKERS != workers:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = ProcessPoolExecutor(max_workers=workers)
+        _POOL_WORKERS = workers
+    return _POOL
+
+
+def warm_pool(workers: int, sample_dir: str = None):
+    """Arranca los procesos del pool ya (y carga antes los samples, que los workers
+    heredan por fork) para que el primer render no pague el arranque."""
+    if sample_dir:
+        _samples(sample_dir)
+    if workers > 1:
+        pool = _pool(workers)
+        for f in [pool.submit(os.getpid) for _ in range(workers)]:
+            f.result()
+
+
+def shutdown_pool():
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(wait=True, cancel_futures=True)
+        _POOL = None
+
+
+# ----------------------------
+# API
+# ----------------------------
+def render_tracks(jobs, presets=None, sample_dir: str = None, workers: int = None,
+                  progress: Callable = None, cancelled: Callable = None, prof=None, sr: int = SR,
+                  segment_s: Optional[float] = SEGMENT_S) -> dict:
+    """
+    Renderiza los TrackJob y devuelve {clave: audio en precision.dtype()} (con inserts/ganancia
+    del strip ya aplicados si el job lo trae). Con workers ≤ 1 o una sola tarea
+    corre en este proceso, y las pistas sin inserts salen como core/sparse.SparseTrack.
+    En el pool cada pista se parte en ventanas de segment_s segundos (None: una
+    tarea por pista), así una pista larga también reparte su síntesis entre núcleos.
+    progress(clave, hechas, total) se llama periódicamente; si cancelled() da True
+    se cancela el render (lanza Cancelled).
+    """
+    from ..presets import PresetLibrary
+    from .profiler import get_profiler
+    prof = get_profiler(prof)
+    presets = presets if presets is not None else PresetLibrary()
+    jobs = [j for j in jobs if j.notes]
+    if not jobs:
+        return {}
+    workers = default_workers() if workers is None else workers
+    lengths = [_length(j, sr) for j in jobs]
+    tasks = [(idx, a, b) for idx, n in enumerate(lengths)
+             for a, b in _windows(n, sr, segment_s if workers > 1 else None)]
+    workers = min(workers, len(tasks))
+    dt = precision.dtype()
+    head_bytes = 8 * (1 + len(tasks))
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]) * dt.itemsize + head_bytes
+
+    if workers <= 1:
+        head = np.zeros(1 + len(jobs), dtype=np.int64)
+        out = {}
+        for idx, (job, n) in enumerate(zip(jobs, lengths)):
+            if cancelled is not None and cancelled():
+                raise Cancelled()
+            if job.strip is None or not job.strip.inserts:
+                y, synth_s = _render_sparse(idx, job, presets, sample_dir, head, n, sr)
+            else:
+                y = precision.zeros(n)
+                synth_s, _fx_s = _render_into(idx, job, presets, sample_dir, head, y, sr)
+                y = silence.trim_tail(y)
+            prof.record(job.key, job.synth, len(job.notes), synth_s)
+            if progress is not None:
+                progress(job.key, len(job.notes), len(job.notes))
+            out[job.key] = y
+        return out
+
+    if cancelled is not None and cancelled():
+        raise Cancelled()
+    shm = shared_memory.SharedMemory(create=True, size=head_bytes + dt.itemsize * int(sum(lengths)))
+    stats = precision.alloc_stats()
+    head = None
+    try:
+        head = np.ndarray((1 + len(tasks),), dtype=np.int64, buffer=shm.buf)
+        head[:] = 0
+        pool = _pool(workers)
+        # una tarea por ventana: escribe sólo su tramo [a, b) del buffer de la pista
+        futs = [pool.submit(_worker, slot, jobs[idx], presets, sample_dir, shm.name, len(tasks),
+                            int(offsets[idx]) + a * dt.itemsize, b - a, a, sr,
+                            dt.name, silence.silence_db(), quality.get_quality(), stats is not None)
+                for slot, (idx, a, b) in enumerate(tasks)]
+        slots = [[s for s, t in enumerate(tasks) if t[0] == idx] for idx in range(len(jobs))]
+        pending = set(futs)
+        while pending:
+            done, pending = wait(pending, timeout=POLL_S, return_when=FIRST_EXCEPTION)
+            if cancelled is not None and cancelled():
+                head[0] = 1
+            if progress is not None:
+                for idx, job in enumerate(jobs):       # cada ventana recorre todas las notas
+                    progress(job.key, int(sum(head[1 + s] for s in slots[idx])) // len(slots[idx]),
+                             len(job.notes))
+            for f in done:
+                if f.exception() is not None:
+                    head[0] = 1          # que el resto corte cuanto antes
+                    wait(pending)
+                    raise f.exception()
+                slot, synth_s, _fx_s, sites = f.result()
+                if sites:
+                    stats.merge(sites)
+                idx, a, _b = tasks[slot]
+                prof.record(jobs[idx].key, jobs[idx].synth, len(jobs[idx].notes) if a == 0 else 0, synth_s)
+
+        if head[0] or (cancelled is not None and cancelled()):
+            raise Cancelled()
+        # Copia de los stems (hasta su última muestra audible) fuera del segmento, que se libera acá
+        out = {}
+        for job, off, n in zip(jobs, offsets, lengths):
+            out[job.key] = silence.trim_tail(np.ndarray((n,), dtype=dt, buffer=shm.buf, offset=int(off))).copy()
+        return out
+    finally:
+        head = None          # soltar la vista antes de cerrar el segmento
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,256 @@
+"""
+Reproducción de baja latencia.
+
+Un hilo de render escribe bloques en un RingBuffer preasignado y el backend de
+salida (callback de PyAudio, o un backend nulo / a archivo para pruebas sin
+placa de audio) los consume. La reproducción arranca apenas hay 'prefill'
+bloques en el anillo, mientras el resto del tema se sigue renderizando.
+"""
+import threading
+import time
+import numpy as np
+
+from ..constants import BLOCK, SR
+
+try:
+    import pyaudio
+    HAS_PYAUDIO = True
+except Exception:
+    HAS_PYAUDIO = False
+
+
+class RingBuffer:
+    """Anillo SPSC (un productor, un consumidor) sin locks: cada lado sólo
+    avanza su propio índice y los índices crecen monótonamente."""
+
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self._buf = np.zeros(self.capacity, dtype=np.float32)
+        self._w = 0
+        self._r = 0
+
+    @property
+    def available_read(self) -> int:
+        return self._w - self._r
+
+    @property
+    def available_write(self) -> int:
+        return self.capacity - (self._w - self._r)
+
+    def write(self, x: np.ndarray) -> int:
+        n = min(len(x), self.available_write)
+        i = self._w % self.capacity
+        k = min(n, self.capacity - i)
+        self._buf[i:i + k] = x[:k]
+        self._buf[:n - k] = x[k:n]
+        self._w += n
+        return n
+
+    def read(self, out: np.ndarray) -> int:
+        n = min(len(out), self.available_read)
+        i = self._r % self.capacity
+        k = min(n, self.capacity - i)
+        out[:k] = self._buf[i:i + k]
+        out[k:n] = self._buf[:n - k]
+        self._r += n
+        return n
+
+
+# ----------------------------
+# Backends de salida
+# ----------------------------
+class NullBackend:
+    """Consume bloques desde un hilo propio; 'realtime' respeta el ritmo de la placa."""
+    output_latency = 0.0
+
+    def __init__(self, sr: int = SR, block: int = BLOCK, realtime: bool = False):
+        self.sr, self.block, self.realtime = sr, block, realtime
+        self._thread = None
+        self._running = False
+
+    def start(self, callback, ready=None):
+        """'ready' (opcional) indica si hay datos: sin tiempo real sólo se consume entonces."""
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, args=(callback, ready), daemon=True)
+        self._thread.start()
+
+    def _loop(self, callback, ready):
+        period = self.block / self.sr
+        t_next = time.perf_counter()
+        while self._running:
+            if self.realtime:
+                self.consume(callback(self.block))
+                t_next += period
+                time.sleep(max(0.0, t_next - time.perf_counter()))
+            elif ready is None or ready():
+                self.consume(callback(self.block))
+            else:
+                time.sleep(period / 4)
+
+    def consume(self, block: np.ndarray):
+        pass
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class FileSinkBackend(NullBackend):
+    """Como NullBackend, pero escribe lo 'reproducido' a un archivo (AudioWriter)."""
+
+    def __init__(self, path: str, sr: int = SR, block: int = BLOCK, realtime: bool = False):
+        super().__init__(sr, block, realtime)
+        from .audio_io import AudioWriter
+        self._writer = AudioWriter(path, sr, background=False)
+
+    def consume(self, block: np.ndarray):
+        self._writer.write(block)
+
+    def stop(self):
+        super().stop()
+        self._writer.close()
+
+
+class PyAudioBackend:
+    def __init__(self, sr: int = SR, block: int = BLOCK):
+        if not HAS_PYAUDIO:
+            raise RuntimeError("pyaudio no está instalado")
+        self.sr, self.block = sr, block
+        self._pa = None
+        self._stream = None
+
+    @property
+    def output_latency(self) -> float:
+        return self._stream.get_output_latency() if self._stream is not None else 0.0
+
+    def start(self, callback, ready=None):
+        def _cb(in_data, frame_count, time_info, status):
+            return (callback(frame_count).tobytes(), pyaudio.paContinue)
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(format=pyaudio.paFloat32, channels=1, rate=self.sr,
+                                     output=True, frames_per_buffer=self.block, stream_callback=_cb)
+        self._stream.start_stream()
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+
+def default_backend(sr: int = SR, block: int = BLOCK):
+    return PyAudioBackend(sr, block) if HAS_PYAUDIO else NullBackend(sr, block, realtime=True)
+
+
+# ----------------------------
+# Motor de reproducción
+# ----------------------------
+class PlaybackEngine:
+    def __init__(self, backend=None, sr: int = SR, block: int = BLOCK,
+                 buffer_s: float = 0.5, prefill_blocks: int = 4):
+        self.sr, self.block = sr, block
+        self.backend = backend or default_backend(sr, block)
+        self.ring = RingBuffer(max(int(buffer_s * sr), 2 * block))
+        self.prefill = min(prefill_blocks * block, self.ring.capacity)
+        self._out = np.zeros(max(block, 4096), dtype=np.float32)
+        self._producer = None
+        self._eof = threading.Event()
+        self._stop = threading.Event()
+        self._started = False
+        self._t_play = None
+        # Estadísticas
+        self.underruns = 0
+        self.frames_played = 0
+        self.time_to_first_sound = None
+        self._lat_sum = 0.0
+        self._lat_max = 0.0
+        self._lat_n = 0
+
+    # --- lado consumidor (callback de la placa) ---
+    def _callback(self, frames: int) -> np.ndarray:
+        if frames > len(self._out):
+            self._out = np.zeros(frames, dtype=np.float32)
+        out = self._out[:frames]
+        buffered = self.ring.available_read
+        n = self.ring.read(out)
+        if n < frames:
+            out[n:] = 0.0
+            if not self._eof.is_set():
+                self.underruns += 1
+        if n and self.time_to_first_sound is None:
+            self.time_to_first_sound = time.perf_counter() - self._t_play
+        self.frames_played += n
+        # latencia = lo que ya estaba encolado delante de la muestra nueva + la de la placa
+        lat = buffered / self.sr + self.backend.output_latency
+        self._lat_sum += lat
+        self._lat_max = max(self._lat_max, lat)
+        self._lat_n += 1
+        return out
+
+    # --- lado productor (hilo de render) ---
+    def _produce(self, blocks):
+        try:
+            for blk in blocks:
+                blk = np.asarray(blk, dtype=np.float32)
+                i = 0
+                while i < len(blk):
+                    if self._stop.is_set():
+                        return
+                    i += self.ring.write(blk[i:])
+                    if not self._started and self.ring.available_read >= self.prefill:
+                        self._start_backend()
+                    if i < len(blk):
+                        time.sleep(self.block / self.sr / 4)
+        finally:
+            self._eof.set()
+            if not self._started and not self._stop.is_set():
+                self._start_backend()
+
+    def _ready(self) -> bool:
+        avail = self.ring.available_read
+        return avail >= self.block or (avail > 0 and self._eof.is_set())
+
+    def _start_backend(self):
+        self._started = True
+        self.backend.start(self._callback, self._ready)
+
+    def play(self, blocks):
+        """Reproduce un iterable de bloques (p.ej. stream_tracks) renderizado en un hilo aparte."""
+        self._t_play = time.perf_counter()
+        self._producer = threading.Thread(target=self._produce, args=(blocks,), daemon=True)
+        self._producer.start()
+        return self
+
+    @property
+    def done(self) -> bool:
+        return self._eof.is_set() and self.ring.available_read == 0
+
+    def wait(self, timeout: float = None) -> bool:
+        t0 = time.perf_counter()
+        while not self.done:
+            if timeout is not None and time.perf_counter() - t0 > timeout:
+                return False
+            time.sleep(self.block / self.sr)
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._producer is not None:
+            self._producer.join()
+        if self._started:
+            self.backend.stop()
+            self._started = False
+
+    def stats(self) -> dict:
+        return {
+            "underruns": self.underruns,
+            "frames_played": self.frames_played,
+            "time_to_first_sound_s": self.time_to_first_sound,
+            "latency_mean_s": self._lat_sum / self._lat_n if self._lat_n else None,
+            "latency_max_s": self._lat_max if self._lat_n else None,
+        }
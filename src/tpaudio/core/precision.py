@@ -0,0 +1,181 @@
+"""
+Precisión de procesamiento del pipeline.
+
+Todo el audio (notas, timelines, buffers del grafo de efectos, mezcla) viaja en
+un único dtype: float32 por defecto (mitad de memoria y de ancho de banda) o
+float64 para renders de referencia. Se elige con set_precision() / precision()
+o con la variable de entorno TPAUDIO_PRECISION; los motores (registry.make_renderer),
+el mezclador y los efectos entregan siempre ese dtype.
+
+Reglas para no copiar de más:
+  - as_audio(x) convierte sólo si el dtype no coincide (si coincide devuelve x)
+  - zeros()/empty() asignan en el dtype activo; el resto se hace in-place
+  - la fase de los osciladores se acumula en float64 (sine()): en float32 el
+    índice de tiempo pierde resolución a los pocos segundos y la nota desafina
+
+Modo depuración: alloc_debug() cuenta por sitio (módulo.función) los buffers de
+audio asignados con zeros()/empty() y las conversiones de as_audio(). Sólo ve
+esos puntos de paso, no los temporales internos de numpy.
+"""
+import contextlib
+import os
+import sys
+import threading
+from collections import defaultdict
+import numpy as np
+
+PRECISIONS = {"float32": np.dtype(np.float32), "float64": np.dtype(np.float64)}
+
+
+def _parse(name) -> np.dtype:
+    dt = PRECISIONS.get(np.dtype(name).name if not isinstance(name, str) else name)
+    if dt is None:
+        raise ValueError(f"Precisión desconocida: {name} (usar {' | '.join(PRECISIONS)})")
+    return dt
+
+
+_DTYPE = _parse(os.environ.get("TPAUDIO_PRECISION", "float32"))
+_STATS = None      # AllocStats activo (modo depuración) o None
+
+
+def dtype() -> np.dtype:
+    """dtype de audio activo."""
+    return _DTYPE
+
+
+def get_precision() -> str:
+    return _DTYPE.name
+
+
+def set_precision(name) -> str:
+    """Fija la precisión ('float32' | 'float64' o un dtype). Devuelve la anterior."""
+    global _DTYPE
+    prev, _DTYPE = _DTYPE.name, _parse(name)
+    return prev
+
+
+@contextlib.contextmanager
+def precision(name):
+    prev = set_precision(name)
+    try:
+        yield _DTYPE
+    finally:
+        set_precision(prev)
+
+
+# ----------------------------
+# Buffers
+# ----------------------------
+def zeros(n) -> np.ndarray:
+    a = np.zeros(n, dtype=_DTYPE)
+    if _STATS is not None:
+        _STATS.add(a, copy=False)
+    return a
+
+
+def empty(n) -> np.ndarray:
+    a = np.empty(n, dtype=_DTYPE)
+    if _STATS is not None:
+        _STATS.add(a, copy=False)
+    return a
+
+
+def as_audio(x) -> np.ndarray:
+    """x en el dtype activo, sin copiar si ya lo está."""
+    a = np.asarray(x, dtype=_DTYPE)
+    if _STATS is not None and a is not x:
+        _STATS.add(a, copy=True)
+    return a
+
+
+def sine(w: float, n: int, phi0: float = 0.0, start: int = 0, out: np.ndarray = None) -> np.ndarray:
+    """sin(w·i + φ0) para i en [start, start+n) (w en rad/muestra). La fase se
+    calcula en float64 y el seno se escribe en 'out' (o un buffer nuevo) en dtype()."""
+    ph = np.arange(start, start + n, dtype=np.float64)
+    ph *= w
+    ph += phi0
+    if out is None:
+        out = empty(n)
+    return np.sin(ph, out=out)
+
+
+# ----------------------------
+# Modo depuración
+# ----------------------------
+class AllocStats:
+    """Asignaciones de buffers de audio por sitio durante un render."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sites = defaultdict(lambda: {"allocs": 0, "copies": 0, "bytes": 0})
+
+    def add(self, a: np.ndarray, copy: bool):
+        f = sys._getframe(2)
+        site = f"{f.f_globals.get('__name__', '?').rsplit('.', 1)[-1]}.{f.f_code.co_name}"
+        with self._lock:
+            s = self.sites[site]
+            s["copies" if copy else "allocs"] += 1
+            s["bytes"] += a.nbytes
+
+    def merge(self, sites: dict):
+        """Suma los conteos de otro proceso (ver parallel.render_tracks)."""
+        with self._lock:
+            for site, c in sites.items():
+                s = self.sites[site]
+                for k in s:
+                    s[k] += c.get(k, 0)
+
+    def totals(self) -> dict:
+        t = {"allocs": 0, "copies": 0, "bytes": 0}
+        for s in self.sites.values():
+            for k in t:
+                t[k] += s[k]
+        return t
+
+    def report(self) -> dict:
+        return dict(self.totals(), sites={k: dict(v) for k, v in self.sites.items()})
+
+    def to_profiler(self, prof):
+        for site, s in self.sites.items():
+            prof.count(f"alloc.{site}", s["allocs"] + s["copies"])
+        t = self.totals()
+        prof.count("alloc.total", t["allocs"] + t["copies"])
+        prof.count("alloc.copies", t["copies"])
+        prof.count("alloc.bytes", t["bytes"])
+
+    def print_summary(self, top: int = 10):
+        t = self.totals()
+        print(f"[ALLOC] {t['allocs']} buffers + {t['copies']} conversiones, "
+              f"{t['bytes'] / 2 ** 20:.1f} MB ({get_precision()})")
+        ranked = sorted(self.sites.items(), key=lambda kv: -(kv[1]["allocs"] + kv[1]["copies"]))
+        for site, s in ranked[:top]:
+            print(f"[ALLOC] {site:32s} {s['allocs']:7d} + {s['copies']:5d} copias  "
+                  f"{s['bytes'] / 2 ** 20:8.1f} MB")
+
+
+def alloc_stats():
+    """AllocStats activo o None."""
+    return _STATS
+
+
+def enable_alloc_debug() -> AllocStats:
+    global _STATS
+    if _STATS is None:
+        _STATS = AllocStats()
+    return _STATS
+
+
+def disable_alloc_debug():
+    global _STATS
+    _STATS = None
+
+
+@contextlib.contextmanager
+def alloc_debug():
+    prev = _STATS
+    stats = enable_alloc_debug() if prev is None else prev
+    try:
+        yield stats
+    finally:
+        if prev is None:
+            disable_alloc_debug()
@@ -0,0 +1,114 @@
+"""
+Protocolo común de procesamiento por bloques.
+
+Todo efecto (y toda voz, vía NoteVoice) expone:
+  - reset(fs)               → inicializa el estado interno para la frecuencia fs
+  - process_block(x, out)   → procesa un bloque y escribe el resultado en 'out'
+  - latency                 → retardo (muestras) que introduce el proceso
+  - tail_length             → muestras que sigue sonando luego de que la entrada calla
+
+El estado vive en el objeto, así que procesar una señal en bloques de cualquier
+tamaño da el mismo resultado que procesarla entera.
+
+Para procesar un tramo suelto de una señal larga (ventanas de core/parallel.py),
+BlockProcessor agrega:
+  - warmup                  → muestras de entrada previas que bastan para que el
+                              estado converja (por defecto, tail_length)
+  - seek(n)                 → ubica lo que depende del tiempo absoluto (la fase de
+                              un LFO) en la muestra n; process(x, fs, start=n) lo usa
+"""
+from typing import Protocol, runtime_checkable
+import numpy as np
+
+from .precision import as_audio, empty
+
+
+@runtime_checkable
+class Processor(Protocol):
+    latency: int
+
+    @property
+    def tail_length(self) -> int: ...
+
+    def reset(self, fs: int) -> None: ...
+
+    def process_block(self, x: np.ndarray, out: np.ndarray) -> np.ndarray: ...
+
+
+class BlockProcessor:
+    """Base para efectos con estado: agrega process(x, fs) sobre el buffer completo."""
+    latency = 0
+    fs = None
+
+    @property
+    def tail_length(self) -> int:
+        return 0
+
+    @property
+    def warmup(self) -> int:
+        return self.tail_length
+
+    def reset(self, fs: int) -> None:
+        self.fs = int(fs)
+
+    def _check_reset(self) -> None:
+        """Lo que depende de la tasa (colas, warmup) se calcula en reset(fs)."""
+        if self.fs is None:
+            raise RuntimeError(f"{type(self).__name__}: falta reset(fs) antes de pedir tail_length/warmup")
+
+    def seek(self, n: int) -> None:
+        pass
+
+    def process_block(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def process(self, x: np.ndarray, fs: int, start: int = 0) -> np.ndarray:
+        """Procesa x entera tras reset(); 'start': muestra absoluta donde empieza x."""
+        x = as_audio(x)
+        self.reset(fs)
+        if start:
+            self.seek(start)
+        out = empty(x.shape[0])
+        return self.process_block(x, out)
+
+
+def process_blocks(proc, x: np.ndarray, fs: int, block: int) -> np.ndarray:
+    """Procesa 'x' en bloques de 'block' muestras (tras reset). Útil para streaming y tests."""
+    x = np.asarray(x)
+    proc.reset(fs)
+    y = np.empty(x.shape[0], dtype=x.dtype)
+    for i0 in range(0, x.shape[0], block):
+        i1 = min(i0 + block, x.shape[0])
+        proc.process_block(x[i0:i1], y[i0:i1])
+    return y
+
+
+class NoteVoice(BlockProcessor):
+    """Adaptador de una función de nota de buffer completo (render_note_*, kick)
+    al protocolo de bloques: renderiza en reset() y entrega la nota por bloques.
+    La entrada se ignora (es una fuente); tras el final escribe ceros."""
+
+    def __init__(self, render_fn, pitch: int, dur_s: float, velocity: int):
+        self.render_fn = render_fn
+        self.pitch = pitch
+        self.dur_s = dur_s
+        self.velocity = velocity
+        self._y = None
+        self._pos = 0
+
+    def reset(self, fs: int) -> None:
+        super().reset(fs)
+        self._y = as_audio(self.render_fn(self.pitch, self.dur_s, self.velocity, self.fs))
+        self._pos = 0
+
+    @property
+    def done(self) -> bool:
+        return self._y is not None and self._pos >= len(self._y)
+
+    def process_block(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        n = out.shape[0]
+        seg = self._y[self._pos:self._pos + n]
+        out[:len(seg)] = seg
+        out[len(seg):] = 0.0
+        self._pos += n
+        return out
@@ -0,0 +1,159 @@
+"""
+Instrumentación del pipeline de render: tiempos por etapa, notas y tiempo de
+síntesis por pista/motor, tasas de acierto de cachés y pico de memoria.
+
+Cuando no se pide perfilado se usa NULL_PROFILER: todos sus métodos son no-ops
+y wrap_render() devuelve la misma función, así el costo es prácticamente nulo.
+"""
+import contextlib
+import json
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._stages = defaultdict(lambda: {"total_s": 0.0, "calls": 0})
+        self._tracks = {}
+        self._engines = defaultdict(lambda: {"notes": 0, "synth_s": 0.0})
+        self._caches = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._counters = defaultdict(int)
+        self._started_tm = False
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tm = True
+
+    # --- etapas ---
+    @contextlib.contextmanager
+    def span(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            with self._lock:
+                s = self._stages[stage]
+                s["total_s"] += dt
+                s["calls"] += 1
+
+    # --- síntesis por nota ---
+    def wrap_render(self, render_fn, track, engine: str):
+        """Envuelve una función de nota (pitch, dur, vel, sr) para contar notas y tiempo."""
+        key = str(track)
+        with self._lock:
+            self._tracks.setdefault(key, {"engine": engine, "notes": 0, "synth_s": 0.0})
+
+        def timed(pitch, dur, vel, sr, **kw):
+            t0 = time.perf_counter()
+            y = render_fn(pitch, dur, vel, sr, **kw)
+            dt = time.perf_counter() - t0
+            with self._lock:
+                tr = self._tracks[key]
+                tr["notes"] += 1
+                tr["synth_s"] += dt
+                en = self._engines[engine]
+                en["notes"] += 1
+                en["synth_s"] += dt
+            return y
+        timed.uses_rng = getattr(render_fn, "uses_rng", False)
+        return timed
+
+    def record(self, track, engine: str, notes: int, synth_s: float):
+        """Suma notas/tiempo medidos fuera de wrap_render (p.ej. en otro proceso)."""
+        with self._lock:
+            tr = self._tracks.setdefault(str(track), {"engine": engine, "notes": 0, "synth_s": 0.0})
+            tr["notes"] += notes
+            tr["synth_s"] += synth_s
+            en = self._engines[engine]
+            en["notes"] += notes
+            en["synth_s"] += synth_s
+
+    # --- cachés y contadores ---
+    def cache(self, name: str, hit: bool):
+        with self._lock:
+            self._caches[name]["hits" if hit else "misses"] += 1
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    # --- reporte ---
+    def report(self) -> dict:
+        caches = {}
+        for name, c in self._caches.items():
+            total = c["hits"] + c["misses"]
+            caches[name] = dict(c, hit_rate=(c["hits"] / total) if total else 0.0)
+        peak = None
+        if self.memory and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        return {
+            "wall_s": time.perf_counter() - self._t0,
+            "stages": dict(self._stages),
+            "tracks": dict(self._tracks),
+            "engines": dict(self._engines),
+            "caches": caches,
+            "counters": dict(self._counters),
+            "peak_mb": peak,
+        }
+
+    def save(self, path: str):
+        rep = self.report()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rep, f, indent=2)
+        print(f"[OK] Perfil → {path}")
+        return rep
+
+    def print_summary(self):
+        rep = self.report()
+        for stage, s in sorted(rep["stages"].items(), key=lambda kv: -kv[1]["total_s"]):
+            print(f"[PROF] {stage:14s} {s['total_s']:8.3f} s  ({s['calls']}x)")
+        for name, c in rep["caches"].items():
+            print(f"[PROF] cache {name}: {c['hit_rate'] * 100:.1f}% aciertos")
+
+    def close(self):
+        if self._started_tm:
+            tracemalloc.stop()
+            self._started_tm = False
+
+
+class NullProfiler:
+    enabled = False
+    _null_span = contextlib.nullcontext()
+
+    def span(self, stage: str):
+        return self._null_span
+
+    def wrap_render(self, render_fn, track, engine: str):
+        return render_fn
+
+    def record(self, track, engine: str, notes: int, synth_s: float):
+        pass
+
+    def cache(self, name: str, hit: bool):
+        pass
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+    def report(self) -> dict:
+        return {}
+
+    def print_summary(self):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def get_profiler(profiler=None):
+    return profiler if profiler is not None else NULL_PROFILER
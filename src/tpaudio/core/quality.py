@@ -0,0 +1,72 @@
+"""
+Calidad del render: completa o borrador.
+
+El borrador (--draft) es para escuchar un arreglo mientras se arma: cuesta una
+fracción del render completo a cambio de fidelidad.
+  - tasa de muestreo DRAFT.sr (22050 Hz): notas, timeline, efectos y archivo
+    trabajan a esa tasa (la tasa es un parámetro más del pipeline, ver RenderSession)
+  - los motores aditivos (additive, piano, modal) usan a lo sumo
+    DRAFT.max_partials parciales
+  - remuestreo lineal (np.interp) en lugar del polifásico de core/multirate.py
+  - reverb corta: IR y decaimiento × DRAFT.reverb_scale
+  - mono, como siempre: la mezcla es de un canal
+Se elige con set_quality() / quality() o con la variable de entorno
+TPAUDIO_QUALITY; la tasa la fija quien arma el render (Quality.sr es la de
+referencia de cada modo).
+"""
+import contextlib
+import os
+from dataclasses import dataclass
+from typing import Optional
+from ..constants import SR
+
+
+@dataclass(frozen=True)
+class Quality:
+    name: str
+    sr: int
+    max_partials: Optional[int] = None     # None: los del motor
+    linear_resample: bool = False
+    reverb_scale: float = 1.0
+
+
+FULL = Quality("full", SR)
+DRAFT = Quality("draft", 22050, max_partials=8, linear_resample=True, reverb_scale=0.35)
+QUALITIES = {q.name: q for q in (FULL, DRAFT)}
+
+
+def _parse(q) -> Quality:
+    if isinstance(q, Quality):
+        return q
+    found = QUALITIES.get(q)
+    if found is None:
+        raise ValueError(f"Calidad desconocida: {q} (usar {' | '.join(QUALITIES)})")
+    return found
+
+
+_Q = _parse(os.environ.get("TPAUDIO_QUALITY", FULL.name))
+
+
+def get_quality() -> Quality:
+    return _Q
+
+
+def set_quality(q) -> Quality:
+    """Fija la calidad ('full' | 'draft' o una Quality). Devuelve la anterior."""
+    global _Q
+    prev, _Q = _Q, _parse(q)
+    return prev
+
+
+@contextlib.contextmanager
+def quality(q):
+    prev = set_quality(q)
+    try:
+        yield _Q
+    finally:
+        set_quality(prev)
+
+
+def partials(n: int) -> int:
+    """Cantidad de parciales a sintetizar de los n del motor."""
+    return n if _Q.max_partials is None else min(n, _Q.max_partials)
@@ -0,0 +1,31 @@
+"""
+Aleatoriedad determinista.
+
+Ningún motor usa el estado global de np.random: los que tienen ruido o fases
+aleatorias reciben 'rng' (un Generator o una semilla). Para un render, cada nota
+usa la semilla note_seed(semilla del trabajo, pista, índice de la nota), así el
+audio es el mismo bit a bit sin importar cuántos procesos repartan las pistas
+ni en qué orden se sinteticen las notas, y una nota cacheada con su semilla
+en la clave se puede reusar sin cambiar el resultado.
+"""
+import zlib
+import numpy as np
+
+DEFAULT_SEED = 0
+
+
+def _track_id(track) -> int:
+    if isinstance(track, (int, np.integer)) and track >= 0:
+        return int(track)
+    return zlib.crc32(str(track).encode("utf-8"))    # nombres de instrumento
+
+
+def note_seed(seed, track, index) -> tuple:
+    """Semilla de la nota 'index' de 'track' (hashable: sirve de clave de caché)."""
+    return (int(seed), _track_id(track), int(index))
+
+
+def make_rng(rng=None, default=DEFAULT_SEED) -> np.random.Generator:
+    """Generator a partir de un Generator (se devuelve tal cual), una semilla
+    (int o tupla de note_seed) o None (→ 'default')."""
+    return np.random.default_rng(default if rng is None else rng)
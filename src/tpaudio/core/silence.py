@@ -0,0 +1,88 @@
+"""
+Umbral de silencio.
+
+Bajo el umbral (−96 dBFS por defecto, el piso de 16 bits) el audio se trata como
+silencio y no se calcula ni se guarda:
+  - las notas salen recortadas en su cola real (registry.make_renderer) y el lazo
+    KS deja de iterar en cuanto toda su línea queda bajo el umbral
+  - las pistas y la mezcla terminan en su última muestra audible (tail_end)
+  - el grafo por bloques no procesa los tramos donde todas las entradas callan
+    y las colas de los efectos ya se agotaron
+Se elige con set_silence_db() / silence() o con la variable de entorno
+TPAUDIO_SILENCE_DB; None (o "off") lo desactiva: todo se calcula completo.
+
+flush_denormals() pone a cero los restos subnormales que dejan las recursiones
+(líneas de delay, historia de la reverb) al apagarse: operar con subnormales
+es mucho más lento en la mayoría de las CPU.
+"""
+import contextlib
+import os
+import numpy as np
+from ..constants import BLOCK
+
+SILENCE_DB = -96.0
+DENORMAL = 1e-30           # muy por debajo de cualquier umbral útil
+
+
+def _parse(db):
+    if db is None or (isinstance(db, str) and db.lower() in ("off", "none", "")):
+        return None
+    return float(db)
+
+
+_DB = _parse(os.environ.get("TPAUDIO_SILENCE_DB", SILENCE_DB))
+
+
+def silence_db():
+    return _DB
+
+
+def set_silence_db(db):
+    """Fija el umbral en dBFS (None/"off": desactivado). Devuelve el anterior."""
+    global _DB
+    prev, _DB = _DB, _parse(db)
+    return prev
+
+
+@contextlib.contextmanager
+def silence(db):
+    prev = set_silence_db(db)
+    try:
+        yield
+    finally:
+        set_silence_db(prev)
+
+
+def threshold() -> float:
+    """Umbral lineal (0.0 si está desactivado)."""
+    return 0.0 if _DB is None else 10.0 ** (_DB / 20.0)
+
+
+def is_silent(x: np.ndarray, thr: float = None) -> bool:
+    thr = threshold() if thr is None else thr
+    return thr > 0.0 and (x.shape[0] == 0 or float(np.max(np.abs(x))) < thr)
+
+
+def tail_end(y: np.ndarray, thr: float = None, block: int = BLOCK) -> int:
+    """Índice siguiente a la última muestra con |y| ≥ umbral (len(y) si está desactivado).
+    Recorre desde el final por bloques: el costo es el del silencio final."""
+    thr = threshold() if thr is None else thr
+    if thr <= 0.0:
+        return len(y)
+    for i1 in range(len(y), 0, -block):
+        i0 = max(0, i1 - block)
+        loud = np.flatnonzero(np.abs(y[i0:i1]) >= thr)
+        if loud.size:
+            return i0 + int(loud[-1]) + 1
+    return 0
+
+
+def trim_tail(y: np.ndarray, thr: float = None) -> np.ndarray:
+    """y sin el silencio final (vista, sin copia)."""
+    return y[:tail_end(y, thr)]
+
+
+def flush_denormals(x: np.ndarray) -> np.ndarray:
+    """Pone a cero in-place los valores con |x| < DENORMAL."""
+    x[np.abs(x) < DENORMAL] = 0.0
+    return x
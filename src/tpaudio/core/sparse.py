@@ -0,0 +1,151 @@
+"""
+Pistas dispersas: sólo los tramos donde la pista suena.
+
+Una pista que toca cuatro compases en un tema de diez minutos no necesita un
+buffer del largo del tema. SparseTrack guarda segmentos (offset, audio) sin
+solaparse y ordenados; fuera de ellos hay silencio. Las notas que se solapan (o
+quedan a menos de MERGE_GAP muestras) se funden en un mismo segmento.
+
+Se comporta como un array 1-D de sólo lectura donde hace falta (len(), y[a:b]
+devuelve un tramo denso, np.asarray() la densifica), y add_into() la suma
+directamente sobre la mezcla: memoria y tiempo de mezcla escalan con el audio
+activo y no con largo del tema × pistas.
+"""
+import bisect
+import numpy as np
+from ..constants import BLOCK, SR
+from .precision import dtype, zeros
+from .rng import DEFAULT_SEED, note_seed
+from .silence import tail_end, threshold
+
+MERGE_GAP = BLOCK      # huecos más cortos no valen un segmento aparte
+
+
+class SparseTrack:
+    def __init__(self, length: int, segments=None):
+        self.length = int(length)
+        self.segments = list(segments or [])      # [(offset, audio)] ordenados, sin solaparse
+        self._ends = []                           # fin de cada segmento (para bisect)
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def dtype(self):
+        return self.segments[0][1].dtype if self.segments else dtype()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(y.nbytes for _o, y in self.segments)
+
+    @property
+    def active(self) -> int:
+        """Muestras cubiertas por segmentos."""
+        return sum(len(y) for _o, y in self.segments)
+
+    def add_into(self, out: np.ndarray, gain: float = 1.0, start: int = 0) -> np.ndarray:
+        """out += gain · pista[start:start+len(out)] (sólo los segmentos que caen ahí)."""
+        end = start + len(out)
+        if len(self._ends) != len(self.segments):
+            self._ends = [off + len(y) for off, y in self.segments]
+        for off, y in self.segments[bisect.bisect_right(self._ends, start):]:
+            if off >= end:
+                break
+            a, b = max(off, start), min(off + len(y), end)
+            if b <= a:
+                continue
+            seg = y[a - off:b - off]
+            if gain == 1.0:
+                out[a - start:b - start] += seg
+            else:
+                out[a - start:b - start] += gain * seg
+        return out
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step not in (None, 1):
+            raise TypeError("SparseTrack sólo admite cortes contiguos y[a:b]")
+        start, stop, _ = item.indices(self.length)
+        return self.add_into(np.zeros(max(0, stop - start), self.dtype), start=start)
+
+    def to_dense(self) -> np.ndarray:
+        return self.add_into(np.zeros(self.length, self.dtype))
+
+    def __array__(self, dtype=None, copy=None):
+        y = self.to_dense()
+        return y if dtype is None else y.astype(dtype, copy=False)
+
+    def __imul__(self, g):
+        for _o, y in self.segments:
+            y *= g
+        return self
+
+    def scaled(self, g) -> "SparseTrack":
+        return SparseTrack(self.length, [(o, y * g) for o, y in self.segments])
+
+
+class SparseBuilder:
+    """Arma una SparseTrack con notas (i0, audio) que llegan en orden de inicio."""
+
+    def __init__(self, length: int, gap: int = MERGE_GAP):
+        self.length, self.gap = int(length), int(gap)
+        self.track = SparseTrack(self.length)
+        self._pending = []            # notas del segmento en curso
+        self._start = self._end = self._last = 0
+
+    def add(self, i0: int, sig: np.ndarray):
+        i0 = int(i0)
+        i1 = min(i0 + len(sig), self.length)
+        if i0 < 0 or i1 <= i0:
+            return
+        if i0 < self._last:
+            raise ValueError("SparseBuilder: las notas deben llegar ordenadas por inicio")
+        self._last = i0
+        if self._pending and i0 > self._end + self.gap:
+            self._flush()
+        if not self._pending:
+            self._start = i0
+        self._pending.append((i0, sig[:i1 - i0]))
+        self._end = max(self._end, i1)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        y = zeros(self._end - self._start)
+        for i0, sig in self._pending:
+            y[i0 - self._start:i0 - self._start + len(sig)] += sig
+        self.track.segments.append((self._start, y))
+        self._pending = []
+
+    def finish(self) -> SparseTrack:
+        """La pista termina en su última muestra audible (core/silence.py); sin
+        umbral, en el largo pedido."""
+        self._flush()
+        thr = threshold()
+        if thr > 0.0:
+            segs = self.track.segments
+            while segs and tail_end(segs[-1][1], thr) == 0:
+                segs.pop()
+            if segs:
+                off, y = segs[-1]
+                segs[-1] = (off, y[:tail_end(y, thr)])
+            self.track.length = off + len(segs[-1][1]) if segs else 0
+        return self.track
+
+
+def lay_notes_sparse(notes, render_fn, length: int, on_note=None, seed=DEFAULT_SEED, key=None,
+                     sr: int = SR) -> SparseTrack:
+    """Como timeline.lay_notes_on_timeline (mismo orden de suma: mismo audio bit a bit)
+    pero devuelve una SparseTrack de 'length' muestras."""
+    seeded = getattr(render_fn, "uses_rng", False)
+    order = sorted(range(len(notes)), key=lambda i: notes[i][1])
+    b = SparseBuilder(length)
+    for j, i in enumerate(order):
+        _, start, dur, pitch, vel = notes[i]
+        if seeded:
+            sig = render_fn(pitch, dur, vel, sr, seed=note_seed(seed, key, i))
+        else:
+            sig = render_fn(pitch, dur, vel, sr)
+        b.add(int(start * sr), sig)
+        if on_note is not None:
+            on_note(j)
+    return b.finish()
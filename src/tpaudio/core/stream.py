@@ -0,0 +1,83 @@
+"""
+Render incremental por bloques: las muestras anteriores a T quedan completas en
+cuanto se sintetizaron todas las notas que empiezan antes de T, así que se puede
+entregar (reproducir, escribir) el comienzo del tema mientras se renderiza el resto.
+"""
+import numpy as np
+from ..constants import BLOCK
+from ..effects.graph import FxGraph
+from .precision import as_audio, zeros
+from .rng import DEFAULT_SEED, note_seed
+from .silence import is_silent, threshold
+
+
+class _TrackStream:
+    def __init__(self, notes, render_fn, sr: int, seed=DEFAULT_SEED, key=None):
+        # (índice original, nota): la semilla de cada nota no depende del orden de salida
+        self.notes = sorted(enumerate(notes), key=lambda n: n[1][1])
+        self.render_fn = render_fn
+        self.seeded = getattr(render_fn, "uses_rng", False)
+        self.seed, self.key = seed, key
+        self.sr = sr
+        self.next = 0
+        self.active = []   # [(i0, audio)] notas que todavía suenan
+
+    @property
+    def finished(self) -> bool:
+        return self.next >= len(self.notes) and not self.active
+
+    def fill(self, t0: int, out: np.ndarray) -> np.ndarray:
+        n = out.shape[0]
+        t1 = t0 + n
+        while self.next < len(self.notes):
+            idx, (_ti, start, dur, pitch, vel) = self.notes[self.next]
+            i0 = int(round(start * self.sr))
+            if i0 >= t1:
+                break
+            if self.seeded:
+                sig = self.render_fn(pitch, dur, vel, self.sr, seed=note_seed(self.seed, self.key, idx))
+            else:
+                sig = self.render_fn(pitch, dur, vel, self.sr)
+            sig = as_audio(sig)
+            self.active.append((i0, sig))
+            self.next += 1
+        out[:] = 0.0
+        keep = []
+        for i0, sig in self.active:
+            a = max(i0, t0)
+            b = min(i0 + len(sig), t1)
+            if b > a:
+                out[a - t0:b - t0] += sig[a - i0:b - i0]
+            if i0 + len(sig) > t1:
+                keep.append((i0, sig))
+        self.active = keep
+        return out
+
+
+def stream_tracks(tracks: dict, sr: int, block: int = BLOCK, graph: FxGraph = None,
+                  seed: int = DEFAULT_SEED):
+    """Generador de bloques master (precision.dtype()) a partir de {clave: (notas, render_fn)}.
+    Aplica el grafo de efectos por bloques y termina al agotarse su cola."""
+    graph = graph or FxGraph()
+    streams = {k: _TrackStream(notes, rf, sr, seed, k) for k, (notes, rf) in tracks.items()}
+    for k in streams:
+        graph.strip(k)
+    graph.reset(sr)
+    tail = graph.tail_length
+
+    bufs = {k: zeros(block) for k in streams}
+    thr = threshold()
+    t = 0
+    silent = 0
+    quiet = tail + 1          # como core/jobs._run_graph: tramos callados sin procesar
+    while silent < tail or not all(s.finished for s in streams.values()):
+        if all(s.finished for s in streams.values()):
+            silent += block
+        blocks = {k: s.fill(t, bufs[k]) for k, s in streams.items()}
+        quiet = quiet + block if all(is_silent(b, thr) for b in blocks.values()) else 0
+        if quiet < tail + block:
+            yield graph.process_block(blocks, block)
+        else:
+            graph.skip(block, t)
+            yield zeros(block)
+        t += block
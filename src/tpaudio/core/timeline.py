@@ -1,16 +1,48 @@
-import numpy as np
 from ..constants import SR
+from .precision import zeros
+from .rng import DEFAULT_SEED, note_seed
+from .silence import trim_tail
 
-def lay_notes_on_timeline(notes, render_fn):
+RING_S = 1.0        # cota de lo que una nota suena más allá de su duración
+
+def timeline_length(notes, sr=SR) -> int:
+    """Cota de muestras del timeline de una pista (para asignar el buffer): hasta la
+    última nota + RING_S para notas que suenan más que su duración."""
+    t_end = max(s + dur for _, s, dur, _, _ in notes) + RING_S if notes else 0.0
+    return int(sr * t_end)
+
+def lay_notes_on_timeline(notes, render_fn, out=None, on_note=None, seed=DEFAULT_SEED, key=None, sr=SR,
+                          start=0):
     # notes: list of (track, start_s, dur_s, pitch, vel)
-    t_end = max(s + dur for _, s, dur, _, _ in notes) + 1.0 if notes else 0.0
-    y = np.zeros(int(SR * t_end), dtype=np.float32)
-    for _, start, dur, pitch, vel in notes:
-        sig = render_fn(pitch, dur, vel, SR)
-        i0 = int(start * SR); i1 = i0 + len(sig)
-        if i0 < 0: continue
-        if i1 > len(y):
-            i1 = len(y)
-            sig = sig[:i1 - i0]
-        y[i0:i1] += sig
-    return y
+    # out: buffer ya asignado (p.ej. en memoria compartida) donde se acumula
+    # on_note(j): se llama luego de cada nota con las hechas - 1 (avance / cancelación)
+    # seed, key: la nota i usa la semilla note_seed(seed, key, i) si el motor la usa
+    # Las notas se suman en orden de inicio, igual que core/sparse.lay_notes_sparse
+    # Sin 'out' devuelve el timeline hasta su última muestra audible (core/silence.py)
+    # start: muestra del timeline donde empieza 'out' (una ventana, ver core/parallel.py);
+    # sólo se sintetizan las notas que pueden sonar ahí (hasta RING_S tras su duración),
+    # y cada muestra suma las mismas notas en el mismo orden que el timeline entero
+    y = zeros(timeline_length(notes, sr)) if out is None else out
+    end = start + len(y)
+    seeded = getattr(render_fn, "uses_rng", False)
+    order = sorted(range(len(notes)), key=lambda i: notes[i][1])
+    for j, i in enumerate(order):
+        _, t0, dur, pitch, vel = notes[i]
+        i0 = int(t0 * sr)
+        if i0 < end and (start == 0 or i0 + int((dur + RING_S) * sr) > start):
+            if seeded:
+                sig = render_fn(pitch, dur, vel, sr, seed=note_seed(seed, key, i))
+            else:
+                sig = render_fn(pitch, dur, vel, sr)
+            if i0 >= 0:
+                i0 -= start
+                if i0 < 0:
+                    sig, i0 = sig[-i0:], 0
+                i1 = i0 + len(sig)
+                if i1 > len(y):
+                    i1 = len(y)
+                    sig = sig[:max(0, i1 - i0)]
+                y[i0:i1] += sig
+        if on_note is not None:
+            on_note(j)
+    return trim_tail(y) if out is None else y
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+import numpy as np
+from ..core.precision import dtype
+from ..core.processor import BlockProcessor
+from ..core.silence import flush_denormals
+
+
+@dataclass
+class Delay(BlockProcessor):
+    time_ms: float = 200.0
+    feedback: float = 0.25
+    mix: float = 0.2
+
+    def reset(self, fs: int) -> None:
+        super().reset(fs)
+        self._D = int(round(max(0.0, self.time_ms) * 1e-3 * self.fs))
+        self._d = np.zeros(self._D, dtype=dtype())  # últimas D muestras de la línea
+
+    @property
+    def tail_length(self) -> int:
+        self._check_reset()
+        fb = abs(float(np.clip(self.feedback, -0.95, 0.95)))
+        turns = int(np.ceil(np.log(1e-5) / np.log(fb))) if fb > 0 else 0
+        return self._D * (1 + turns)
+
+    def process_block(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """Delay con realimentación: d[n] = x[n] + fb·d[n-D], wet = d[n-D].
+        Se calcula por tramos de D muestras (cada tramo depende sólo del anterior)."""
+        n = x.shape[0]
+        D = self._D
+        mix = float(np.clip(self.mix, 0.0, 1.0))
+        if D <= 0 or mix == 0.0:
+            out[:] = x
+            return out
+        fb = float(np.clip(self.feedback, -0.95, 0.95))
+
+        d = np.empty(D + n, dtype=self._d.dtype)
+        d[:D] = self._d
+        for i0 in range(0, n, D):
+            i1 = min(i0 + D, n)
+            d[D + i0:D + i1] = x[i0:i1] + fb * d[i0:i1]
+
+        np.multiply(x, 1.0 - mix, out=out)
+        d[:n] *= mix
+        out += d[:n]
+        self._d = flush_denormals(d[n:])     # vista: d es un buffer nuevo en cada bloque
+        return out
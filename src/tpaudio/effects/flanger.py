@@ -1,33 +1,65 @@
 from dataclasses import dataclass
 import numpy as np
+from ..core.precision import dtype
+from ..core.processor import BlockProcessor
+from ..core.silence import flush_denormals
 
 @dataclass
-class Flanger:
+class Flanger(BlockProcessor):
     rate_hz: float = 0.25
     depth_ms: float = 3.0
     base_ms: float = 2.0
     feedback: float = 0.2
     mix: float = 0.5
 
-    def process(self, x: np.ndarray, fs: int) -> np.ndarray:
-        n = len(x)
-        y = np.zeros_like(x, dtype=np.float64)
+    def reset(self, fs: int) -> None:
+        super().reset(fs)
         max_delay_ms = self.base_ms + self.depth_ms
-        max_delay_samps = int(np.ceil(max_delay_ms * 1e-3 * fs)) + 2
-        buf = np.zeros(max_delay_samps, dtype=np.float64)
-        wptr = 0
-        t = np.arange(n) / fs
-        lfo = np.sin(2 * np.pi * self.rate_hz * t)
-        delay_samps = (self.base_ms + self.depth_ms * (0.5 * (lfo + 1.0))) * 1e-3 * fs
+        self._M = int(np.ceil(max_delay_ms * 1e-3 * self.fs)) + 2
+        self._w = np.zeros(self._M, dtype=dtype())  # últimas M muestras de la línea
+        self._n = 0                                  # fase del LFO (muestras)
+
+    @property
+    def tail_length(self) -> int:
+        # La realimentación es un peine de M muestras: cae |fb| por vuelta (-100 dB)
+        self._check_reset()
+        fb = abs(float(np.clip(self.feedback, -0.95, 0.95)))
+        turns = int(np.ceil(np.log(1e-5) / np.log(fb))) if fb > 0 else 0
+        return self._M * (1 + turns)
+
+    def seek(self, n: int) -> None:
+        self._n = int(n)
+
+    def process_block(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        n = x.shape[0]
+        M = self._M
         fb = float(np.clip(self.feedback, -0.95, 0.95))
         mix = float(np.clip(self.mix, 0.0, 1.0))
-        for i in range(n):
-            buf[wptr] = x[i] + fb * buf[wptr]
-            read_pos = (wptr - delay_samps[i]) % max_delay_samps
-            i0 = int(np.floor(read_pos))
-            i1 = (i0 + 1) % max_delay_samps
-            frac = read_pos - i0
-            delayed = (1 - frac) * buf[i0] + frac * buf[i1]
-            y[i] = (1 - mix) * x[i] + mix * delayed
-            wptr = (wptr + 1) % max_delay_samps
-        return y.astype(x.dtype)
+
+        # Línea realimentada w[n] = x[n] + fb·w[n-M], por tramos de M muestras
+        w = np.empty(M + n, dtype=self._w.dtype)
+        w[:M] = self._w
+        for i0 in range(0, n, M):
+            i1 = min(i0 + M, n)
+            w[M + i0:M + i1] = x[i0:i1] + fb * w[i0:i1]
+
+        # Lectura modulada con interpolación lineal (posiciones y LFO en float64)
+        t = (self._n + np.arange(n)) / self.fs
+        lfo = np.sin(2 * np.pi * self.rate_hz * t)
+        delay_samps = (self.base_ms + self.depth_ms * (0.5 * (lfo + 1.0))) * 1e-3 * self.fs
+        pos = M + np.arange(n) - delay_samps
+        i0 = np.floor(pos).astype(np.int64)
+        frac = (pos - i0).astype(w.dtype)
+        i1 = np.minimum(i0 + 1, M + n - 1)
+        a = w[i0]
+        delayed = w[i1]
+        delayed -= a
+        delayed *= frac
+        delayed += a
+        delayed *= mix
+        np.multiply(x, 1 - mix, out=out)
+        out += delayed
+
+        self._w = flush_denormals(w[n:])     # vista: w es un buffer nuevo en cada bloque
+        self._n += n
+        return out
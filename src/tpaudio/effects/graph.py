@@ -0,0 +1,295 @@
+"""
+Grafo de efectos compilado desde presets/effects.yml.
+
+Formato del YAML:
+
+    tracks:
+      0:                      # clave de pista (índice MIDI o nombre de instrumento)
+        inserts:              # cadena de inserción propia de la pista
+          - {type: delay, time_ms: 180, feedback: 0.2, mix: 0.15}
+        sends: {verb: 0.25}   # nivel de envío a cada bus compartido
+        gain: 1.0
+      "*":                    # valores por defecto para pistas no listadas
+        sends: {verb: 0.15}
+    buses:                    # buses de envío compartidos (100% wet)
+      verb:
+        - {type: reverb, mix: 1.0}
+    master:                   # cadena final sobre la mezcla
+      - {type: limiter, ceiling_dbfs: -1.0}
+
+Una pista declarada como lista se interpreta como sus inserts (formato anterior).
+Las ramas independientes (inserts de cada pista, cada bus) corren en un pool de
+hilos: NumPy/SciPy liberan el GIL en las operaciones pesadas. Las pistas pueden
+llegar como core/sparse.SparseTrack: sin inserts se mezclan por tramos y con
+inserts se procesa sólo cada tramo más la cola de la cadena. La mezcla termina
+en su última muestra audible (core/silence.py), con lugar para las colas.
+"""
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional
+import numpy as np
+
+from ..core.precision import as_audio, dtype, empty, zeros
+from ..core.silence import tail_end, threshold, trim_tail
+from ..core.sparse import SparseTrack
+from ..registry import EFFECTS
+
+DEFAULT_TRACK_KEY = "*"
+
+
+def make_effect(entry: dict):
+    """Instancia un efecto a partir de una entrada del YAML ({type: ..., params...})."""
+    kind = (entry or {}).get("type")
+    if kind not in EFFECTS:
+        raise ValueError(f"Efecto no soportado: {kind}")
+    cls = EFFECTS.get(kind)   # se importa en el primer uso
+    names = {f.name for f in fields(cls)}
+    kwargs = {k: v for k, v in entry.items() if k in names}
+    unknown = set(entry) - names - {"type", "algo"}
+    if unknown:
+        print(f"[WARN] Parámetros ignorados en efecto '{kind}': {sorted(unknown)}")
+    return cls(**kwargs)
+
+
+def run_chain(chain, x: np.ndarray, fs: int, start: int = 0) -> np.ndarray:
+    """'start': muestra absoluta donde empieza x (un tramo de una pista más larga)."""
+    for fx in chain:
+        x = fx.process(x, fs, start) if start else fx.process(x, fs)
+    return x
+
+
+def chain_tail(chain, fs: int) -> int:
+    """Cola (muestras) de una cadena a 'fs' (resetea sus efectos)."""
+    for fx in chain:
+        fx.reset(fs)
+    return sum(fx.tail_length for fx in chain)
+
+
+def chain_warmup(chain, fs: int) -> int:
+    """Entrada previa (muestras) que necesita la cadena para llegar al estado que
+    tendría procesando la pista desde el principio (resetea sus efectos)."""
+    for fx in chain:
+        fx.reset(fs)
+    return sum(getattr(fx, "warmup", fx.tail_length) for fx in chain)
+
+
+@dataclass
+class TrackStrip:
+    inserts: List = field(default_factory=list)
+    sends: Dict[str, float] = field(default_factory=dict)
+    gain: float = 1.0
+
+
+@dataclass
+class FxGraph:
+    tracks: Dict[str, TrackStrip] = field(default_factory=dict)
+    default: TrackStrip = field(default_factory=TrackStrip)
+    buses: Dict[str, List] = field(default_factory=dict)
+    master: List = field(default_factory=list)
+    max_workers: Optional[int] = None
+    # Buffers internos de process_block (salidas de inserts/buses), reusados entre bloques
+    _scratch: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def strip(self, key) -> TrackStrip:
+        # Cada pista no listada recibe su propia copia del strip por defecto:
+        # los efectos tienen estado y no pueden compartirse entre pistas.
+        k = str(key)
+        if k not in self.tracks:
+            self.tracks[k] = copy.deepcopy(self.default)
+        return self.tracks[k]
+
+    def _all_effects(self):
+        for strip in self.tracks.values():
+            yield from strip.inserts
+        for chain in self.buses.values():
+            yield from chain
+        yield from self.master
+
+    # --- procesamiento por bloques (streaming) ---
+    def reset(self, fs: int) -> None:
+        self._scratch.clear()
+        for fx in self._all_effects():
+            fx.reset(fs)
+
+    def skip(self, n: int, pos: int) -> None:
+        """Bloque [pos, pos+n) salteado (entradas y colas en silencio): los efectos que
+        dependen del tiempo (LFO) quedan en pos+n como si lo hubieran procesado."""
+        for fx in self._all_effects():
+            seek = getattr(fx, "seek", None)
+            if seek is not None:
+                seek(pos + n)
+
+    def _buf(self, key, n: int) -> np.ndarray:
+        b = self._scratch.get(key)
+        if b is None or b.shape[0] != n or b.dtype != dtype():
+            b = self._scratch[key] = empty(n)
+        return b
+
+    @property
+    def tail_length(self) -> int:
+        """Cola máxima (muestras) de inserts → bus → master (tras reset(): si no, los
+        efectos lanzan RuntimeError)."""
+        chain_tail = lambda chain: sum(fx.tail_length for fx in chain)
+        tracks = max((chain_tail(s.inserts) for s in self.tracks.values()), default=0)
+        buses = max((chain_tail(c) for c in self.buses.values()), default=0)
+        return tracks + buses + chain_tail(self.master)
+
+    def process_block(self, blocks: dict, n: int) -> np.ndarray:
+        """blocks: {clave: bloque de n muestras} → bloque master. Las pistas nuevas
+        deben registrarse con strip() antes del reset()."""
+        mix = zeros(n)
+        bus_in = {}
+        for b in self.buses:
+            bus_in[b] = self._buf(("bus", b), n)
+            bus_in[b][:] = 0.0
+        for k, y in blocks.items():
+            strip = self.tracks[str(k)]
+            if strip.gain != 1.0:
+                y = np.multiply(y, strip.gain, out=self._buf(("gain", k), n))
+            for fx in strip.inserts:
+                y = fx.process_block(y, self._buf(id(fx), n))
+            mix += y
+            for bus, level in strip.sends.items():
+                if bus in bus_in and level != 0.0:
+                    tmp = np.multiply(y, level, out=self._buf("send", n))
+                    bus_in[bus] += tmp
+        for bus, x in bus_in.items():
+            for fx in self.buses[bus]:
+                x = fx.process_block(x, self._buf(id(fx), n))
+            mix += x
+        # La salida del master es del llamador: buffers nuevos
+        for fx in self.master:
+            mix = fx.process_block(mix, empty(n))
+        return mix
+
+    def process(self, tracks: dict, fs: int, inserts_done: bool = False) -> np.ndarray:
+        """tracks: {clave: audio mono}. Devuelve la mezcla master procesada.
+        inserts_done=True: las pistas ya traen inserts y ganancia aplicados
+        (p.ej. renderizadas por core/parallel.render_tracks)."""
+        if not tracks:
+            return zeros(1)
+        keys = list(tracks.keys())
+        strips = [self.strip(k) for k in keys]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # 1) Inserts por pista (en paralelo)
+            if inserts_done:
+                post = [_as_track(tracks[k]) for k in keys]
+            else:
+                futs = [pool.submit(self._run_strip, st, tracks[k], fs) for k, st in zip(keys, strips)]
+                post = [f.result() for f in futs]
+
+            # 2) Suma dry + alimentación de buses (con lugar para la cola de buses y master)
+            tail = max((chain_tail(c, fs) for c in self.buses.values()), default=0)
+            N = max(len(y) for y in post) + tail + chain_tail(self.master, fs)
+            mix = zeros(N)
+            bus_in = {}
+            for st, y in zip(strips, post):
+                sparse = isinstance(y, SparseTrack)
+                if sparse:
+                    y.add_into(mix)        # pistas dispersas: sólo sus tramos activos
+                else:
+                    mix[:len(y)] += y
+                for bus, level in st.sends.items():
+                    if bus not in self.buses or level == 0.0:
+                        continue
+                    acc = bus_in.get(bus)
+                    if acc is None:
+                        acc = bus_in[bus] = zeros(N)
+                    if sparse:
+                        y.add_into(acc, gain=level)
+                    else:
+                        acc[:len(y)] += level * y
+
+            # 3) Buses compartidos: una sola pasada por bus (en paralelo)
+            futs = [pool.submit(run_chain, self.buses[b], x, fs) for b, x in bus_in.items()]
+            for f in futs:
+                mix += f.result()
+
+        # 4) Cadena master
+        return trim_tail(run_chain(self.master, mix, fs))
+
+    @staticmethod
+    def _run_strip(strip: TrackStrip, y, fs: int, start: int = 0):
+        """Ganancia + inserts; la salida se extiende con la cola de los inserts y
+        termina en su última muestra audible. 'start' como en run_chain."""
+        if isinstance(y, SparseTrack):
+            if not strip.inserts:          # sólo ganancia: sigue dispersa
+                return y if strip.gain == 1.0 else y.scaled(strip.gain)
+            return FxGraph._run_strip_sparse(strip, y, fs, start)
+        y = as_audio(y)
+        if strip.gain != 1.0:
+            y = y * strip.gain
+        if not strip.inserts:
+            return y
+        n = tail_end(y) + chain_tail(strip.inserts, fs)
+        if n > len(y):
+            y = np.concatenate([y, zeros(n - len(y))])
+        return trim_tail(run_chain(strip.inserts, y[:n], fs, start))
+
+    @staticmethod
+    def _run_strip_sparse(strip: TrackStrip, y: SparseTrack, fs: int, start: int = 0) -> SparseTrack:
+        """Inserts sobre una pista dispersa: cada grupo de segmentos separados por más
+        que la cola de la cadena se procesa aparte (tras reset, con la cadena llevada a
+        la posición del grupo: moduladores en fase con el render denso); los silencios
+        entre grupos no se calculan. Sin umbral de silencio, la pista entera en denso."""
+        tail = chain_tail(strip.inserts, fs)
+        if threshold() <= 0.0:
+            return FxGraph._run_strip(strip, y.to_dense(), fs, start)
+        runs = []
+        for off, seg in y.segments:
+            if runs and off - runs[-1][1] <= tail:
+                runs[-1][1] = off + len(seg)
+            else:
+                runs.append([off, off + len(seg)])
+        out = SparseTrack(0)
+        for a, b in runs:
+            x = y[a:b]
+            if strip.gain != 1.0:
+                x *= strip.gain
+            x = np.concatenate([x, zeros(tail)])
+            x = trim_tail(run_chain(strip.inserts, x, fs, start + a))
+            if len(x):
+                out.segments.append((a, x))
+                out.length = a + len(x)
+        return out
+
+
+def _as_track(y):
+    return y if isinstance(y, SparseTrack) else as_audio(y)
+
+
+def _compile_strip(decl, exclude) -> TrackStrip:
+    if isinstance(decl, list):
+        decl = {"inserts": decl}
+    decl = decl or {}
+    inserts = [make_effect(e) for e in (decl.get("inserts") or []) if e.get("type") not in exclude]
+    sends = {str(b): float(v) for b, v in (decl.get("sends") or {}).items()}
+    return TrackStrip(inserts=inserts, sends=sends, gain=float(decl.get("gain", 1.0)))
+
+
+def compile_fx_graph(fx_presets: dict, exclude=(), max_workers: Optional[int] = None) -> FxGraph:
+    """Compila el dict de effects.yml en un FxGraph.
+    'exclude' descarta tipos de efecto (p.ej. ("reverb",) para --no-reverb)."""
+    fx_presets = fx_presets or {}
+    exclude = set(exclude)
+    tracks_decl = dict(fx_presets.get("tracks") or {})
+    default = _compile_strip(tracks_decl.pop(DEFAULT_TRACK_KEY, None), exclude)
+    tracks = {str(k): _compile_strip(v, exclude) for k, v in tracks_decl.items()}
+
+    buses = {}
+    for name, chain in (fx_presets.get("buses") or {}).items():
+        buses[str(name)] = [make_effect(e) for e in (chain or []) if e.get("type") not in exclude]
+    for strip in [default, *tracks.values()]:
+        for b in strip.sends:
+            if b not in buses:
+                print(f"[WARN] Envío a bus inexistente: {b}")
+    # un bus vacío (p.ej. reverb excluida) no aporta nada: se descarta con sus envíos
+    buses = {k: v for k, v in buses.items() if v}
+    for strip in [default, *tracks.values()]:
+        strip.sends = {b: lvl for b, lvl in strip.sends.items() if b in buses}
+
+    master = [make_effect(e) for e in (fx_presets.get("master") or []) if e.get("type") not in exclude]
+    return FxGraph(tracks=tracks, default=default, buses=buses, master=master,
+                   max_workers=max_workers)
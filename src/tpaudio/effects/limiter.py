@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+import numpy as np
+from ..core.processor import BlockProcessor
+
+CHUNK = 1 << 16      # tramos internos: temporales acotados aunque x sea el tema entero
+
+
+@dataclass
+class Limiter(BlockProcessor):
+    ceiling_dbfs: float = -1.0
+    release_ms: float = 80.0
+
+    def reset(self, fs: int) -> None:
+        super().reset(fs)
+        self._gain = 1.0
+
+    @property
+    def warmup(self) -> int:
+        # sin cola, pero la ganancia recuerda los picos: recuperación hasta 1e-5
+        self._check_reset()
+        return int(np.ceil(np.log(1e5) * max(1.0, self.release_ms * 1e-3 * self.fs)))
+
+    def process_block(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """Limitador de pico: ataque instantáneo y recuperación exponencial de la ganancia."""
+        if x.shape[0] > CHUNK:
+            for i0 in range(0, x.shape[0], CHUNK):
+                self.process_block(x[i0:i0 + CHUNK], out[i0:i0 + CHUNK])
+            return out
+        c = 10 ** (self.ceiling_dbfs / 20.0)
+        a = np.abs(x)
+        over = np.flatnonzero(a > c)
+        if over.size == 0 and self._gain >= 1.0:
+            out[:] = x
+            return out
+
+        # Atenuación d = 1 - ganancia: d[i] = max(r[i], d[i-1]·rel), con r = 1 - c/|x|
+        # donde hay picos. Desenrollada, d[i] = rel^i · max_{j<=i}(r[j] · rel^-j): un
+        # máximo acumulado (en log, sin desbordes), sin lazo por muestra.
+        tau = max(1.0, self.release_ms * 1e-3 * self.fs)
+        # Con ganancia 1 y sin picos no hay nada que hacer: arrancamos ahí
+        start = 0 if self._gain < 1.0 else int(over[0])
+        n = x.shape[0] - start
+        idx = np.arange(n, dtype=np.float64)
+        r = 1.0 - np.minimum(1.0, c / (a[start:] + 1e-12)).astype(np.float64)
+        logd = np.full(n, -np.inf)
+        hit = r > 0.0
+        logd[hit] = np.log(r[hit]) + idx[hit] / tau
+        if self._gain < 1.0:     # estado del bloque anterior (j = -1)
+            logd[0] = max(logd[0], np.log(1.0 - self._gain) - 1.0 / tau)
+        np.maximum.accumulate(logd, out=logd)
+        d = np.exp(logd - idx / tau)
+        self._gain = 1.0 - float(d[-1])
+        g = 1.0 - d
+        out[:start] = x[:start]
+        np.multiply(x[start:], g, out=out[start:])
+        return out
@@ -1,80 +1,106 @@
 from dataclasses import dataclass
 import numpy as np
+from ..core.precision import as_audio, dtype
+from ..core.processor import BlockProcessor
+from ..core.quality import get_quality
+from ..core.silence import DENORMAL, flush_denormals
 
 
 try:
-    from scipy.signal import fftconvolve
+    from scipy.signal import fftconvolve, lfilter
     _HAS_SCIPY = True
 except Exception:
     _HAS_SCIPY = False
 
 
-def _ensure_f32(x: np.ndarray) -> np.ndarray:
-    return x.astype(np.float32, copy=False)
-
-
-def _one_pole_lpf(x: np.ndarray, alpha: float) -> np.ndarray:
-    """Filtro paso-bajo simple (por brillo de cola). alpha ~ 0..1"""
+def _one_pole_lpf(x: np.ndarray, alpha: float, acc: float = 0.0):
+    """Filtro paso-bajo simple (por brillo de cola). alpha ~ 0..1
+    Devuelve (y, estado final) para poder continuar en el bloque siguiente."""
+    a = x.dtype.type(alpha)
+    if _HAS_SCIPY:
+        # Coeficientes y estado en el dtype de x: si no, lfilter sube a float64
+        dt = x.dtype
+        y, zf = lfilter(np.array([a], dt), np.array([1.0, a - 1.0], dt), x,
+                        zi=np.array([(1.0 - a) * acc], dt))
+        y = as_audio(y)
+        return y, float(y[-1]) if y.shape[0] else acc
     y = np.empty_like(x)
-    acc = np.float32(0.0)
-    a = np.float32(alpha)
+    acc = x.dtype.type(acc)
     for i in range(x.shape[0]):
         acc = acc + a * (x[i] - acc)
         y[i] = acc
-    return y
+    return y, float(acc)
 
 
 @dataclass
-class Reverb:
-    room_size: float = 0.5      
-    decay_s: float = 1.8        
+class Reverb(BlockProcessor):
+    room_size: float = 0.5
+    decay_s: float = 1.8
     pre_delay_ms: float = 20.0
-    brightness: float = 0.6     
-    mix: float = 0.25           
-
-    def _build_ir(self, n: int, fs: int) -> np.ndarray:
-        """Construye una IR exponencial (cola) con duración proporcional al room_size/decay_s."""
-
-        delay_len = int(max(1, self.room_size * 0.06 * fs))
+    brightness: float = 0.6
+    mix: float = 0.25
+
+    def _build_ir(self, fs: int) -> np.ndarray:
+        """Construye una IR exponencial (cola) con duración proporcional al room_size/decay_s.
+        En calidad borrador ambos se acortan (core/quality.py)."""
+        scale = get_quality().reverb_scale
+        delay_len = int(max(1, scale * self.room_size * 0.06 * fs))
+        decay_s = scale * self.decay_s
         # envolvente exponencial T60≈decay_s
-        t = np.arange(delay_len, dtype=np.float32)
-        if self.decay_s <= 0.05:
-            ir = np.zeros(1, dtype=np.float32)
+        t = np.arange(delay_len, dtype=dtype())
+        if decay_s <= 0.05:
+            ir = np.zeros(1, dtype=dtype())
             ir[0] = 1.0
             return ir
-        ir = np.exp((-6.9077554 * t) / (self.decay_s * fs)).astype(np.float32)
+        ir = np.exp((-6.9077554 * t) / (decay_s * fs))
         if ir.sum() > 0:
             ir = ir / (ir.sum() + 1e-12)
         return ir
 
-    def process(self, x: np.ndarray, fs: int) -> np.ndarray:
-        orig_dtype = x.dtype
-        x = _ensure_f32(np.asarray(x))
+    def reset(self, fs: int) -> None:
+        super().reset(fs)
+        self._ir = self._build_ir(self.fs)
+        self._pre = int(round(max(0.0, self.pre_delay_ms) * 1e-3 * self.fs))
+        fc = 1000.0 + 9000.0 * float(np.clip(self.brightness, 0.0, 1.0))
+        self._alpha = (2.0 * np.pi * fc) / (2.0 * np.pi * fc + self.fs)
+        # Estado: historia de entrada para la convolución, línea de pre-delay y LPF
+        self._hist = np.zeros(len(self._ir) - 1, dtype=self._ir.dtype)
+        self._pre_buf = np.zeros(self._pre, dtype=self._ir.dtype)
+        self._lp = 0.0
+
+    @property
+    def tail_length(self) -> int:
+        self._check_reset()
+        return len(self._ir) - 1 + self._pre
+
+    def process_block(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        x = as_audio(x)
         n = x.shape[0]
+        if n == 0:
+            return out
 
-        # IR (construida una vez por llamada)
-        ir = self._build_ir(n, fs)
-
-        # Convolución
+        # Convolución (modo 'valid' sobre historia + bloque = salida causal del bloque)
+        xx = np.concatenate([self._hist, x])
         if _HAS_SCIPY:
-            wet = fftconvolve(x, ir, mode="full", axes=-1)[:n].astype(np.float32, copy=False)
+            wet = fftconvolve(xx, self._ir, mode="valid")
         else:
-            wet = np.convolve(x, ir, mode='full')[:n].astype(np.float32, copy=False)
+            wet = np.convolve(xx, self._ir, mode="valid")
+        wet = as_audio(wet)
+        if self._hist.shape[0]:
+            self._hist = flush_denormals(xx[-self._hist.shape[0]:])
 
         # Pre-delay
-        pre = int(round(max(0.0, self.pre_delay_ms) * 1e-3 * fs))
-        if pre > 0:
-            if pre >= n:
-                wet = np.zeros_like(wet)
-            else:
-                wet = np.concatenate([np.zeros(pre, dtype=np.float32), wet])[:n]
+        if self._pre > 0:
+            ww = np.concatenate([self._pre_buf, wet])
+            wet, self._pre_buf = ww[:n], ww[n:]
 
-        fc = 1000.0 + 9000.0 * float(np.clip(self.brightness, 0.0, 1.0))
-        alpha = np.float32((2.0 * np.pi * fc) / (2.0 * np.pi * fc + fs))
-        wet = _one_pole_lpf(wet, alpha)
+        wet, self._lp = _one_pole_lpf(wet, self._alpha, self._lp)
+        if abs(self._lp) < DENORMAL:
+            self._lp = 0.0
 
         # Mezcla
         mix = float(np.clip(self.mix, 0.0, 1.0))
-        y = (1.0 - mix) * x + mix * wet
-
-        return y.astype(orig_dtype, copy=False)
+        wet *= mix
+        np.multiply(x, 1.0 - mix, out=out)
+        out += wet
+        return out
@@ -1,11 +1,9 @@
 # src/tpaudio/gui.py
 import sys
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
-import numpy as np
-import soundfile as sf
-import matplotlib.pyplot as plt
 
 # --- Rutas relativas ---
 HERE = Path(__file__).resolve()
@@ -17,17 +15,21 @@ if str(SRC_DIR) not in sys.path:
 # --- Imports del proyecto ---
 try:
     from tpaudio.constants import SR
-    from tpaudio.config import load_presets
-    from tpaudio.core.audio_io import write_wav
-    from tpaudio.core.mixer import mix_tracks
+    from tpaudio.presets import PresetLibrary
+    from tpaudio.session import RenderSession
     from tpaudio.midi.loader import load_notes
-
-    from tpaudio.synth.karplus import render_note_ks
-    from tpaudio.synth.sample_piano import load_samples, render_note_sample
-    from tpaudio.synth.adsr import render_kick_additive
-
-    from tpaudio.effects.flanger import Flanger
-    from tpaudio.effects.reverb import Reverb
+    from tpaudio.core.profiler import Profiler, get_profiler
+    from tpaudio.analysis.spectrogram import plot_spectrogram
+    from tpaudio.analysis.overview import load_overview
+
+    from tpaudio.synth.sample_piano import load_samples
+    from tpaudio.registry import EFFECTS, SYNTHS, make_renderer
+
+    from tpaudio.effects.graph import FxGraph, TrackStrip
+    from tpaudio.core.stream import stream_tracks
+    from tpaudio.core.playback import PlaybackEngine
+    from tpaudio.core.jobs import RenderWorker
+    from tpaudio.core.parallel import default_workers
 except Exception as e:
     raise RuntimeError(f"No se pudieron importar módulos del paquete tpaudio:\n{e}")
 
@@ -42,10 +44,10 @@ except Exception:
 DEFAULT_SAMPLE_DIR = PROJECT_ROOT / "samples_piano_1"
 DEFAULT_PRESET_INSTR = PROJECT_ROOT / "presets" / "instruments.yml"
 DEFAULT_PRESET_FX = PROJECT_ROOT / "presets" / "effects.yml"
-
-
-def _normalize(y: np.ndarray) -> np.ndarray:
-    return (y / (np.max(np.abs(y)) + 1e-9)).astype(np.float32)
+SPEC_WIDTH = 1200  # puntos de la forma de onda (≈ píxeles de la figura)
+POLL_MS = 100      # lectura de eventos del worker de render
+STAGE_NAMES = {"prepare": "cargando presets/samples", "synth": "síntesis",
+               "effects": "efectos", "write": "escribiendo WAV"}
 
 
 # ===== GM y emojis =====
@@ -165,11 +167,23 @@ class App(tk.Tk):
         self.notes = []
         self.by_track = {}
         self.presets = None
+        # Presets, samples y pool de procesos se conservan entre renders
+        self.session = RenderSession(str(DEFAULT_PRESET_INSTR), str(DEFAULT_PRESET_FX), str(DEFAULT_SAMPLE_DIR),
+                                     sr=SR, workers=default_workers())
         self.available_presets = {}
         self._selected_track_idx = None
+        # Caché de notas: la llenan el worker y la reproducción, la vacía el hilo de Tk
         self._note_cache = {}
+        self._note_lock = threading.Lock()
+        self._note_gen = 0            # sube en cada vaciado: renders en curso no reinsertan
         self._midi_paths_cache = {}
         self._last_rendered_wav = None
+        self._prof = get_profiler(None)
+        self._last_profile = None
+        self._player = None
+        self._worker = RenderWorker()
+        self._jobs = {}           # id → RenderJob encolado o en curso
+        self._polling = False
 
         self._build_ui()
 
@@ -250,12 +264,25 @@ class App(tk.Tk):
         # === Acciones ===
         bar = ttk.Frame(container)
         bar.pack(fill="x", pady=8)
-        self.btn_spec = ttk.Button(bar, text="Ver espectrograma", command=self._show_last_spectrogram)
+        self.btn_spec = ttk.Button(bar, text="Ver onda + espectrograma", command=self._show_last_spectrogram)
         self.btn_spec.pack(side="left", padx=6)
         self.btn_spec.state(["disabled"])
         ttk.Button(bar, text="Renderizar WAV", command=self._render).pack(side="right", padx=10)
+        self.btn_cancel = ttk.Button(bar, text="Cancelar render", command=self._cancel_render)
+        self.btn_cancel.pack(side="right", padx=6)
+        self.btn_cancel.state(["disabled"])
+        ttk.Button(bar, text="Detener", command=self._stop_playback).pack(side="right", padx=6)
+        ttk.Button(bar, text="Reproducir", command=self._play).pack(side="right", padx=6)
         ttk.Button(bar, text="Salir", command=self.destroy).pack(side="right", padx=6)
 
+        # === Progreso del render (worker en segundo plano) ===
+        frm_prog = ttk.Frame(container)
+        frm_prog.pack(fill="x", pady=(0, 6))
+        self.progress = ttk.Progressbar(frm_prog, mode="determinate", maximum=1.0)
+        self.progress.pack(side="left", fill="x", expand=True, padx=6)
+        self.lbl_status = ttk.Label(frm_prog, text="Listo", width=60, anchor="w")
+        self.lbl_status.pack(side="left", padx=6)
+
     # === Funciones auxiliares ===
     def _refresh_midi_list(self, _=None):
         paths = list_mid_files_in_root(PROJECT_ROOT)
@@ -314,7 +341,7 @@ class App(tk.Tk):
             self.tree.insert("", "end", iid=str(ti),
                              values=("✔", cfg.synth.get(), f"{cfg.volume.get():.2f}",
                                      cfg.preset.get(), cfg.detected, cfg.emoji))
-        self._note_cache.clear()
+        self._clear_note_cache()
         messagebox.showinfo("MIDI", f"Pistas: {len(self.tracks_cfg)}  |  Notas: {len(self.notes)}")
 
     # === Edición ===
@@ -345,7 +372,7 @@ class App(tk.Tk):
             cfg.preset.set("")
             self.tree.set(str(cfg.track_idx), "synth", cfg.synth.get())
             self.tree.set(str(cfg.track_idx), "preset", "")
-        self._note_cache.clear()
+        self._clear_note_cache()
 
     def _on_volume_change_live(self):
         """Actualizar volumen y reflejarlo en la tabla."""
@@ -368,34 +395,40 @@ class App(tk.Tk):
         self.tree.set(str(ti), "synth", cfg.synth.get())
         self.tree.set(str(ti), "preset", cfg.preset.get())
         self.tree.set(str(ti), "vol", f"{cfg.volume.get():.2f}")
-        self._note_cache.clear()
+        self._clear_note_cache()
 
-    # === Espectrograma ===
+    # === Forma de onda + espectrograma (desde el overview guardado junto al WAV) ===
     def _show_spectrogram(self, wav_path: str):
+        # Pirámides min/max/RMS + STFT gruesa: no se leen las muestras del WAV
+        # (si el overview falta, p.ej. un WAV viejo, se calcula una vez y se guarda)
         try:
-            y, fs = sf.read(wav_path, dtype="float32")
+            ov = load_overview(wav_path)
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo leer el WAV:\n{e}")
             return
+        import matplotlib.pyplot as plt
         plt.close("all")
-        if y.ndim == 1:
-            fig, ax = plt.subplots(figsize=(10, 5))
-            sig = y + 1e-12
-            _, _, _, im = ax.specgram(sig, NFFT=1024, Fs=fs, noverlap=512,
-                                      cmap="inferno", vmin=-120, vmax=-20)
-            ax.set_title(Path(wav_path).name)
-            ax.set_xlabel("Tiempo [s]"); ax.set_ylabel("Frecuencia [Hz]")
-            fig.colorbar(im, ax=ax, pad=0.02).set_label("Amplitud [dB]")
-        else:
-            fig, (axL, axR) = plt.subplots(1, 2, figsize=(12, 5), sharey=True)
-            sigL = y[:, 0] + 1e-12; sigR = y[:, 1] + 1e-12
-            _, _, _, imL = axL.specgram(sigL, NFFT=1024, Fs=fs, noverlap=512, cmap="inferno", vmin=-120, vmax=-20)
-            _, _, _, imR = axR.specgram(sigR, NFFT=1024, Fs=fs, noverlap=512, cmap="inferno", vmin=-120, vmax=-20)
-            axL.set_title("Left"); axR.set_title("Right")
-            for ax in (axL, axR): ax.set_xlabel("Tiempo [s]")
-            axL.set_ylabel("Frecuencia [Hz]")
-            fig.colorbar(imR, ax=[axL, axR], pad=0.02).set_label("Amplitud [dB]")
-        plt.tight_layout(); plt.show()
+        fig, (ax_w, ax_s) = plt.subplots(2, 1, figsize=(12, 7), sharex=True,
+                                         gridspec_kw={"height_ratios": [1, 2]})
+        art = []
+
+        def draw_wave(t0, t1):
+            for a in art:
+                a.remove()
+            t, mn, mx, rms = ov.waveform(t0, t1, width=SPEC_WIDTH)
+            art[:] = [ax_w.fill_between(t, mn, mx, color="tab:blue", alpha=0.45, linewidth=0),
+                      ax_w.fill_between(t, -rms, rms, color="tab:blue", alpha=0.9, linewidth=0)]
+
+        draw_wave(0.0, ov.duration)
+        ax_w.set_ylim(-1.05, 1.05)
+        ax_w.set_ylabel("Amplitud")
+        ax_w.set_title(Path(wav_path).name)
+        im = plot_spectrogram(ax_s, *ov.spectrogram(), log_freq=True)
+        fig.colorbar(im, ax=[ax_w, ax_s], pad=0.02).set_label("Amplitud [dB]")
+        ax_s.set_xlim(0.0, ov.duration)
+        # Zoom: se elige el nivel de la pirámide según el rango visible
+        ax_w.callbacks.connect("xlim_changed", lambda ax: draw_wave(*ax.get_xlim()))
+        plt.show()
 
     def _show_last_spectrogram(self):
         if not self._last_rendered_wav:
@@ -404,156 +437,217 @@ class App(tk.Tk):
         self._show_spectrogram(self._last_rendered_wav)
 
     # ====== OPTIMIZACIONES: caché de notas + timeline rápido ======
-    def _cached_note(self, rf, pitch, dur, vel):
-        """Devuelve el audio de una nota cacheada por (id(rf), pitch, dur_ms, vel_bin)."""
+    def _clear_note_cache(self):
+        with self._note_lock:
+            self._note_cache.clear()
+            self._note_gen += 1
+
+    def _cached_note(self, rf, pitch, dur, vel, prof=None, seed=None, gen=None):
+        """Devuelve el audio de una nota cacheada por (id(rf), pitch, dur_ms, vel_bin, semilla).
+        'gen': generación de la caché al armar el render; si se vació después, la nota
+        se sintetiza igual pero no se guarda (id(rf) podría ser de otro renderer)."""
         dur_ms = int(round(dur * 1000))
         vel_bin = int(vel) // 2
-        key = (id(rf), pitch, dur_ms, vel_bin)
-        seg = self._note_cache.get(key)
+        key = (id(rf), pitch, dur_ms, vel_bin, seed)
+        with self._note_lock:
+            seg = self._note_cache.get(key) if gen in (None, self._note_gen) else None
+        (prof or self._prof).cache("notes", seg is not None)
         if seg is None:
-            seg = rf(pitch, dur, vel, SR)
-            if seg.dtype != np.float32:
-                seg = seg.astype(np.float32, copy=False)
-            self._note_cache[key] = seg
+            # make_renderer ya entrega precision.dtype(); se sintetiza fuera del lock
+            seg = rf(pitch, dur, vel, SR) if seed is None else rf(pitch, dur, vel, SR, seed=seed)
+            with self._note_lock:
+                if gen in (None, self._note_gen):
+                    self._note_cache[key] = seg
         return seg
 
-    def _lay_notes_on_timeline_fast(self, notes, rf, sr=SR):
-        """Versión rápida: usa cache por nota y suma por slicing. 'notes' es una lista de UNA pista."""
-        if not notes:
-            return np.zeros(1, dtype=np.float32)
-        t_end = max(t0 + dur for (_ti, t0, dur, _p, _v) in notes)
-        n = int(np.ceil(t_end * sr)) + 1
-        y = np.zeros(n, dtype=np.float32)
-        for (_ti, t0, dur, pitch, vel) in notes:
-            seg = self._cached_note(rf, pitch, dur, vel)
-            i0 = int(round(t0 * sr))
-            i1 = min(i0 + len(seg), n)
-            if i0 < n:
-                y[i0:i1] += seg[:i1 - i0]
-        return y
+    def _note_fn(self, rf, prof=None):
+        """Función de nota con caché para timelines/streaming (la semilla sólo si el motor la usa)."""
+        seeded = getattr(rf, "uses_rng", False)
+        gen = self._note_gen
+
+        def note(p, d, v, sr, seed=None):
+            return self._cached_note(rf, p, d, v, prof, seed if seeded else None, gen)
+        note.uses_rng = seeded
+        return note
 
     # ---- Renderers ----
-    def _make_renderer(self, cfg: TrackConfig, samples):
-        synth = cfg.synth.get()
-        preset = (cfg.preset.get() or "").strip()
-
-        def get_params(bank, name):
-            if not self.presets or bank not in self.presets:
-                return {}
-            bank_data = self.presets[bank]
-            if name in bank_data:
-                d = dict(bank_data[name])
-                d.pop("transpose", None)
-                return d.get("params", d)
-            return {}
-
-        if synth == "kick_adsr":
-            bank, name = ("drums", "kick_additive")
-            if preset:
-                if "." in preset:
-                    bank, name = preset.split(".", 1)
-                else:
-                    bank, name = "drums", preset
-            p = get_params(bank, name) or {
-                "dur_s": 0.35,
-                "f_start_hz": 150.0, "f_end_hz": 50.0, "tau_freq_ms": 22.0,
-                "amps": (1.0, 0.5, 0.25, 0.15, 0.10),
-                "ratios": (1.0, 1.6, 2.3, 3.5, 4.2),
-                "tau_amp_ms": (120, 90, 70, 55, 45),
-                "click_ms": 6.0, "click_mix": 0.12, "hp_hz": 22.0, "drive": 0.9,
-            }
-            def rf(pitch, dur, vel, sr, _p=p):
-                local = dict(_p); local["dur_s"] = dur
-                y = render_kick_additive(**local)
-                return (vel / 127.0) * y
-            return rf
-
-        if synth == "ks":
-            name = "nylon"
-            if preset:
-                name = preset.split(".", 1)[1] if "." in preset else preset
-            p = get_params("ks", name) or {}
-            def rf(pitch, dur, vel, sr, _p=p, _n=name):
-                return render_note_ks(pitch, dur, vel, sr, preset_name=_n, **_p)
-            return rf
-
-        if synth == "piano_sample":
-            def rf(pitch, dur, vel, sr, _s=samples):
-                return render_note_sample(_s, pitch, dur, vel, sr)
-            return rf
-
-        raise SystemExit(f"Motor no reconocido: {synth}")
-
-    # ---- Render principal (mezcla + FX) ----
+    @staticmethod
+    def _preset_for(synth: str, preset: str):
+        preset = (preset or "").strip()
+        if synth not in SYNTHS:
+            raise ValueError(f"Motor no reconocido: {synth}")
+        if SYNTHS.resolve(synth) == "ks":
+            preset = preset or "nylon"
+        return preset or None
+
+    def _make_renderer(self, synth: str, preset: str, samples):
+        return make_renderer(synth, self._preset_for(synth, preset), self.presets or PresetLibrary(),
+                             samples=samples)
+
+    # ---- Render principal (mezcla + FX) en el worker ----
     def _render(self):
         if not self.notes:
             messagebox.showwarning("Render", "Cargá un MIDI primero.")
             return
         out = self.out_path.get().strip() or "out.wav"
-
-        # Cargar presets/samples cuando haga falta
-        if not self.presets:
-            try:
-                self.presets = load_presets(str(DEFAULT_PRESET_INSTR), str(DEFAULT_PRESET_FX))
-            except Exception:
-                self.presets = {}
-        needs_samples = any(cfg.synth.get() == "piano_sample" for cfg in self.tracks_cfg)
-        samples = load_samples(str(DEFAULT_SAMPLE_DIR)) if needs_samples else None
-
-        # Render por pista (rápido)
-        tracks_audio = []
-        for cfg in self.tracks_cfg:
-            if not cfg.enabled.get():
-                continue
-            tnotes = self.by_track.get(cfg.track_idx, [])  # O(1)
-            rf = self._make_renderer(cfg, samples)
-            y = self._lay_notes_on_timeline_fast(tnotes, rf)
-            # aplicar volumen por pista
-            vol = float(cfg.volume.get())
-            if vol != 1.0:
-                y = (y * vol).astype(np.float32, copy=False)
-            tracks_audio.append(y)
-
-        if not tracks_audio:
+        # Las variables Tk se leen acá (hilo de la UI); el worker recibe una copia
+        try:
+            mapping = {cfg.track_idx: (cfg.synth.get(), self._preset_for(cfg.synth.get(), cfg.preset.get()))
+                       for cfg in self.tracks_cfg if cfg.enabled.get()}
+        except ValueError as e:
+            messagebox.showerror("Render", str(e))
+            return
+        if not mapping:
             messagebox.showwarning("Render", "No hay pistas habilitadas.")
             return
-
-        # Mezcla sin normalizar (normalizamos una sola vez al final)
-        y_mix = mix_tracks(tracks_audio, normalize=False)
-
-        # === FX sólo si están activos (evita casts/cópias si OFF) ===
+        # volumen por pista = ganancia del strip en el grafo
+        strips = {str(cfg.track_idx): TrackStrip(gain=float(cfg.volume.get()))
+                  for cfg in self.tracks_cfg if cfg.enabled.get()}
+        fx_active = self.flanger_on.get() or self.reverb_on.get()
+        # Perfil liviano (sin tracemalloc) de cada render, resumido en consola
+        prof = Profiler(memory=False)
+
+        # Presets, plan y síntesis (una pista por proceso) corren en el worker
+        job = self.session.job(list(self.notes), mapping, out, FxGraph(tracks=strips, master=self._master_chain()),
+                               prof=prof, label="con FX" if fx_active else "sin FX")
+        self._jobs[self._worker.submit(job).id] = job
+        self.btn_cancel.state(["!disabled"])
+        if not self._polling:
+            self._polling = True
+            self.after(POLL_MS, self._poll_render)
+
+    def _poll_render(self):
+        for job_id, kind, data in self._worker.poll():
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            tag = f"#{job_id} {Path(job.out).name}"
+            if kind == "queued":
+                if data["position"]:
+                    self.lbl_status.config(text=f"{tag}: en cola ({data['position']} antes)")
+            elif kind == "stage":
+                self.progress["value"] = 0.0
+                self.lbl_status.config(text=f"{tag}: {STAGE_NAMES.get(data['stage'], data['stage'])}")
+            elif kind == "progress":
+                self.progress["value"] = data["done"] / max(data["total"], 1)
+                what = STAGE_NAMES.get(data["stage"], data["stage"])
+                if data["track"] is not None:
+                    what = f"pista {data['track']}: {data['done']}/{data['total']} notas"
+                self.lbl_status.config(text=f"{tag}: {what}{self._queued_text()}")
+            else:
+                self._jobs.pop(job_id, None)
+                self._on_job_end(job, kind, data, tag)
+
+        if self._worker.busy:
+            self.after(POLL_MS, self._poll_render)
+        else:
+            self._polling = False
+            self.btn_cancel.state(["disabled"])
+
+    def _queued_text(self) -> str:
+        n = self._worker.pending
+        return f"  (+{n} en cola)" if n else ""
+
+    def _on_job_end(self, job, kind, data, tag):
+        prof = job.prof
+        if kind == "done":
+            self.progress["value"] = 1.0
+            self.lbl_status.config(text=f"{tag}: listo en {data['seconds']:.1f} s{self._queued_text()}")
+            prof.print_summary()
+            self._last_profile = prof.report()
+            # Guardar ruta del último WAV y habilitar espectrograma
+            self._last_rendered_wav = data["out"]
+            self.btn_spec.state(["!disabled"])
+            print(f"[OK] Archivo generado {job.label}: {data['out']}")
+            if not self._worker.busy:
+                messagebox.showinfo("Render", f"Archivo generado {job.label}:\n{data['out']}")
+        elif kind == "cancelled":
+            self.progress["value"] = 0.0
+            self.lbl_status.config(text=f"{tag}: cancelado{self._queued_text()}")
+            print(f"[INFO] Render cancelado: {job.out}")
+        elif kind == "error":
+            self.progress["value"] = 0.0
+            self.lbl_status.config(text=f"{tag}: error")
+            messagebox.showerror("Render", f"Falló el render de {job.out}:\n{data['error']}")
+
+    def _cancel_render(self):
+        """Cancela el render en curso; los encolados siguen."""
+        self._worker.cancel()
+
+    def destroy(self):
+        self._worker.shutdown()
+        self.session.close()
+        self._stop_playback()
+        super().destroy()
+
+    # ---- FX globales: cadena master del grafo (sólo los activos) ----
+    def _master_chain(self):
+        master = []
         if self.flanger_on.get():
-            fl = Flanger(
+            master.append(EFFECTS.get("flanger")(
                 rate_hz=float(self.fl_rate.get()),
                 depth_ms=float(self.fl_depth_ms.get()),
                 base_ms=float(self.fl_base_ms.get()),
                 feedback=float(self.fl_feedback.get()),
                 mix=float(self.fl_mix.get()),
-            )
-            y_mix = fl.process(y_mix.astype(np.float64), SR).astype(np.float32)
-
+            ))
         if self.reverb_on.get():
-            rv = Reverb(
+            master.append(EFFECTS.get("reverb")(
                 room_size=float(self.rv_room.get()),
                 decay_s=float(self.rv_decay.get()),
                 pre_delay_ms=float(self.rv_predelay.get()),
                 brightness=float(self.rv_bright.get()),
                 mix=float(self.rv_mix.get()),
-            )
-            y_mix = rv.process(y_mix.astype(np.float64), SR).astype(np.float32)
+            ))
+        return master
 
-        # Normaliza y escribe WAV
-        y_out = _normalize(y_mix)
-        write_wav(out, y_out, SR)
+    # ---- Reproducción: empieza a sonar mientras se sigue renderizando ----
+    def _play(self):
+        if not self.notes:
+            messagebox.showwarning("Reproducir", "Cargá un MIDI primero.")
+            return
+        self._stop_playback()
+        try:
+            self.presets = self.session.library()     # recompila sólo si cambió el YAML
+        except Exception as e:
+            print(f"[WARN] No se pudieron cargar presets: {e}")
+            self.presets = PresetLibrary()
+        needs_samples = any(cfg.synth.get() == "piano_sample" for cfg in self.tracks_cfg)
+        samples = load_samples(str(DEFAULT_SAMPLE_DIR)) if needs_samples else None
 
-        # Guardar ruta del último WAV y habilitar espectrograma
-        self._last_rendered_wav = out
-        self.btn_spec.state(["!disabled"])
+        tracks, strips = {}, {}
+        for cfg in self.tracks_cfg:
+            if not cfg.enabled.get():
+                continue
+            rf = self._make_renderer(cfg.synth.get(), cfg.preset.get(), samples)
+            tracks[cfg.track_idx] = (self.by_track.get(cfg.track_idx, []), self._note_fn(rf))
+            strips[str(cfg.track_idx)] = TrackStrip(gain=float(cfg.volume.get()))
+        if not tracks:
+            messagebox.showwarning("Reproducir", "No hay pistas habilitadas.")
+            return
+        # Sin normalización global (el tema no está completo): un limitador protege la salida
+        graph = FxGraph(tracks=strips, master=self._master_chain() + [EFFECTS.get("limiter")(ceiling_dbfs=-1.0)])
+        self._player = PlaybackEngine(sr=SR).play(stream_tracks(tracks, SR, graph=graph))
+        self.after(200, self._poll_playback)
+
+    def _poll_playback(self):
+        p = self._player
+        if p is None:
+            return
+        if p.done:
+            self._stop_playback()
+        else:
+            self.after(200, self._poll_playback)
 
-        # Mensaje adaptativo según FX
-        fx_active = self.flanger_on.get() or self.reverb_on.get()
-        fx_text = "con FX" if fx_active else "sin FX"
-        messagebox.showinfo("Render", f"Archivo generado {fx_text}:\n{out}")
+    def _stop_playback(self):
+        p, self._player = self._player, None
+        if p is None:
+            return
+        p.stop()
+        st = p.stats()
+        ttfs = st["time_to_first_sound_s"]
+        print(f"[INFO] Reproducción: {st['frames_played'] / SR:.1f} s, underruns={st['underruns']}, "
+              f"primer sonido={ttfs * 1000 if ttfs else float('nan'):.0f} ms")
 
 
 if __name__ == "__main__":
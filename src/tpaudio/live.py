@@ -0,0 +1,275 @@
+"""
+Modo en vivo: eventos MIDI (note_on / note_off) → voces por bloques → salida.
+
+    python -m tpaudio.live --synth ks --preset nylon                # primer puerto de entrada
+    python -m tpaudio.live --synth sample --port "Teclado MIDI"
+    python -m tpaudio.live --virtual                                # puerto virtual (rtmidi)
+    python -m tpaudio.live --midi-file cancion.mid                  # loopback desde un .mid
+
+Cada bloque (256 muestras ≈ 5.3 ms a 48 kHz) se renderiza contra un presupuesto
+de CPU: los bloques que tardan más que 'budget' × duración del bloque cuentan
+como overrun, y si la carga promedio (suavizada) de las voces supera el
+presupuesto se descartan voces (primero las que están en release, luego las más
+silenciosas) hasta volver a entrar.
+"""
+import argparse
+import itertools
+import queue
+import threading
+import time
+import numpy as np
+
+from .constants import SR
+from .presets import load_compiled_presets
+from .core.playback import PlaybackEngine
+from .core.rng import DEFAULT_SEED, note_seed
+from .synth.voices import KSVoice, SampleVoice, AdditiveVoice, ModalVoice, piano_additive_voice
+
+LIVE_BLOCK = 256
+
+
+def make_voice_factory(synth: str, params: dict = None, preset_name: str = None, samples=None,
+                       ks_table=None, seed: int = DEFAULT_SEED):
+    """Devuelve f(pitch, velocity) → LiveVoice para el motor pedido.
+    'ks_table' (presets.KSTable) evita recalcular el lazo KS en cada note_on.
+    El ruido de cada pulsación KS sale de note_seed(seed, "live", n° de nota)."""
+    params = dict(params or {})
+    if synth == "ks":
+        count = itertools.count()
+        if ks_table is not None:
+            return lambda p, v: KSVoice(p, v, preset_name=preset_name, loop=ks_table.loop(p),
+                                        rng=note_seed(seed, "live", next(count)), **params)
+        return lambda p, v: KSVoice(p, v, preset_name=preset_name,
+                                    rng=note_seed(seed, "live", next(count)), **params)
+    if synth == "sample":
+        if samples is None:
+            raise ValueError("El motor 'sample' necesita los samples cargados")
+        tables = {}
+        return lambda p, v: SampleVoice(samples, p, v, tables=tables, **params)
+    if synth == "piano":
+        return lambda p, v: piano_additive_voice(p, v, **params)
+    if synth == "modal":
+        return lambda p, v: ModalVoice(p, v, **params)
+    if synth == "additive":
+        ratios = params.pop("partials", [1, 3, 5, 7, 9])
+        amps = np.asarray(params.pop("amps", [1.0, 0.6, 0.4, 0.25, 0.18]), dtype=np.float64)
+        amps = amps / (np.max(np.abs(amps)) + 1e-12)
+        return lambda p, v: AdditiveVoice(p, v, ratios, amps, **params)
+    raise ValueError(f"Motor no soportado en vivo: {synth}")
+
+
+class LiveEngine:
+    """
+    Motor polifónico por bloques. Los eventos llegan por handle() desde cualquier
+    hilo (p.ej. el callback de mido) y se aplican al comienzo del bloque siguiente.
+    """
+
+    def __init__(self, voice_factory, sr: int = SR, block: int = LIVE_BLOCK,
+                 max_voices: int = 32, budget: float = 0.7, gain: float = 0.25):
+        self.voice_factory = voice_factory
+        self.sr, self.block = sr, block
+        self.max_voices = max_voices
+        self.budget_s = budget * block / sr
+        self.gain = gain
+        self.voices = []          # [(pitch, voz)]
+        self._events = queue.SimpleQueue()
+        self._mix = np.zeros(block, dtype=np.float32)
+        self._tmp = np.zeros(block, dtype=np.float32)
+        self._running = True
+        self._load_ema = 0.0
+        # Estadísticas
+        self.blocks = 0
+        self.overruns = 0
+        self.shed = 0
+        self.stolen = 0
+        self.load_max = 0.0
+        self._load_sum = 0.0
+
+    # --- eventos ---
+    def handle(self, msg):
+        """Acepta mensajes de mido (note_on / note_off / control_change)."""
+        if msg.type in ("note_on", "note_off"):
+            on = msg.type == "note_on" and msg.velocity > 0
+            self._events.put((on, msg.note, msg.velocity))
+        elif msg.type == "control_change" and msg.control in (120, 123):   # all sound/notes off
+            self._events.put((None, None, None))
+
+    def note_on(self, pitch: int, velocity: int = 100):
+        self._events.put((True, int(pitch), int(velocity)))
+
+    def note_off(self, pitch: int):
+        self._events.put((False, int(pitch), 0))
+
+    def _apply_events(self):
+        while True:
+            try:
+                on, pitch, vel = self._events.get_nowait()
+            except queue.Empty:
+                return
+            if on is None:
+                for _p, v in self.voices:
+                    v.note_off()
+            elif on:
+                if len(self.voices) >= self.max_voices:
+                    self._steal()
+                v = self.voice_factory(pitch, vel)
+                v.reset(self.sr)
+                self.voices.append((pitch, v))
+            else:
+                for p, v in self.voices:
+                    if p == pitch and not v.releasing:
+                        v.note_off()
+
+    def _steal(self):
+        # La más vieja en release; si no hay, la más vieja de todas
+        for i, (_p, v) in enumerate(self.voices):
+            if v.releasing:
+                break
+        else:
+            i = 0
+        self.voices.pop(i)
+        self.stolen += 1
+
+    def _shed(self, frac: float):
+        """Libera (con fade corto) la fracción 'frac' de las voces activas."""
+        live = [v for _p, v in self.voices if not v.killed and not v.done]
+        if not live:
+            return
+        n = max(1, int(np.ceil(len(live) * min(frac, 1.0))))
+        live.sort(key=lambda v: (not v.releasing, v.level))
+        for v in live[:n]:
+            v.kill()
+        self.shed += n
+
+    # --- render ---
+    def render_block(self) -> np.ndarray:
+        t0 = time.perf_counter()
+        self._apply_events()
+        t1 = time.perf_counter()
+        mix = self._mix
+        mix[:] = 0.0
+        for _p, v in self.voices:
+            mix += v.process_block(None, self._tmp)
+        self.voices = [(p, v) for p, v in self.voices if not v.done]
+        mix *= self.gain
+
+        t2 = time.perf_counter()
+        period = self.block / self.sr
+        load = (t2 - t0) / period
+        self.blocks += 1
+        self._load_sum += load
+        self.load_max = max(self.load_max, load)
+        if t2 - t0 > self.budget_s:
+            self.overruns += 1
+        # El alta de voces (note_on) es un costo puntual: se decide sólo con el render
+        self._load_ema += 0.3 * ((t2 - t1) - self._load_ema)
+        if self._load_ema > self.budget_s:
+            self._shed(1.0 - self.budget_s / self._load_ema)
+            self._load_ema = self.budget_s
+        return mix
+
+    def blocks_iter(self, seconds: float = None):
+        """Generador de bloques (copias) para PlaybackEngine; infinito si seconds es None."""
+        n = None if seconds is None else int(np.ceil(seconds * self.sr / self.block))
+        i = 0
+        while self._running and (n is None or i < n):
+            yield self.render_block().copy()
+            i += 1
+
+    def stop(self):
+        self._running = False
+
+    def stats(self) -> dict:
+        return {
+            "blocks": self.blocks,
+            "block_ms": 1000.0 * self.block / self.sr,
+            "overruns": self.overruns,
+            "voices_shed": self.shed,
+            "voices_stolen": self.stolen,
+            "load_mean": self._load_sum / self.blocks if self.blocks else 0.0,
+            "load_max": self.load_max,
+        }
+
+
+# ----------------------------
+# Fuentes de eventos
+# ----------------------------
+def open_input(engine: LiveEngine, port: str = None, virtual: bool = False):
+    """Abre un puerto de entrada de mido que alimenta al motor desde su callback."""
+    import mido
+    name = port or ("tpaudio" if virtual else None)
+    return mido.open_input(name, virtual=virtual, callback=engine.handle)
+
+
+def play_midi_file(engine: LiveEngine, path: str):
+    """Loopback: envía los eventos de un .mid al motor en tiempo real (hilo aparte)."""
+    import mido
+
+    def _run():
+        for msg in mido.MidiFile(path).play():
+            if not engine._running:
+                return
+            engine.handle(msg)
+    t = threading.Thread(target=_run, daemon=True)
+    t.start()
+    return t
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Síntesis en vivo desde MIDI (KS / sample / aditiva)")
+    ap.add_argument("--synth", default="ks", choices=["ks", "sample", "piano", "modal", "additive"])
+    ap.add_argument("--preset", default=None, help="Nombre de preset del banco del motor")
+    ap.add_argument("--preset-instruments", default="presets/instruments.yml")
+    ap.add_argument("--sample-dir", default="samples_piano_1")
+    ap.add_argument("--port", default=None, help="Puerto MIDI de entrada (por defecto, el primero)")
+    ap.add_argument("--virtual", action="store_true", help="Crear un puerto virtual 'tpaudio'")
+    ap.add_argument("--midi-file", default=None, help="Tocar un .mid como si fuera la entrada")
+    ap.add_argument("--block", type=int, default=LIVE_BLOCK, help="Muestras por bloque (≤ 480 → ≤ 10 ms)")
+    ap.add_argument("--max-voices", type=int, default=32)
+    ap.add_argument("--budget", type=float, default=0.7, help="Fracción del bloque disponible para render")
+    ap.add_argument("--seconds", type=float, default=None, help="Cortar luego de N segundos")
+    args = ap.parse_args(argv)
+
+    params, table = {}, None
+    if args.synth == "ks":
+        ks = load_compiled_presets(args.preset_instruments, sr=SR).ks_preset(args.preset)
+        params, table = ks.params, ks.table(SR)
+    elif args.synth == "additive" and args.preset:
+        add = load_compiled_presets(args.preset_instruments, sr=SR).additive_preset(args.preset)
+        params = dict(partials=add.partials, amps=add.amps)
+        if add.adsr:
+            params["adsr"] = add.adsr
+    samples = None
+    if args.synth == "sample":
+        from .synth.sample_piano import load_samples
+        samples = load_samples(args.sample_dir)
+
+    engine = LiveEngine(make_voice_factory(args.synth, params, args.preset, samples, table),
+                        SR, args.block, args.max_voices, args.budget)
+    print(f"[INFO] Bloque de {args.block} muestras = {1000.0 * args.block / SR:.1f} ms")
+
+    port = None
+    if args.midi_file:
+        play_midi_file(engine, args.midi_file)
+    else:
+        port = open_input(engine, args.port, args.virtual)
+        print(f"[INFO] Escuchando MIDI en '{port.name}' (Ctrl+C para salir)")
+
+    # Anillo chico: dos bloques por delante de la placa
+    player = PlaybackEngine(sr=SR, block=args.block, buffer_s=2 * args.block / SR, prefill_blocks=1)
+    player.play(engine.blocks_iter(args.seconds))
+    try:
+        while not player.done:
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        pass
+    engine.stop()
+    player.stop()
+    if port is not None:
+        port.close()
+    print(f"[INFO] Motor: {engine.stats()}")
+    print(f"[INFO] Salida: {player.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,16 @@
 import argparse 
 import numpy as np
-from collections import defaultdict
 
 from .constants import SR
-from .config import load_presets
-from .core.audio_io import write_wav
-from .core.timeline import lay_notes_on_timeline
-from .core.mixer import mix_tracks
-from .midi.loader import load_notes
+from .presets import PresetError, PresetLibrary, load_compiled_presets
+from .core import precision, quality, silence
+from .core.profiler import Profiler, get_profiler
+from .core.rng import DEFAULT_SEED
+from .session import BITS_CHOICES, RenderSession, export_stems, parse_bits
 
-# Sintetizadores
-from .synth.karplus import render_note_ks
-from .synth.sample_piano import load_samples, render_note_sample
-from .synth.piano_additive import render_note_piano_additive
-from .synth.adsr import render_kick_additive
-
-# FX
-from .effects.reverb import simple_reverb
+# Motores y efectos se resuelven por nombre y se importan en el primer uso
+# (soundfile, mido y scipy también: un --help no los carga)
+from .registry import SYNTHS, make_renderer
 
 
 # -----------------------------
@@ -28,26 +22,42 @@ DEFAULT_PRESET_FX = "presets/effects.yml"
 
 
 def _normalize(y: np.ndarray) -> np.ndarray:
-    return (y / (np.max(np.abs(y)) + 1e-9)).astype(np.float32)
-
-
-def _get_preset_params(presets, synth: str, preset_name: str):
-    params = {}
-    transpose = 0
+    return y / (np.max(np.abs(y)) + 1e-9)
 
-    if not presets:
-        return params, transpose
 
-    bank = presets.get(synth)
-    if bank is None:
-        return {}, 0
-
-    if not preset_name or preset_name not in bank:
-        return {}, 0
-
-    params = dict(bank[preset_name])
-    transpose = int(params.pop("transpose", 0)) if "transpose" in params else 0
-    return params, transpose
+def _report_allocs(stats, prof):
+    """Resumen del modo --alloc-debug (y contadores alloc.* en el perfil)."""
+    if stats is None:
+        return
+    stats.print_summary()
+    stats.to_profiler(prof)
+    precision.disable_alloc_debug()
+
+
+def _log_engine(synth, preset, lib):
+    """Valida el motor y muestra el preset que se va a usar."""
+    if synth not in SYNTHS:
+        raise SystemExit(f"[ERR] Sintetizador no reconocido: {synth}")
+    kind = SYNTHS.resolve(synth)
+    if kind == "kick":
+        kick = lib.kick(preset)
+        print(f"[INFO] KICK usando drums.{kick.name} params={kick.params}")
+    elif kind == "ks":
+        ks = lib.ks_preset(preset)
+        print(f"[INFO] KS preset='{preset}' params={ks.params} transpose={ks.transpose}")
+    return kind
+
+
+def _prepare_engine(synth, preset, lib, sample_dir, prof):
+    """render_fn del motor (con samples cargados si hacen falta) + log del preset."""
+    kind = _log_engine(synth, preset, lib)
+    samples = None
+    if kind == "sample":
+        from .synth.sample_piano import load_samples
+        with prof.span("sample_load"):
+            samples = load_samples(sample_dir)
+        print(f"[INFO] Samples cargados desde: {sample_dir}")
+    return make_renderer(synth, preset, lib, samples=samples)
 
 
 # =============================
@@ -60,64 +70,27 @@ def render_scale(
     sample_dir=DEFAULT_SAMPLE_DIR,
     presets=None,
     add_reverb=True,
+    sr=SR,
 ):
+    from .core.audio_io import write_wav
     base_pitches = [60, 62, 64, 65, 67, 69, 71, 72]  # C mayor
-
-    if synth == "kick":
-        # Leemos desde banco 'drums'
-        kick_p = {}
-        if presets and "drums" in presets:
-            key = preset or "kick_additive"
-            d = presets["drums"].get(key, {})
-            kick_p = d.get("params", {})
-        if not kick_p:
-            kick_p = {
-                "dur_s": 0.35,
-                "f_start_hz": 150.0,
-                "f_end_hz": 50.0,
-                "tau_freq_ms": 22.0,
-                "amps": (1.0, 0.5, 0.25, 0.15, 0.10),
-                "ratios": (1.0, 1.6, 2.3, 3.5, 4.2),
-                "tau_amp_ms": (120, 90, 70, 55, 45),
-                "click_ms": 4.0,
-                "click_mix": 0.06,
-                "hp_hz": 22.0,
-                "drive": 0.6,
-            }
-        print(f"[INFO] KICK usando drums.{preset or 'kick_additive'} params={kick_p}")
-        transpose = 0
-        params = {}
-    else:
-        params, transpose = _get_preset_params(presets, synth, preset)
-        print(f"[INFO] {synth.upper()} preset='{preset}' params={params} transpose={transpose}")
-
-    samples = None
-    if synth == "sample":
-        samples = load_samples(sample_dir)
-        print(f"[INFO] Samples cargados desde: {sample_dir}")
+    lib = presets or PresetLibrary()
+    rf = _prepare_engine(synth, preset, lib, sample_dir, get_profiler(None))
+    # el kick suena con su duración propia y sin escalar por velocidad
+    dur, vel = (lib.kick(preset).params["dur_s"], 127) if SYNTHS.resolve(synth) == "kick" else (0.6, 110)
 
     y_all = []
     for p in base_pitches:
-        p2 = p + transpose
-        if synth == "ks":
-            y = render_note_ks(p2, 0.6, 110, SR, preset_name=preset, **params)
-        elif synth == "sample":
-            y = render_note_sample(samples, p2, 0.6, 110, SR)
-        elif synth == "piano":
-            y = render_note_piano_additive(p2, 0.6, 110, SR)
-        elif synth == "kick":
-            y = render_kick_additive(**kick_p)
-        else:
-            raise SystemExit(f"[ERR] Sintetizador no reconocido: {synth}")
-
+        y = rf(p, dur, vel, sr)
         y_all.append(y)
-        y_all.append(np.zeros(int(0.05 * SR), dtype=np.float32))  # pequeño gap
+        y_all.append(precision.zeros(int(0.05 * sr)))  # pequeño gap
 
     y = np.concatenate(y_all)
     if add_reverb:
-        y = simple_reverb(y, SR, mix=0.15)
+        from .effects.reverb import Reverb
+        y = Reverb(mix=0.15).process(y, sr)
     y = _normalize(y)
-    write_wav(out, y, SR)
+    write_wav(out, y, sr)
     print(f"[OK] Escala renderizada → {out}")
 
 
@@ -132,80 +105,34 @@ def render_midi(
     sample_dir=DEFAULT_SAMPLE_DIR,
     presets=None,
     add_reverb=True,
+    profiler=None,
+    bits=None,
+    overview=False,
+    workers=None,
+    seed=DEFAULT_SEED,
+    session=None,
+    stems_dir=None,
+    stems_multichannel=False,
+    sr=SR,
 ):
-    notes = load_notes(mid_path)
+    from .core.audio_io import write_wav
+    session = session or RenderSession(presets=presets or PresetLibrary(), sample_dir=sample_dir,
+                                       sr=sr, workers=workers, verbose=True)
+    prof = get_profiler(profiler)
+    notes = session.notes(mid_path, prof)
     if not notes:
         raise SystemExit("No se encontraron notas en el MIDI.")
     print(f"[INFO] Notas cargadas: {len(notes)} desde {mid_path}")
-
-    # --- Carga de presets (una sola vez) ---
-    if synth == "kick":
-        params, transpose = {}, 0
-        kick_p = {}
-        if presets and "drums" in presets:
-            key = preset or "kick_additive"
-            d = presets["drums"].get(key, {})
-            kick_p = d.get("params", {})
-        if not kick_p:
-            kick_p = {
-                "dur_s": 0.35,
-                "f_start_hz": 150.0,
-                "f_end_hz": 50.0,
-                "tau_freq_ms": 22.0,
-                "amps": (1.0, 0.5, 0.25, 0.15, 0.10),
-                "ratios": (1.0, 1.6, 2.3, 3.5, 4.2),
-                "tau_amp_ms": (120, 90, 70, 55, 45),
-                "click_ms": 4.0,
-                "click_mix": 0.06,
-                "hp_hz": 22.0,
-                "drive": 0.6,
-            }
-        # 👉 Imprimir SOLO UNA VEZ antes de los tracks
-        print(f"[INFO] KICK usando drums.{preset or 'kick_additive'} params={kick_p}")
-    else:
-        params, transpose = _get_preset_params(presets, synth, preset)
-        print(f"[INFO] {synth.upper()} preset='{preset}' params={params} transpose={transpose}")
-
-    # Pre-carga para sample (si aplica)
-    samples = None
-    if synth == "sample":
-        samples = load_samples(sample_dir)
-        print(f"[INFO] Samples cargados desde: {sample_dir}")
-
-    # Agrupar por track y preparar mezcla
-    tracks_audio = []
-    by_track = defaultdict(list)
-    for (ti, t0, dur, pitch, vel) in notes:
-        by_track[ti].append((ti, t0, dur, pitch + transpose, vel))
-
-    for ti, tnotes in by_track.items():
-        print(f"[TRK {ti}] → {synth} ({preset or 'default'})")
-        if synth == "ks":
-            rf = lambda pitch, dur, vel, sr, _p=params, _n=preset: render_note_ks(
-                pitch, dur, vel, sr, preset_name=_n, **_p
-            )
-        elif synth == "sample":
-            rf = lambda pitch, dur, vel, sr, _s=samples: render_note_sample(_s, pitch, dur, vel, sr)
-        elif synth == "piano":
-            rf = lambda pitch, dur, vel, sr: render_note_piano_additive(pitch, dur, vel, sr)
-        elif synth == "kick":
-            def rf(pitch, dur, vel, sr, _p=kick_p):
-                p = dict(_p)     # no modificar el original
-                p["dur_s"] = dur # duración desde el MIDI
-                y = render_kick_additive(**p)
-                return (vel / 127.0) * y
-        else:
-            raise SystemExit(f"[ERR] Sintetizador no reconocido: {synth}")
-
-        y_trk = lay_notes_on_timeline(tnotes, rf)
-        tracks_audio.append(y_trk)
-
-
-    y_mix = mix_tracks(tracks_audio, normalize=True, ceiling_dbfs=-1.0)
-    if add_reverb:
-        y_mix = simple_reverb(y_mix, SR, mix=0.15)
-    y_mix = _normalize(y_mix)
-    write_wav(out, y_mix, SR)
+    _log_engine(synth, preset, session.library())
+
+    # Una pista por proceso (síntesis + inserts en el worker) → grafo de efectos → pico a 0 dBFS
+    stems = {} if stems_dir else None
+    y_mix = session.render(notes, (synth, preset), seed=seed, add_reverb=add_reverb,
+                           normalize=0.0, prof=prof, stems=stems)
+    with prof.span("write"):
+        write_wav(out, y_mix, session.sr, bits=bits, overview=overview)
+        if stems:
+            export_stems(stems_dir, stems, session.sr, bits, out, stems_multichannel)
     print(f"[OK] Render MIDI → {out}")
 
 
@@ -218,18 +145,58 @@ def main():
     ap.add_argument("--midi", type=str, default=None, help="Ruta a archivo MIDI")
     ap.add_argument("--out", type=str, default="out.wav", help="Archivo WAV de salida")
     ap.add_argument("--synth", type=str, default="ks",
-                    choices=["ks", "sample", "piano", "kick"], help="Motor de síntesis")
+                    choices=SYNTHS.names(), help="Motor de síntesis")
     ap.add_argument("--preset", type=str, default=None, help="Preset del instrumento (p.ej. drums.kick_additive)")
     ap.add_argument("--sample-dir", type=str, default=DEFAULT_SAMPLE_DIR, help="Carpeta con samples (para sample)")
     ap.add_argument("--no-reverb", action="store_true", help="Desactiva la reverb final")
     ap.add_argument("--preset-instruments", type=str, default=DEFAULT_PRESET_INSTR)
     ap.add_argument("--preset-effects", type=str, default=DEFAULT_PRESET_FX)
+    ap.add_argument("--profile", type=str, default=None, help="Guardar perfil del render (JSON)")
+    ap.add_argument("--bits", type=parse_bits, default=None, choices=BITS_CHOICES,
+                    help="Resolución de salida: 16, 24 (con dither TPDF) o float. Formato según extensión (.wav/.flac/.rf64)")
+    ap.add_argument("--jobs", type=int, default=None,
+                    help="Procesos para renderizar pistas en paralelo (por defecto, uno por núcleo)")
+    ap.add_argument("--overview", action="store_true",
+                    help="Guardar formas de onda y STFT reducidas junto al WAV (<out>.overview.npz)")
+    ap.add_argument("--precision", default=None, choices=list(precision.PRECISIONS),
+                    help="Precisión de procesamiento (por defecto float32; float64 para renders de referencia)")
+    ap.add_argument("--alloc-debug", action="store_true",
+                    help="Contar buffers de audio asignados por sitio durante el render")
+    ap.add_argument("--silence-db", default=None, metavar="DB",
+                    help="Umbral de silencio en dBFS (por defecto -96): colas y tramos por debajo no se calculan; 'off' lo desactiva")
+    ap.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                    help="Semilla del render: misma semilla → mismo audio bit a bit")
+    ap.add_argument("--draft", action="store_true",
+                    help=f"Borrador rápido para escuchar: {quality.DRAFT.sr} Hz, menos parciales, "
+                         "remuestreo lineal y reverb corta")
+    ap.add_argument("--sr", type=int, default=None,
+                    help=f"Tasa de muestreo del render (por defecto {SR}; {quality.DRAFT.sr} con --draft)")
+    ap.add_argument("--export-stems", metavar="DIR", default=None,
+                    help="Guardar también el stem post-inserts de cada pista en DIR (mismo render)")
+    ap.add_argument("--stems-multichannel", action="store_true",
+                    help="Con --export-stems: un único archivo con un canal por pista")
     args = ap.parse_args()
 
+    if args.precision:
+        precision.set_precision(args.precision)
+    if args.silence_db is not None:
+        silence.set_silence_db(args.silence_db)
+    if args.draft:
+        quality.set_quality(quality.DRAFT)
+    sr = args.sr or quality.get_quality().sr
+    if args.draft or sr != SR:
+        print(f"[INFO] Calidad {quality.get_quality().name} a {sr} Hz")
+    allocs = precision.enable_alloc_debug() if args.alloc_debug else None
+    profiler = Profiler() if args.profile else None
+    prof = get_profiler(profiler)
+
     # Carga de presets YAML (opcional)
     presets = None
     try:
-        presets = load_presets(args.preset_instruments, args.preset_effects)
+        with prof.span("presets"):
+            presets = load_compiled_presets(args.preset_instruments, args.preset_effects, sr=sr)
+    except PresetError as e:
+        raise SystemExit(f"[ERR] {e}")
     except Exception as e:
         print("[WARN] No se pudieron cargar presets:", e)
 
@@ -243,7 +210,9 @@ def main():
             sample_dir=args.sample_dir,
             presets=presets,
             add_reverb=add_reverb,
+            sr=sr,
         )
+        _report_allocs(allocs, prof)
         return
 
     if args.midi:
@@ -255,7 +224,19 @@ def main():
             sample_dir=args.sample_dir,
             presets=presets,
             add_reverb=add_reverb,
+            profiler=profiler,
+            bits=args.bits,
+            overview=args.overview,
+            workers=args.jobs,
+            seed=args.seed,
+            stems_dir=args.export_stems,
+            stems_multichannel=args.stems_multichannel,
+            sr=sr,
         )
+        _report_allocs(allocs, prof)
+        if profiler:
+            profiler.save(args.profile)
+            profiler.close()
         return
 
     ap.print_help()
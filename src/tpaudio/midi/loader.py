@@ -1,7 +1,8 @@
 from mido import MidiFile
 
-def load_notes(mid_path: str):
-    mid = MidiFile(mid_path)
+def load_notes(mid_path):
+    # ruta o archivo abierto (p.ej. BytesIO con el MIDI recibido por server.py)
+    mid = MidiFile(file=mid_path) if hasattr(mid_path, "read") else MidiFile(mid_path)
     notes = []
     for ti, track in enumerate(mid.tracks):
         t = 0.0
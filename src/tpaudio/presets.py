@@ -0,0 +1,297 @@
+"""
+Compilador de presets.
+
+Valida instruments.yml en dataclasses tipadas (los errores aparecen al cargar, no
+a mitad del render) y precalcula tablas por pitch (MIDI 0–127):
+  - KS: longitud del lazo L, fracción y coeficientes del lazo
+  - aditivo: frecuencias de los parciales (0 sobre Nyquist)
+El resultado se guarda como pickle junto al YAML (instruments.yml.pkl) y se
+reutiliza mientras el YAML no cambie.
+"""
+import inspect
+import os
+import pickle
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .config import load_yaml
+from .constants import SR
+from .core.dsp import midi2freq
+from .core.multirate import MIN_RATE, internal_rate, valid_rate
+
+COMPILER_VERSION = 2
+KS_AUTO_HARMONICS = 24      # rate: auto en KS: armónicos de f0 que deben quedar en banda
+
+DEFAULT_KICK = {
+    "dur_s": 0.35,
+    "f_start_hz": 150.0,
+    "f_end_hz": 50.0,
+    "tau_freq_ms": 22.0,
+    "amps": (1.0, 0.5, 0.25, 0.15, 0.10),
+    "ratios": (1.0, 1.6, 2.3, 3.5, 4.2),
+    "tau_amp_ms": (120, 90, 70, 55, 45),
+    "click_ms": 4.0,
+    "click_mix": 0.06,
+    "hp_hz": 22.0,
+    "drive": 0.6,
+}
+
+
+class PresetError(ValueError):
+    pass
+
+
+def _check(cond: bool, where: str, msg: str):
+    if not cond:
+        raise PresetError(f"Preset {where}: {msg}")
+
+
+def _from_dict(cls, where: str, d: dict, **extra):
+    """Construye la dataclass rechazando claves desconocidas (typos en el YAML)."""
+    if not isinstance(d, dict):
+        raise PresetError(f"Preset {where}: se esperaba un mapeo, no {type(d).__name__}")
+    names = {f.name for f in fields(cls) if f.init}
+    unknown = sorted(set(d) - names)
+    _check(not unknown, where, f"parámetros desconocidos {unknown}")
+    try:
+        return cls(**extra, **d)
+    except (TypeError, ValueError) as e:
+        raise PresetError(f"Preset {where}: {e}") from None
+
+
+# ----------------------------
+# Karplus–Strong
+# ----------------------------
+@dataclass(frozen=True)
+class KSTable:
+    """Lazo KS por pitch: y[m] = g·(y[m-L] + c1·y[m-1] + c2·y[m-2])."""
+    sr: int
+    L: np.ndarray
+    frac: np.ndarray
+    c1: np.ndarray
+    c2: np.ndarray
+    g: float
+
+    def loop(self, pitch: int):
+        p = int(np.clip(pitch, 0, 127))
+        return int(self.L[p]), float(self.c1[p]), float(self.c2[p]), self.g
+
+
+def ks_table(sr: int, rho: float, stiffness: float) -> KSTable:
+    n_exact = sr / midi2freq(np.arange(128))
+    n_int = np.floor(n_exact)
+    frac = n_exact - n_int
+    a = float(np.clip(stiffness, 0.0, 0.02))
+    return KSTable(sr=int(sr), L=np.maximum(2, n_int).astype(np.int64), frac=frac,
+                   c1=(1 + a) * (1 - frac) - a, c2=(1 + a) * frac, g=0.5 * rho)
+
+
+@dataclass
+class KSPreset:
+    name: Optional[str] = None
+    rho: float = 0.998
+    S: Optional[float] = 0.50
+    pick_pos: float = 0.20
+    noise_mix: float = 0.02
+    stiffness: float = 0.0
+    transpose: int = 0
+    rate: Any = None            # tasa interna (ver core/multirate.py)
+    tables: Dict[int, KSTable] = field(default_factory=dict, repr=False, compare=False)
+
+    def __post_init__(self):
+        w = f"ks.{self.name}"
+        _check(0.0 < self.rho <= 1.0, w, f"rho={self.rho} fuera de (0, 1]")
+        _check(self.S is None or 0.0 <= self.S < 1.0, w, f"S={self.S} fuera de [0, 1)")
+        _check(0.0 < self.pick_pos < 1.0, w, f"pick_pos={self.pick_pos} fuera de (0, 1)")
+        _check(self.noise_mix >= 0.0, w, f"noise_mix={self.noise_mix} negativo")
+        _check(0.0 <= self.stiffness <= 0.02, w, f"stiffness={self.stiffness} fuera de [0, 0.02]")
+        _check(valid_rate(self.rate), w, f"rate={self.rate}: usar 'auto' o una tasa ≥ {MIN_RATE} Hz")
+        self.transpose = int(self.transpose)
+
+    @property
+    def params(self) -> dict:
+        """Kwargs para render_note_ks / KSVoice."""
+        return dict(rho=self.rho, S=self.S, pick_pos=self.pick_pos,
+                    noise_mix=self.noise_mix, stiffness=self.stiffness)
+
+    def table(self, sr: int) -> KSTable:
+        tab = self.tables.get(sr)
+        if tab is None:
+            tab = self.tables[sr] = ks_table(sr, self.rho, self.stiffness)
+        return tab
+
+    def render(self, pitch, dur, vel, sr, rng=None):
+        """Función de nota (pitch, dur, vel, sr): el lazo sale de la tabla (de la tasa interna)."""
+        from .synth.karplus import render_note_ks
+        fs = internal_rate(self.rate, midi2freq(pitch) * KS_AUTO_HARMONICS, sr)
+        return render_note_ks(pitch, dur, vel, sr, preset_name=self.name,
+                              loop=self.table(fs).loop(pitch), rng=rng, rate=fs, **self.params)
+
+
+# ----------------------------
+# Kick aditivo (banco 'drums')
+# ----------------------------
+@lru_cache(maxsize=1)
+def _kick_args() -> frozenset:
+    from .synth.adsr import render_kick_additive
+    return frozenset(inspect.signature(render_kick_additive).parameters) - {"sr", "rng", "rate"}
+
+
+@dataclass
+class KickPreset:
+    name: Optional[str] = None
+    kind: str = "additive"
+    params: dict = field(default_factory=lambda: dict(DEFAULT_KICK))
+    rate: Any = None            # tasa interna de los parciales (ver core/multirate.py)
+
+    def __post_init__(self):
+        w = f"drums.{self.name}"
+        _check(self.kind == "additive", w, f"kind '{self.kind}' no soportado")
+        _check(valid_rate(self.rate), w, f"rate={self.rate}: usar 'auto' o una tasa ≥ {MIN_RATE} Hz")
+        unknown = sorted(set(self.params) - _kick_args())
+        _check(not unknown, w, f"parámetros desconocidos {unknown}")
+        p = dict(DEFAULT_KICK, **self.params)
+        n = {len(p[k]) for k in ("amps", "ratios", "tau_amp_ms")}
+        _check(len(n) == 1, w, "amps, ratios y tau_amp_ms deben tener el mismo largo")
+        _check(p["dur_s"] > 0 and p["tau_freq_ms"] > 0, w, "dur_s y tau_freq_ms deben ser > 0")
+        self.params = {k: tuple(v) if isinstance(v, list) else v for k, v in p.items()}
+
+    def render(self, pitch, dur, vel, sr, rng=None):
+        p = dict(self.params)
+        p["dur_s"] = dur      # duración desde el MIDI
+        from .synth.adsr import render_kick_additive
+        hi = max(p["f_start_hz"], p["f_end_hz"]) * max(p["ratios"])      # parcial más agudo
+        y = render_kick_additive(sr=sr, rng=rng, rate=internal_rate(self.rate, hi, sr), **p)
+        y *= vel / 127.0
+        return y
+
+
+# ----------------------------
+# Aditivo (banco opcional 'additive')
+# ----------------------------
+@dataclass
+class AdditivePreset:
+    name: Optional[str] = None
+    partials: tuple = (1, 3, 5, 7, 9)
+    amps: tuple = (1.0, 0.6, 0.4, 0.25, 0.18)
+    adsr: Optional[dict] = None
+    _synth: Any = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        w = f"additive.{self.name}"
+        self.partials, self.amps = tuple(self.partials), tuple(self.amps)
+        _check(len(self.partials) == len(self.amps) > 0, w, "partials y amps deben tener el mismo largo")
+        _check(all(r > 0 for r in self.partials), w, "los parciales deben ser > 0")
+
+    @property
+    def synth(self):
+        if self._synth is None:
+            from .synth.additive import Additive
+            self._synth = Additive(self.partials, self.amps, self.adsr)
+        return self._synth
+
+    def render(self, pitch, dur, vel, sr):
+        return self.synth.render_note(pitch, dur, vel, sr)
+
+
+# ----------------------------
+# Biblioteca compilada
+# ----------------------------
+@dataclass
+class PresetLibrary:
+    ks: Dict[str, KSPreset] = field(default_factory=dict)
+    drums: Dict[str, KickPreset] = field(default_factory=dict)
+    additive: Dict[str, AdditivePreset] = field(default_factory=dict)
+    effects: dict = field(default_factory=dict)
+    source: Optional[str] = None
+    from_cache: bool = False
+
+    def ks_preset(self, name: str = None) -> KSPreset:
+        """Preset KS por nombre; uno por defecto (con ese nombre de cuerpo) si no existe."""
+        if name and "." in name:
+            name = name.split(".", 1)[1]
+        return self.ks.get(name) or KSPreset(name=name)
+
+    def kick(self, name: str = None) -> KickPreset:
+        if name and "." in name:
+            name = name.split(".", 1)[1]
+        name = name or "kick_additive"
+        return self.drums.get(name) or KickPreset(name=name)
+
+    def additive_preset(self, name: str = None) -> AdditivePreset:
+        return self.additive.get(name) or AdditivePreset(name=name)
+
+    def precompute(self, sr: int = SR):
+        for p in self.ks.values():
+            p.table(sr)
+        for p in self.additive.values():
+            p.synth.freq_table(sr)
+        return self
+
+
+def compile_presets(raw: dict, sr: int = SR) -> PresetLibrary:
+    """Valida los bancos del YAML de instrumentos (+ 'effects' crudo) y precalcula tablas."""
+    raw = dict(raw or {})
+    lib = PresetLibrary(effects=raw.pop("effects", None) or {})
+    for name, d in (raw.pop("ks", None) or {}).items():
+        lib.ks[name] = _from_dict(KSPreset, f"ks.{name}", d, name=name)
+    for name, d in (raw.pop("drums", None) or {}).items():
+        lib.drums[name] = _from_dict(KickPreset, f"drums.{name}", d, name=name)
+    for name, d in (raw.pop("additive", None) or {}).items():
+        lib.additive[name] = _from_dict(AdditivePreset, f"additive.{name}", d, name=name)
+    for bank in raw:
+        print(f"[WARN] Banco de presets desconocido ignorado: '{bank}'")
+    return lib.precompute(sr)
+
+
+def _cache_path(path: str) -> str:
+    return path + ".pkl"
+
+
+def _stamp(path: str):
+    # el pickle guarda las clases con el paquete que lo escribió (tpaudio / src.tpaudio)
+    st = os.stat(path)
+    return COMPILER_VERSION, __name__, st.st_mtime_ns, st.st_size
+
+
+def load_compiled_presets(instruments_path: str, effects_path: str = None,
+                          sr: int = SR, cache: bool = True) -> PresetLibrary:
+    """
+    Carga instruments.yml ya compilado. Usa el pickle vecino si corresponde al YAML
+    actual (misma versión del compilador, mismo paquete, mtime y tamaño); si no (o si
+    no se puede leer), compila y lo guarda.
+    El YAML de efectos se lee siempre (lo compila el grafo de efectos).
+    """
+    path = os.path.abspath(instruments_path) if instruments_path else None
+    lib = None
+    if path and os.path.exists(path):
+        stamp = _stamp(path)
+        if cache:
+            try:
+                with open(_cache_path(path), "rb") as f:
+                    cached_stamp, cached = pickle.load(f)
+                if cached_stamp == stamp:
+                    lib = cached
+                    lib.from_cache = True
+            except Exception:          # caché ilegible o de otro paquete: se recompila
+                lib = None
+        if lib is None:
+            lib = compile_presets(load_yaml(path), sr)
+            if cache:
+                try:
+                    with open(_cache_path(path), "wb") as f:
+                        pickle.dump((stamp, lib), f, protocol=pickle.HIGHEST_PROTOCOL)
+                except OSError as e:
+                    print(f"[WARN] No se pudo guardar la caché de presets: {e}")
+    else:
+        if path:
+            print(f"[WARN] No se encontró el archivo de presets: {path}")
+        lib = PresetLibrary()
+    lib.source = path
+    lib.effects = load_yaml(effects_path) if effects_path else {}
+    lib.precompute(sr)
+    print(f"[OK] Presets {'(caché) ' if lib.from_cache else ''}cargados desde: {path}")
+    return lib
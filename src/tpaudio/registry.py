@@ -0,0 +1,133 @@
+"""
+Registro de motores de síntesis y efectos por nombre.
+
+Cada entrada es una ruta "modulo:atributo" que se importa recién en el primer
+uso, así un `--help` o un render que sólo usa KS no paga la importación de
+scipy/matplotlib/etc. de los demás motores.
+
+Paquetes de terceros pueden sumar motores o efectos declarando entry points:
+
+    [project.entry-points."tpaudio.synths"]
+    fm = "mi_paquete.fm:make_renderer"
+
+    [project.entry-points."tpaudio.effects"]
+    chorus = "mi_paquete.chorus:Chorus"
+
+Un motor es una fábrica f(presets, preset_name, samples=None) → render_fn(pitch, dur, vel, sr);
+si el motor tiene aleatoriedad, render_fn acepta además rng= (Generator o semilla,
+ver core/rng.py) y no debe usar np.random global. Un efecto es una clase
+(dataclass con process_block, ver core/processor.py).
+"""
+import importlib
+import threading
+
+SYNTH_GROUP = "tpaudio.synths"
+EFFECT_GROUP = "tpaudio.effects"
+
+
+class Registry:
+    def __init__(self, kind: str, group: str = None):
+        self.kind = kind
+        self.group = group
+        self._targets = {}     # nombre → "modulo:atributo" u objeto ya cargado
+        self._aliases = {}
+        self._loaded = {}
+        self._eps_scanned = False
+        self._lock = threading.Lock()
+
+    def register(self, name: str, target, *aliases):
+        """'target' es "modulo:atributo" (import diferido) o el objeto mismo."""
+        self._targets[name] = target
+        self._loaded.pop(name, None)
+        for a in aliases:
+            self._aliases[a] = name
+        return target
+
+    def _scan_entry_points(self):
+        if self._eps_scanned or not self.group:
+            return
+        self._eps_scanned = True
+        try:
+            from importlib.metadata import entry_points
+            eps = entry_points(group=self.group)
+        except Exception as e:
+            print(f"[WARN] No se pudieron leer entry points '{self.group}': {e}")
+            return
+        for ep in eps:
+            if ep.name not in self._targets:
+                self._targets[ep.name] = ep
+
+    def resolve(self, name: str) -> str:
+        return self._aliases.get(name, name)
+
+    def __contains__(self, name) -> bool:
+        name = self.resolve(name)
+        if name not in self._targets:
+            self._scan_entry_points()
+        return name in self._targets
+
+    def names(self) -> list:
+        self._scan_entry_points()
+        return sorted(self._targets)
+
+    def get(self, name: str):
+        name = self.resolve(name)
+        obj = self._loaded.get(name)
+        if obj is not None:
+            return obj
+        with self._lock:
+            if name not in self._targets:
+                self._scan_entry_points()
+            target = self._targets.get(name)
+            if target is None:
+                raise ValueError(f"{self.kind} no soportado: {name} (disponibles: {', '.join(self.names())})")
+            if isinstance(target, str):
+                mod, _, attr = target.partition(":")
+                obj = getattr(importlib.import_module(mod, __package__), attr)
+            elif hasattr(target, "load") and hasattr(target, "group"):   # EntryPoint
+                obj = target.load()
+            else:
+                obj = target
+            self._loaded[name] = obj
+            return obj
+
+
+SYNTHS = Registry("Sintetizador", SYNTH_GROUP)
+SYNTHS.register("ks", ".synth.engines:make_ks")
+SYNTHS.register("sample", ".synth.engines:make_sample", "piano_sample")
+SYNTHS.register("piano", ".synth.engines:make_piano", "piano_additive")
+SYNTHS.register("modal", ".synth.engines:make_modal", "piano_modal")
+SYNTHS.register("kick", ".synth.engines:make_kick", "kick_adsr")
+SYNTHS.register("additive", ".synth.engines:make_additive")
+
+EFFECTS = Registry("Efecto", EFFECT_GROUP)
+EFFECTS.register("delay", ".effects.delay:Delay")
+EFFECTS.register("flanger", ".effects.flanger:Flanger")
+EFFECTS.register("limiter", ".effects.limiter:Limiter")
+EFFECTS.register("reverb", ".effects.reverb:Reverb")
+
+
+def make_renderer(synth: str, preset: str = None, presets=None, samples=None):
+    """render_fn(pitch, dur, vel, sr, seed=None) del motor 'synth' (transpose del preset
+    incluido). La nota sale siempre en precision.dtype() (sin copia si el motor ya la
+    entrega así) y sin la cola bajo el umbral de core/silence.py. render_fn.uses_rng
+    dice si el motor usa la semilla: si no, el audio no depende de ella (y las
+    cachés de notas pueden ignorarla)."""
+    import inspect
+    from .core.precision import as_audio
+    from .core.silence import trim_tail
+    if presets is None:
+        from .presets import PresetLibrary
+        presets = PresetLibrary()
+    rf = SYNTHS.get(synth)(presets, preset, samples=samples)
+    try:
+        seeded = "rng" in inspect.signature(rf).parameters
+    except (TypeError, ValueError):
+        seeded = False
+
+    def render_fn(pitch, dur, vel, sr, seed=None, _rf=rf):
+        if seeded and seed is not None:
+            return trim_tail(as_audio(_rf(pitch, dur, vel, sr, rng=seed)))
+        return trim_tail(as_audio(_rf(pitch, dur, vel, sr)))
+    render_fn.uses_rng = seeded
+    return render_fn
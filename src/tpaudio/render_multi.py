@@ -1,91 +1,46 @@
 import argparse
-from .config import load_presets
-from .core.timeline import lay_notes_on_timeline
-from .core.mixer import mix_tracks
-from .core.audio_io import write_wav
-from .midi.loader import load_notes
-from .synth.karplus import render_note_ks
-from .synth.sample_piano import load_samples, render_note_sample
-from .synth.additive import Additive
+from .presets import PresetLibrary
+from .core import precision, quality, silence
+from .core.profiler import Profiler, get_profiler
+from .core.rng import DEFAULT_SEED
+from .session import BITS_CHOICES, RenderSession, export_stems, parse_bits
 
-def _parse_track_list(s: str):
-    out = []
-    if not s:
-        return out
-    for part in s.split(","):
-        part = part.strip()
-        if not part:
-            continue
-        if "-" in part:
-            a, b = part.split("-", 1)
-            out.extend(range(int(a), int(b) + 1))
-        else:
-            out.append(int(part))
-    return sorted(set(out))
-
-def _get_params(presets, synth_key: str, preset_name: str):
-    params = {}
-    transpose = 0
-    if presets and preset_name:
-        bank = (presets.get(synth_key) or {})
-        params = (bank.get(preset_name) or {}).copy()
-        try:
-            transpose = int(params.pop("transpose", 0))
-        except Exception:
-            transpose = 0
-    return params, transpose
-
-def _render_notes(notes, synth_type, preset_name, presets, sample_dir, sr):
-    if not notes:
-        return None
-    if synth_type == "sample":
-        samples = load_samples(sample_dir)
-        def render_fn(pitch, dur, vel, sr):
-            return render_note_sample(samples, pitch, dur, vel, sr)
-    elif synth_type == "additive":
-        synth = Additive()
-        def render_fn(pitch, dur, vel, sr):
-            return synth.render_note(pitch, dur, vel, sr)
-    elif synth_type == "ks":
-        params, tr = _get_params(presets, "ks", preset_name)
-        def render_fn(pitch, dur, vel, sr, _p=params, _tr=tr):
-            return render_note_ks(pitch + _tr, dur, vel, sr,
-                                  rho=_p.get("rho", 0.998),
-                                  S=_p.get("S", 0.5),
-                                  pick_pos=_p.get("pick_pos", 0.2),
-                                  noise_mix=_p.get("noise_mix", 0.02),
-                                  stiffness=_p.get("stiffness", 0.001),
-                                  preset_name=preset_name)
-    else:
-        raise SystemExit(f"[ERROR] Tipo de sintetizador desconocido: {synth_type}")
-    return lay_notes_on_timeline(notes, render_fn)
+def render_notes_multi(notes_all, instruments: list[str], presets: PresetLibrary,
+                       sample_dir: str = "samples_piano_1", sr: int = 48000, profiler=None,
+                       workers: int = None, seed: int = DEFAULT_SEED, session: RenderSession = None,
+                       stems: dict = None):
+    """Renderiza y mezcla (con el grafo de efectos) una lista de notas ya cargada.
+    Cada instrumento (con sus inserts) se renderiza en un proceso aparte.
+    'stems' (dict) recibe la pista post-inserts de cada instrumento."""
+    session = session or RenderSession(presets=presets or PresetLibrary(), sample_dir=sample_dir,
+                                       sr=sr, workers=workers, verbose=True)
+    try:
+        return session.render(notes_all, instruments, seed=seed, normalize=-1.0, prof=profiler, stems=stems)
+    except ValueError as e:
+        raise SystemExit(f"[ERROR] {e}")
 
 def render_multi(midi_path: str, instruments: list[str], presets_path: str,
-                 out_path: str, sample_dir: str = "samples_piano_1", sr: int = 48000):
-    presets = load_presets(presets_path, None)
-    notes_all = load_notes(midi_path)
+                 out_path: str, sample_dir: str = "samples_piano_1", sr: int = 48000,
+                 effects_path: str = None, profiler=None, bits=None, workers: int = None,
+                 seed: int = DEFAULT_SEED, stems_dir: str = None, stems_multichannel: bool = False):
+    from .core.audio_io import write_wav
+    prof = get_profiler(profiler)
+    session = RenderSession(presets_path, effects_path, sample_dir, sr=sr, workers=workers, verbose=True)
+    with prof.span("presets"):
+        presets = session.library()
+    notes_all = session.notes(midi_path, prof)
     if not notes_all:
         raise SystemExit(f"[ERROR] No se encontraron notas en {midi_path}")
     print(f"[INFO] Archivo MIDI: {midi_path}")
     print(f"[INFO] Instrumentos: {instruments}")
 
-    mixes = []
-    for inst_decl in instruments:
-        try:
-            name, synth_type, track_s = inst_decl.split(":")
-        except ValueError:
-            raise SystemExit(f"[ERROR] Formato inválido en --inst: {inst_decl} (usa nombre:tipo:tracks)")
-        track_ids = _parse_track_list(track_s)
-        notes = [n for n in notes_all if n[0] in track_ids]
-        print(f"[{name.upper()}] synth={synth_type}, preset={name}, tracks={track_ids}, notas={len(notes)}")
-        y = _render_notes(notes, synth_type, name, presets, sample_dir, sr)
-        if y is not None:
-            mixes.append(y)
-
-    if not mixes:
-        raise SystemExit("[ERROR] No se generó ninguna pista válida.")
-    mix = mix_tracks(mixes, normalize=True, ceiling_dbfs=-1.0)
-    write_wav(out_path, mix, sr)
+    stems = {} if stems_dir else None
+    mix = render_notes_multi(notes_all, instruments, presets, profiler=profiler, seed=seed,
+                             session=session, stems=stems)
+    with prof.span("write"):
+        write_wav(out_path, mix, sr, bits=bits)
+        if stems:
+            export_stems(stems_dir, stems, sr, bits, out_path, stems_multichannel)
     print(f"[OK] Render MULTI → {out_path}")
 
 def main():
@@ -94,10 +49,51 @@ def main():
     ap.add_argument("--inst", required=True, action="append",
                     help="Definición: nombre:tipo:tracks (puede repetirse). Ej: piano:sample:0,1  bass:ks:2")
     ap.add_argument("--preset-instruments", required=True, help="Ruta a presets/instruments.yml")
+    ap.add_argument("--preset-effects", default=None, help="Ruta a presets/effects.yml (opcional)")
     ap.add_argument("--sample-dir", default="samples_piano_1", help="Carpeta de samples de piano")
     ap.add_argument("--out", default="multi_mix.wav", help="Archivo WAV de salida")
+    ap.add_argument("--profile", default=None, help="Guardar perfil del render (JSON)")
+    ap.add_argument("--bits", type=parse_bits, default=None, choices=BITS_CHOICES,
+                    help="Resolución de salida (16/24 con dither TPDF). Formato según extensión (.wav/.flac/.rf64)")
+    ap.add_argument("--jobs", type=int, default=None,
+                    help="Procesos para renderizar instrumentos en paralelo (por defecto, uno por núcleo)")
+    ap.add_argument("--precision", default=None, choices=list(precision.PRECISIONS),
+                    help="Precisión de procesamiento (por defecto float32; float64 para renders de referencia)")
+    ap.add_argument("--alloc-debug", action="store_true",
+                    help="Contar buffers de audio asignados por sitio durante el render")
+    ap.add_argument("--silence-db", default=None, metavar="DB",
+                    help="Umbral de silencio en dBFS (por defecto -96): colas y tramos por debajo no se calculan; 'off' lo desactiva")
+    ap.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                    help="Semilla del render: misma semilla → mismo audio bit a bit")
+    ap.add_argument("--draft", action="store_true",
+                    help=f"Borrador rápido para escuchar: {quality.DRAFT.sr} Hz, menos parciales, "
+                         "remuestreo lineal y reverb corta")
+    ap.add_argument("--sr", type=int, default=None,
+                    help=f"Tasa de muestreo del render (por defecto {quality.FULL.sr}; {quality.DRAFT.sr} con --draft)")
+    ap.add_argument("--export-stems", metavar="DIR", default=None,
+                    help="Guardar también el stem post-inserts de cada instrumento en DIR (mismo render)")
+    ap.add_argument("--stems-multichannel", action="store_true",
+                    help="Con --export-stems: un único archivo con un canal por instrumento")
     args = ap.parse_args()
-    render_multi(args.midi, args.inst, args.preset_instruments, args.out, args.sample_dir)
+    if args.precision:
+        precision.set_precision(args.precision)
+    if args.silence_db is not None:
+        silence.set_silence_db(args.silence_db)
+    if args.draft:
+        quality.set_quality(quality.DRAFT)
+    allocs = precision.enable_alloc_debug() if args.alloc_debug else None
+    profiler = Profiler() if args.profile else None
+    render_multi(args.midi, args.inst, args.preset_instruments, args.out, args.sample_dir,
+                 effects_path=args.preset_effects, profiler=profiler,
+                 bits=args.bits,
+                 sr=args.sr or quality.get_quality().sr, workers=args.jobs, seed=args.seed,
+                 stems_dir=args.export_stems, stems_multichannel=args.stems_multichannel)
+    if allocs is not None:
+        allocs.print_summary()
+        allocs.to_profiler(get_profiler(profiler))
+    if profiler:
+        profiler.save(args.profile)
+        profiler.close()
 
 if __name__ == "__main__":
     main()
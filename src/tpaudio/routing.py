@@ -1,47 +1,24 @@
-from .synth.additive import Additive
-from .synth.karplus import render_note_ks
-from .effects.flanger import delay
-from .effects.reverb import simple_reverb
+from .effects.graph import compile_fx_graph, make_effect
+from .presets import compile_presets
+from .registry import SYNTHS, make_renderer
 
-def synth_from_preset(synth_kind: str, preset: dict):
-    if synth_kind == 'additive':
-        p = preset.get('partials')
-        a = preset.get('amps')
-        adsr = preset.get('adsr')
-        return ('additive', Additive(partials=p, amps=a, adsr=adsr))
-    elif synth_kind == 'ks':
-        # devolver callable para render KS con params
-        rho = preset.get('rho', 0.997)
-        S = preset.get('S', 0.55)
-        pick_pos = preset.get('pick_pos', 0.2)
-        return ('ks', lambda pitch, dur, vel, sr: render_note_ks(pitch, dur, vel, sr, rho=rho, S=S, pick_pos=pick_pos))
-    else:
-        raise ValueError(f"Sintetizador no soportado: {synth_kind}")
+# Banco del YAML de instrumentos que parametriza cada motor
+_BANKS = {"ks": "ks", "additive": "additive", "kick": "drums"}
 
-def build_fx_chain(track_id: int, fx_presets: dict):
-    chain = []
-    per_track = (fx_presets.get('tracks') or {}).get(track_id, [])
-    master = fx_presets.get('master') or []
+def synth_from_preset(synth_kind: str, preset: dict):
+    """(tipo, render_fn) a partir de un preset suelto (dict del YAML), validado."""
+    bank = _BANKS.get(SYNTHS.resolve(synth_kind))
+    params = {k: v for k, v in (preset or {}).items() if v is not None}
+    lib = compile_presets({bank: {"_": params}}) if bank else None
+    return (synth_kind, make_renderer(synth_kind, "_", lib))
 
-    def add_fx(entry):
-        t = entry.get('type')
-        if t == 'delay':
-            def fx(sig, sr):
-                return delay(sig, sr, time_ms=entry.get('time_ms',200),
-                             feedback=entry.get('feedback',0.25),
-                             mix=entry.get('mix',0.2))
-            chain.append(fx)
-        elif t == 'reverb':
-            def fx(sig, sr):
-                return simple_reverb(sig, sr, mix=entry.get('mix',0.15))
-            chain.append(fx)
-        elif t == 'limiter':
-            # handled in mixer or as last fx
-            pass
+def _as_callables(effects):
+    return [lambda sig, sr, _fx=fx: _fx.process(sig, sr) for fx in effects]
 
-    for e in per_track:
-        add_fx(e)
-    for e in master:
-        add_fx(e)
+def build_fx_chain(track_id, fx_presets: dict):
+    """Cadena de inserción de UNA pista (sin master ni buses: ver compile_fx_graph)."""
+    graph = compile_fx_graph(fx_presets)
+    return _as_callables(graph.strip(track_id).inserts)
 
-    return chain
+def build_master_chain(fx_presets: dict):
+    return _as_callables(make_effect(e) for e in ((fx_presets or {}).get('master') or []))
@@ -0,0 +1,569 @@
+"""
+Daemon de render con API local (HTTP/1.1 + JSON sobre localhost o socket Unix).
+
+Un proceso de larga vida mantiene entre trabajos lo que cada `python -m
+tpaudio.main` vuelve a pagar: imports (numpy/scipy/mido) y una RenderSession
+(session.py) con presets compilados, MIDIs ya parseados, bancos de samples, el
+pool de procesos de core/parallel.py y la caché de notas de cada proceso.
+
+    POST   /jobs               lanza un render → 202 {"id": n}
+    GET    /jobs               lista de trabajos
+    GET    /jobs/<id>          estado: queued | running | done | cancelled | error
+    GET    /jobs/<id>/result   el audio renderizado (cuando terminó)
+    DELETE /jobs/<id>          cancela (en cola o en curso); si ya terminó, lo olvida
+    GET    /status             cola, trabajos y cachés
+
+Cuerpo de POST /jobs:
+
+    {"midi": "tema.mid"  |  "midi_b64": "...",
+     "instruments": ["piano:sample:0,1", "bass:ks:2"],   # como render_multi --inst
+     "synth": "ks", "preset": null,                      # si no hay 'instruments'
+     "presets": "presets/instruments.yml", "effects": "presets/effects.yml",
+     "out": "mix.wav", "bits": 24, "no_reverb": false, "overview": false, "seed": 0}
+
+Rutas del cuerpo: 'out' es relativa a out_dir (sin '..' ni rutas absolutas);
+'midi', 'presets', 'effects' y 'sample_dir' tienen que caer dentro de alguna de
+las raíces permitidas ('roots', por defecto la carpeta actual; las relativas se
+resuelven contra la primera) o ser las del propio server. POST exige
+Content-Type: application/json, y se rechazan Host y Origin que no sean locales
+(una página web no puede mandar trabajos al daemon).
+
+La planificación es asyncio: a lo sumo 'max_jobs' renders en curso (cada uno en
+un hilo, que reparte pistas al pool de procesos) y 'max_queue' en espera; con
+la cola llena POST responde 503.
+
+    python -m tpaudio.server --port 8765
+    python -m tpaudio.server --socket /tmp/tpaudio.sock
+"""
+import argparse
+import asyncio
+import base64
+import http.client
+import itertools
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from .constants import SR
+from .core.jobs import RenderJob, run_job
+from .core.rng import DEFAULT_SEED
+from .core.parallel import (Cancelled, default_workers,
+                            shutdown_pool, warm_pool)
+from .main import DEFAULT_PRESET_FX, DEFAULT_PRESET_INSTR
+from .session import RenderSession
+from .registry import SYNTHS
+
+DEFAULT_PORT = 8765
+MAX_BODY = 64 * 2 ** 20
+KEEP_FINISHED = 256          # trabajos terminados que se recuerdan
+FINISHED = ("done", "cancelled", "error")
+
+
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class Forbidden(BadRequest):
+    pass
+
+
+@dataclass
+class ServerJob:
+    id: int
+    spec: dict
+    state: str = "queued"
+    stage: Optional[str] = None
+    progress: dict = field(default_factory=dict)     # clave → [hechas, total]
+    out: Optional[str] = None
+    owned: bool = False        # la salida la eligió el server (se borra al olvidarlo)
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    seconds: Optional[float] = None
+    render: Any = None         # RenderJob en curso
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "state": self.state, "stage": self.stage, "out": self.out,
+                "progress": {str(k): v for k, v in self.progress.items()},
+                "error": self.error, "seconds": self.seconds}
+
+
+class RenderServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, socket_path: str = None,
+                 workers: int = None, max_jobs: int = 2, max_queue: int = 32, out_dir: str = None,
+                 presets: str = DEFAULT_PRESET_INSTR, effects: str = DEFAULT_PRESET_FX,
+                 sample_dir: str = None, roots=None):
+        self.host, self.port, self.socket_path = host, port, socket_path
+        self.workers = workers or default_workers()
+        self.max_jobs, self.max_queue = max(1, max_jobs), max(1, max_queue)
+        self.out_dir = out_dir or tempfile.mkdtemp(prefix="tpaudio-")
+        os.makedirs(self.out_dir, exist_ok=True)
+        presets, effects, sample_dir = (os.path.realpath(p) if p else p for p in (presets, effects, sample_dir))
+        self.default_presets, self.default_effects = presets, effects
+        self.sample_dir = sample_dir
+        self.roots = [os.path.realpath(r) for r in (roots or [os.getcwd()])]
+        self._own = {p for p in (presets, effects, sample_dir) if p}
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self.session = RenderSession(presets, effects, sample_dir, sr=SR, workers=self.workers)
+        self._stats = defaultdict(int)
+        self._lock = threading.Lock()
+        self._threads = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="render")
+        self._loop = None
+        self._server = None
+        self._queue = None
+        self._consumers = []
+        self._ready = threading.Event()
+        self._thread = None
+
+    # ----------------------------
+    # Cachés calientes
+    # ----------------------------
+    def warm(self):
+        """Imports de los motores, presets por defecto, samples y pool ya arrancado."""
+        for name in SYNTHS.names():
+            try:
+                SYNTHS.get(name)
+            except Exception as e:
+                print(f"[WARN] Motor '{name}' no disponible: {e}")
+        self.session.library(self.default_presets, self.default_effects)
+        try:
+            warm_pool(self.workers, self.sample_dir)
+        except Exception as e:
+            print(f"[WARN] No se pudieron cargar samples: {e}")
+            warm_pool(self.workers)
+
+    def _midi_source(self, spec: dict):
+        if spec.get("midi_b64"):
+            try:
+                return base64.b64decode(spec["midi_b64"], validate=True)
+            except ValueError as e:
+                raise BadRequest(f"midi_b64 inválido: {e}")
+        if not spec.get("midi"):
+            raise BadRequest("Falta 'midi' o 'midi_b64'")
+        return self._in_path("midi", spec["midi"])
+
+    # ----------------------------
+    # Rutas del cliente
+    # ----------------------------
+    @staticmethod
+    def _inside(path: str, root: str) -> bool:
+        return os.path.commonpath([path, root]) == root
+
+    def _out_path(self, out) -> str:
+        """'out' del cliente → ruta dentro de out_dir."""
+        if not isinstance(out, str) or os.path.isabs(out) or ".." in out.replace("\\", "/").split("/"):
+            raise Forbidden(f"'out' debe ser una ruta relativa a la carpeta de salida: {out!r}")
+        root = os.path.realpath(self.out_dir)
+        path = os.path.realpath(os.path.join(root, out))
+        if not self._inside(path, root) or path == root:
+            raise Forbidden(f"'out' fuera de la carpeta de salida: {out!r}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def _in_path(self, key: str, value):
+        """Ruta de entrada del cliente → ruta real dentro de las raíces permitidas."""
+        if value is None:
+            return None
+        if not isinstance(value, str) or not value:
+            raise BadRequest(f"'{key}' debe ser una ruta")
+        path = os.path.realpath(os.path.join(self.roots[0], value))
+        if path not in self._own and not any(self._inside(path, r) for r in self.roots):
+            raise Forbidden(f"'{key}' fuera de las carpetas permitidas: {value!r}")
+        return path
+
+    def _check_headers(self, method: str, headers: dict):
+        if not self.socket_path:
+            host = headers.get("host", "")
+            if urlsplit("//" + host).hostname not in LOCAL_HOSTS + (self.host,):
+                raise Forbidden(f"Host no permitido: {host!r}")
+        origin = headers.get("origin")
+        if origin is not None:
+            u = urlsplit(origin)
+            if u.hostname not in LOCAL_HOSTS or (not self.socket_path and u.port != self.port):
+                raise Forbidden(f"Origin no permitido: {origin!r}")
+        if method == "POST" and \
+                headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+            raise BadRequest("Content-Type debe ser application/json")
+
+    # ----------------------------
+    # Trabajos
+    # ----------------------------
+    def _build(self, job: ServerJob) -> RenderJob:
+        """Spec JSON → RenderJob con el plan de la sesión (corre en el hilo del render)."""
+        spec = job.spec
+        lib = self.session.library(self._in_path("presets", spec.get("presets", self.default_presets)),
+                                   self._in_path("effects", spec.get("effects", self.default_effects)))
+        try:
+            seed = int(spec.get("seed", DEFAULT_SEED))
+        except (TypeError, ValueError):
+            raise BadRequest(f"Semilla inválida: {spec.get('seed')!r}")
+        try:
+            notes = self.session.notes(self._midi_source(spec))
+            if not notes:
+                raise ValueError("El MIDI no tiene notas")
+            if spec.get("instruments"):
+                # como render_multi: effects.yml tal cual
+                plan = self.session.plan(notes, spec["instruments"], lib.effects or {}, seed=seed,
+                                         presets=lib, strips=False)
+            else:
+                plan = self.session.plan(notes, (spec.get("synth", "ks"), spec.get("preset")), seed=seed,
+                                         add_reverb=not spec.get("no_reverb"), presets=lib, strips=False)
+        except ValueError as e:
+            raise BadRequest(str(e))
+        return RenderJob(plan.jobs, job.out, plan.graph, sr=self.session.sr, bits=spec.get("bits"),
+                         overview=bool(spec.get("overview", False)), presets=plan.presets,
+                         sample_dir=self._in_path("sample_dir", spec.get("sample_dir", self.sample_dir)),
+                         workers=self.workers,
+                         label=str(job.id), id=job.id)
+
+    def _run(self, job: ServerJob):
+        t0 = time.perf_counter()
+
+        def emit(kind, **data):
+            if kind == "stage":
+                job.stage = data["stage"]
+            elif kind == "progress":
+                job.progress[data["track"] if data["stage"] == "synth" else data["stage"]] = \
+                    [data["done"], data["total"]]
+
+        try:
+            job.render = self._build(job)
+            if job.state == "cancelled":      # DELETE mientras se armaba
+                raise Cancelled()
+            run_job(job.render, emit)
+            job.state = "done"
+        except Cancelled:
+            job.state = "cancelled"
+        except Exception as e:
+            job.state, job.error = "error", f"{type(e).__name__}: {e}"
+        finally:
+            job.seconds = time.perf_counter() - t0
+            job.render = None
+        self._count(f"jobs_{job.state}")
+        print(f"[INFO] Trabajo #{job.id}: {job.state} en {job.seconds * 1000:.0f} ms")
+
+    async def _consume(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.state != "queued":
+                    continue
+                job.state = "running"
+                await self._loop.run_in_executor(self._threads, self._run, job)
+            finally:
+                self._queue.task_done()
+                self._forget_old()
+
+    def _forget_old(self):
+        done = [j for j in self.jobs.values() if j.state in FINISHED]
+        for j in done[:max(0, len(done) - KEEP_FINISHED)]:
+            self._forget(j)
+
+    def _forget(self, job: ServerJob):
+        self.jobs.pop(job.id, None)
+        if job.owned and job.out and os.path.exists(job.out):
+            os.remove(job.out)
+
+    def _count(self, key: str):
+        with self._lock:        # hilos de render y loop de asyncio
+            self._stats[key] += 1
+
+    def _counters(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def submit(self, spec: dict) -> ServerJob:
+        if not isinstance(spec, dict):
+            raise BadRequest("El cuerpo debe ser un objeto JSON")
+        if self._queue.full():
+            raise OverflowError("Cola llena")
+        for key in ("midi", "presets", "effects", "sample_dir"):
+            if key in spec:
+                self._in_path(key, spec[key])
+        out = self._out_path(spec["out"]) if spec.get("out") else None
+        job = ServerJob(next(self._ids), spec)
+        job.out = out
+        if not job.out:
+            job.out, job.owned = os.path.join(self.out_dir, f"job{job.id}.wav"), True
+        self.jobs[job.id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def cancel(self, job: ServerJob):
+        if job.state in FINISHED:
+            self._forget(job)
+            return
+        if job.state == "queued":
+            job.state = "cancelled"
+            self._count("jobs_cancelled")
+        elif job.render is not None:
+            job.render.cancel()
+        else:
+            job.state = "cancelled"      # se está armando: _run lo corta
+
+    def status(self) -> dict:
+        states = defaultdict(int)
+        for j in self.jobs.values():
+            states[j.state] += 1
+        return {"pid": os.getpid(), "workers": self.workers, "max_jobs": self.max_jobs,
+                "queued": self._queue.qsize() if self._queue else 0, "jobs": dict(states),
+                "caches": self.session.cache_info(),
+                "counters": dict(self.session.counters(), **self._counters())}
+
+    # ----------------------------
+    # HTTP
+    # ----------------------------
+    async def _route(self, method: str, path: str, body: bytes):
+        parts = [p for p in path.split("/") if p]
+        if parts == ["status"] and method == "GET":
+            return 200, self.status()
+        if parts == ["jobs"]:
+            if method == "GET":
+                return 200, [j.to_dict() for j in self.jobs.values()]
+            if method == "POST":
+                try:
+                    spec = json.loads(body or b"{}")
+                except ValueError as e:
+                    raise BadRequest(f"JSON inválido: {e}")
+                try:
+                    job = self.submit(spec)
+                except OverflowError:
+                    return 503, {"error": "Cola llena, reintentar más tarde"}
+                return 202, {"id": job.id}
+            return 405, {"error": "Método no permitido"}
+        if len(parts) in (2, 3) and parts[0] == "jobs" and parts[1].isdigit():
+            job = self.jobs.get(int(parts[1]))
+            if job is None:
+                return 404, {"error": f"No existe el trabajo {parts[1]}"}
+            if len(parts) == 3:
+                if parts[2] != "result" or method != "GET":
+                    return 404, {"error": "Ruta desconocida"}
+                if job.state != "done":
+                    return 409, job.to_dict()
+                with open(job.out, "rb") as f:
+                    return 200, f.read()
+            if method == "GET":
+                return 200, job.to_dict()
+            if method == "DELETE":
+                self.cancel(job)
+                return 200, job.to_dict()
+            return 405, {"error": "Método no permitido"}
+        return 404, {"error": "Ruta desconocida"}
+
+    async def _handle(self, reader, writer):
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            method, target = line.decode("latin-1").split()[:2]
+            headers = {}
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = h.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+            n = int(headers.get("content-length", 0))
+            if n > MAX_BODY:
+                status, payload = 413, {"error": "Cuerpo demasiado grande"}
+            else:
+                body = await reader.readexactly(n) if n else b""
+                try:
+                    self._check_headers(method.upper(), headers)
+                    status, payload = await self._route(method.upper(), urlsplit(target).path, body)
+                except Forbidden as e:
+                    status, payload = 403, {"error": str(e)}
+                except BadRequest as e:
+                    status, payload = 400, {"error": str(e)}
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, payload = 400, {"error": f"Pedido inválido: {e}"}
+        except Exception as e:          # p.ej. OSError leyendo el resultado: 500, no una conexión cortada
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        if isinstance(payload, bytes):
+            ctype = "audio/flac" if payload[:4] == b"fLaC" else "audio/wav"
+        else:
+            payload, ctype = json.dumps(payload).encode(), "application/json"
+        reason = http.client.responses.get(status, "")
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: {ctype}\r\n"
+                     f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    # ----------------------------
+    # Ciclo de vida
+    # ----------------------------
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        await self._loop.run_in_executor(None, self.warm)
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+            self.address = self.socket_path
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+            self.address = f"http://{self.host}:{self.port}"
+        self._consumers = [asyncio.create_task(self._consume()) for _ in range(self.max_jobs)]
+        print(f"[OK] tpaudio.server escuchando en {self.address} "
+              f"({self.workers} procesos, {self.max_jobs} renders a la vez)")
+        self._ready.set()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self._close()
+
+    async def _close(self):
+        for job in self.jobs.values():
+            if job.render is not None:
+                job.render.cancel()
+        for t in self._consumers:
+            t.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def start_background(self, timeout: float = 30.0) -> "RenderServer":
+        """Corre el server en un hilo propio (tests, GUI); vuelve cuando ya escucha."""
+        def run():
+            asyncio.run(self.serve_forever())
+        self._thread = threading.Thread(target=run, name="tpaudio.server", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise RuntimeError("El server no arrancó a tiempo")
+        return self
+
+    def stop(self, timeout: float = 10.0):
+        def close():
+            self._server.close()
+            for t in self._consumers:
+                t.cancel()
+        if self._loop is not None and self._server is not None:
+            try:
+                self._loop.call_soon_threadsafe(close)
+            except RuntimeError:        # el loop ya terminó
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._threads.shutdown(wait=False, cancel_futures=True)
+
+
+# ----------------------------
+# Cliente
+# ----------------------------
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float = 60.0):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class Client:
+    """Cliente mínimo: Client("http://127.0.0.1:8765") o Client("/tmp/tpaudio.sock")."""
+
+    def __init__(self, address: str = f"http://127.0.0.1:{DEFAULT_PORT}", timeout: float = 60.0):
+        self.address, self.timeout = address, timeout
+
+    def _conn(self):
+        if self.address.startswith("http"):
+            u = urlsplit(self.address)
+            return http.client.HTTPConnection(u.hostname, u.port, timeout=self.timeout)
+        return _UnixHTTPConnection(self.address, self.timeout)
+
+    def request(self, method: str, path: str, payload=None):
+        """(status, dict | bytes)."""
+        conn = self._conn()
+        try:
+            body = None if payload is None else json.dumps(payload).encode()
+            conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            r = conn.getresponse()
+            data = r.read()
+            if r.getheader("Content-Type") == "application/json":
+                data = json.loads(data)
+            return r.status, data
+        finally:
+            conn.close()
+
+    def submit(self, **spec) -> int:
+        status, data = self.request("POST", "/jobs", spec)
+        if status != 202:
+            raise RuntimeError(f"[{status}] {data.get('error')}")
+        return data["id"]
+
+    def job(self, job_id: int) -> dict:
+        return self.request("GET", f"/jobs/{job_id}")[1]
+
+    def wait(self, job_id: int, timeout: float = 60.0, poll_s: float = 0.02) -> dict:
+        t_end = time.perf_counter() + timeout
+        while True:
+            st = self.job(job_id)
+            if st.get("state") in FINISHED or time.perf_counter() > t_end:
+                return st
+            time.sleep(poll_s)
+
+    def result(self, job_id: int) -> bytes:
+        status, data = self.request("GET", f"/jobs/{job_id}/result")
+        if status != 200:
+            raise RuntimeError(f"[{status}] trabajo {job_id}: {data.get('state') or data.get('error')}")
+        return data
+
+    def cancel(self, job_id: int) -> dict:
+        return self.request("DELETE", f"/jobs/{job_id}")[1]
+
+    def status(self) -> dict:
+        return self.request("GET", "/status")[1]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Daemon de render de tpaudio (API HTTP local).")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--socket", default=None, help="Escuchar en un socket Unix en lugar de TCP")
+    ap.add_argument("--jobs", type=int, default=None, help="Procesos del pool (por defecto, uno por núcleo)")
+    ap.add_argument("--max-jobs", type=int, default=2, help="Renders simultáneos")
+    ap.add_argument("--max-queue", type=int, default=32, help="Trabajos en espera antes de responder 503")
+    ap.add_argument("--out-dir", default=None, help="Carpeta para renders sin 'out' (por defecto, temporal)")
+    ap.add_argument("--preset-instruments", default=DEFAULT_PRESET_INSTR)
+    ap.add_argument("--preset-effects", default=DEFAULT_PRESET_FX)
+    ap.add_argument("--sample-dir", default=None, help="Banco de samples a precargar")
+    ap.add_argument("--root", action="append", default=None,
+                    help="Carpeta de la que los clientes pueden leer MIDI/presets/samples "
+                         "(repetible; por defecto, la actual)")
+    args = ap.parse_args()
+    server = RenderServer(args.host, args.port, args.socket, workers=args.jobs, max_jobs=args.max_jobs,
+                          max_queue=args.max_queue, out_dir=args.out_dir, presets=args.preset_instruments,
+                          effects=args.preset_effects, sample_dir=args.sample_dir, roots=args.root)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
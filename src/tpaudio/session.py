@@ -0,0 +1,278 @@
+"""
+Sesión de render reutilizable.
+
+RenderSession es el pipeline MIDI → mezcla que comparten main, render_multi, la
+GUI y el daemon (server.py). Guarda entre renders lo que no hace falta volver a
+armar: presets compilados (por ruta y mtime), MIDIs parseados y, a través de
+core/parallel.py, el pool de procesos con sus samples y su caché de notas.
+
+    s = RenderSession("presets/instruments.yml", "presets/effects.yml")
+    y = s.render("tema.mid", ["piano:sample:0,1", "bass:ks:2"])
+    y = s.render("tema.mid", ("ks", "nylon"), fx={"master": [{"type": "reverb"}]})
+
+'mapping' (qué motor suena en cada pista):
+  - "ks" o ("ks", preset): el mismo motor en cada pista MIDI
+  - ["nombre:tipo:tracks", ...]: como render_multi --inst (preset = nombre)
+  - {pista: (tipo, preset)}: motor por pista (GUI)
+'fx': None (effects.yml de la sesión o FALLBACK_FX), un dict con el formato de
+effects.yml o un FxGraph ya armado.
+
+Los errores de la petición (motor desconocido, mapping mal escrito, MIDI sin
+notas) son ValueError; cada punto de entrada los presenta a su manera.
+"""
+import io
+import itertools
+import os
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Optional
+import numpy as np
+
+from .constants import PEAK_DBFS, SR
+from .core.mixer import peak_gain
+from .core.parallel import TrackJob, note_cache_info, render_tracks, shutdown_pool
+from .core.profiler import get_profiler
+from .core.rng import DEFAULT_SEED
+from .effects.graph import FxGraph, compile_fx_graph
+from .presets import PresetLibrary, load_compiled_presets
+from .registry import SYNTHS
+
+# Grafo usado si no hay effects.yml: la reverb final de siempre
+FALLBACK_FX = {"master": [{"type": "reverb", "mix": 0.15}]}
+
+
+def parse_track_list(s: str) -> list:
+    """"0,2,4-6" → [0, 2, 4, 5, 6]."""
+    out = []
+    if not s:
+        return out
+    for part in s.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            a, b = part.split("-", 1)
+            out.extend(range(int(a), int(b) + 1))
+        else:
+            out.append(int(part))
+    return sorted(set(out))
+
+
+def parse_bits(s: str):
+    """--bits de los CLI: "16" | "24" → int, "float" tal cual (ver audio_io.SUBTYPES)."""
+    return s if s == "float" else int(s)
+
+
+BITS_CHOICES = [16, 24, "float"]
+
+
+def export_stems(stems_dir: str, stems: dict, sr: int, bits, out: str, multichannel: bool = False) -> list:
+    """Stems post-inserts del mismo render (formato según la extensión de la mezcla 'out')."""
+    from .core.audio_io import write_stems      # trae soundfile: sólo si se usa
+    ext = os.path.splitext(out)[1] or ".wav"
+    paths = write_stems(stems_dir, stems, sr, bits=bits, ext=ext, multichannel=multichannel)
+    if multichannel:
+        print(f"[OK] Stems ({len(stems)} canales: {', '.join(map(str, stems))}) → {paths[0]}")
+    else:
+        print(f"[OK] Stems ({len(paths)}) → {stems_dir}")
+    return paths
+
+
+@dataclass
+class RenderPlan:
+    """Lo que render() ejecuta: una TrackJob por pista/instrumento y el grafo de efectos."""
+    jobs: list
+    graph: FxGraph
+    presets: PresetLibrary
+
+
+class RenderSession:
+    def __init__(self, instruments: str = None, effects: str = None, sample_dir: str = None,
+                 sr: int = SR, workers: int = None, presets: PresetLibrary = None, verbose: bool = False):
+        # 'presets': una PresetLibrary ya cargada (se usa tal cual, sin mirar rutas)
+        self.instruments, self.effects = instruments, effects
+        self.sample_dir = sample_dir
+        self.sr = sr
+        self.workers = workers
+        self.verbose = verbose
+        self._fixed = presets
+        self._presets = {}        # (instrumentos, efectos) → (marcas de tiempo, PresetLibrary)
+        self._midi = {}           # ruta → (mtime, notas)
+        self._ns = {}             # id(PresetLibrary cacheada) → espacio de nombres de la caché de notas
+        self._gen = itertools.count(1)
+        self.stats = defaultdict(int)
+        self._lock = threading.Lock()
+
+    # ----------------------------
+    # Cachés
+    # ----------------------------
+    def _count(self, key: str):
+        with self._lock:        # render() y job() corren en varios hilos (server)
+            self.stats[key] += 1
+
+    def counters(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    def library(self, instruments: str = None, effects: str = None) -> PresetLibrary:
+        """Presets compilados; se recompilan sólo si cambió alguno de los YAML."""
+        if self._fixed is not None and instruments is None and effects is None:
+            return self._fixed
+        instruments = instruments or self.instruments
+        effects = effects or self.effects
+        key = (instruments, effects)
+        stamp = (self._mtime(instruments), self._mtime(effects))
+        with self._lock:
+            hit = self._presets.get(key)
+        if hit is not None and hit[0] == stamp:
+            self._count("presets_hits")
+            return hit[1]
+        self._count("presets_misses")
+        lib = load_compiled_presets(instruments, effects if stamp[1] else None, sr=self.sr)
+        with self._lock:
+            if hit is not None:
+                self._ns.pop(id(hit[1]), None)
+            self._presets[key] = (stamp, lib)
+            self._ns[id(lib)] = f"{lib.source}#{next(self._gen)}"
+        return lib
+
+    def notes(self, midi, prof=None) -> list:
+        """Notas (pista, inicio, duración, pitch, vel) de una ruta (cacheada por mtime),
+        bytes, un archivo abierto o una lista de notas ya cargada."""
+        from .midi.loader import load_notes
+        if isinstance(midi, list):
+            return midi
+        with get_profiler(prof).span("midi_parse"):
+            if isinstance(midi, (bytes, bytearray)):
+                return load_notes(io.BytesIO(midi))
+            if hasattr(midi, "read"):
+                return load_notes(midi)
+            mtime = self._mtime(midi)
+            if mtime is None:
+                raise ValueError(f"No existe el MIDI: {midi}")
+            with self._lock:
+                hit = self._midi.get(midi)
+            if hit is not None and hit[0] == mtime:
+                self._count("midi_hits")
+                return hit[1]
+            self._count("midi_misses")
+            notes = load_notes(midi)
+            with self._lock:
+                self._midi[midi] = (mtime, notes)
+            return notes
+
+    def cache_info(self) -> dict:
+        return {"presets": len(self._presets) + (self._fixed is not None), "midi": len(self._midi),
+                "notes": note_cache_info()}
+
+    # ----------------------------
+    # Plan y render
+    # ----------------------------
+    @staticmethod
+    def _tracks(notes, mapping) -> list:
+        """mapping → [(clave, motor, preset, notas)]."""
+        if isinstance(mapping, str) or (isinstance(mapping, tuple) and len(mapping) == 2
+                                        and isinstance(mapping[0], str)):
+            synth, preset = (mapping, None) if isinstance(mapping, str) else mapping
+            by_track = defaultdict(list)
+            for n in notes:
+                by_track[n[0]].append(n)
+            return [(ti, synth, preset, tn) for ti, tn in by_track.items()]
+        if isinstance(mapping, dict):
+            out = []
+            for ti, (synth, preset) in mapping.items():
+                out.append((ti, synth, preset, [n for n in notes if n[0] == ti]))
+            return out
+        out = []
+        for decl in mapping:
+            try:
+                name, synth, track_s = decl.split(":")
+                ids = set(parse_track_list(track_s))
+            except ValueError:
+                raise ValueError(f"Instrumento inválido: {decl} (usar nombre:tipo:tracks)")
+            out.append((name, synth, name, [n for n in notes if n[0] in ids]))
+        return out
+
+    def plan(self, notes, mapping="ks", fx=None, seed: int = DEFAULT_SEED, add_reverb: bool = True,
+             presets: PresetLibrary = None, strips: bool = True) -> RenderPlan:
+        """strips=True: cada TrackJob lleva su strip (inserts y ganancia en el worker, como
+        espera render()); False para core/jobs.run_job, que aplica el grafo completo."""
+        lib = presets or self.library()
+        if isinstance(fx, FxGraph):
+            graph = fx
+        else:
+            fx = (lib.effects or FALLBACK_FX) if fx is None else fx
+            graph = compile_fx_graph(fx, exclude=() if add_reverb else ("reverb",))
+        # las notas cacheadas en los workers dependen de la PresetLibrary (una versión por YAML)
+        ns = self._ns.get(id(lib)) or f"{lib.source}@{id(lib)}"
+        jobs = []
+        for key, synth, preset, tnotes in self._tracks(notes, mapping):
+            if synth not in SYNTHS:
+                raise ValueError(f"Sintetizador desconocido: {synth} (disponibles: {', '.join(SYNTHS.names())})")
+            if self.verbose:
+                print(f"[TRK {key}] → {synth} ({preset or 'default'}), notas={len(tnotes)}")
+            strip = graph.strip(key)
+            jobs.append(TrackJob(key, tnotes, synth, preset, strip=strip if strips else None,
+                                 note_cache=ns, seed=seed))
+        return RenderPlan(jobs, graph, lib)
+
+    def render(self, midi, mapping="ks", fx=None, *, seed: int = DEFAULT_SEED, add_reverb: bool = True,
+               normalize: Optional[float] = PEAK_DBFS, progress: Callable = None, cancelled: Callable = None,
+               prof=None, stems: dict = None) -> np.ndarray:
+        """MIDI (ver notes()) → mezcla en precision.dtype(). 'normalize' es el pico final
+        en dBFS (None: sin normalizar). progress/cancelled como en parallel.render_tracks.
+        Si se pasa el dict 'stems' se llena con {clave: pista post-inserts}: los mismos
+        buffers que alimentaron la mezcla, escalados por la ganancia de normalización."""
+        prof = get_profiler(prof)
+        notes = self.notes(midi, prof)
+        if not notes:
+            raise ValueError("El MIDI no tiene notas")
+        plan = self.plan(notes, mapping, fx, seed=seed, add_reverb=add_reverb)
+        with prof.span("synth"):
+            audio = render_tracks(plan.jobs, plan.presets, self.sample_dir, self.workers,
+                                  progress=progress, cancelled=cancelled, prof=prof, sr=self.sr)
+        if not audio:
+            raise ValueError("No se generó ninguna pista")
+        with prof.span("effects"):
+            y = plan.graph.process(audio, self.sr, inserts_done=True)
+            if stems is not None:
+                stems.update(audio)
+            if normalize is not None:
+                g = peak_gain(y, normalize)
+                y *= g
+                for s in (stems or {}).values():
+                    s *= g
+            return y
+
+    def job(self, midi, mapping="ks", out: str = "out.wav", fx=None, *, seed: int = DEFAULT_SEED,
+            add_reverb: bool = True, **kw):
+        """RenderJob para un RenderWorker (core/jobs.py): presets, MIDI y plan se cargan
+        en el hilo del worker. kw: otros campos de RenderJob (bits, overview, prof, label...)."""
+        from .core.jobs import RenderJob      # trae audio_io (soundfile): sólo si se usa
+        job = RenderJob(None, out, sr=self.sr, sample_dir=self.sample_dir, workers=self.workers, **kw)
+
+        def prepare():
+            plan = self.plan(self.notes(midi, job.prof), mapping, fx, seed=seed, add_reverb=add_reverb,
+                             strips=False)
+            job.graph, job.presets = plan.graph, plan.presets
+            return plan.jobs
+        job.tracks = prepare
+        return job
+
+    def close(self):
+        """Apaga el pool de procesos (y con él samples y notas cacheadas)."""
+        shutdown_pool()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -2,6 +2,8 @@ import numpy as np
 from .base import Synth
 from ..core.envelopes import adsr_env
 from ..core.dsp import midi2freq
+from ..core.precision import empty, sine, zeros
+from ..core.quality import partials
 
 class Additive(Synth):
     def __init__(self, partials=None, amps=None, adsr=None):
@@ -11,14 +13,30 @@ class Additive(Synth):
         self.amps = np.array(amps, dtype=np.float32)
         self.amps /= np.max(np.abs(self.amps)) + 1e-12
         self.adsr = adsr or dict(attack_ms=12, decay_ms=60, sustain=0.6, release_ms=120)
+        self._tables = {}
+
+    def freq_table(self, sr):
+        """Frecuencias de los parciales para MIDI 0–127 (128 × K); 0 si superan Nyquist."""
+        tab = self._tables.get(sr)
+        if tab is None:
+            f0 = midi2freq(np.arange(128))[:, None]
+            tab = f0 * self.partials[None, :]
+            tab[tab >= sr / 2.0] = 0.0
+            self._tables[sr] = tab = tab.astype(np.float32)
+        return tab
 
     def render_note(self, pitch, dur_s, velocity, sr):
         N = int(sr * dur_s)
-        t = np.arange(N, dtype=np.float32) / sr
-        f0 = midi2freq(pitch)
-        sig = np.zeros(N, dtype=np.float32)
-        for k, a in zip(self.partials, self.amps):
-            sig += a * np.sin(2*np.pi*(k*f0)*t, dtype=np.float32)
+        freqs = self.freq_table(sr)[int(np.clip(pitch, 0, 127))]
+        freqs = freqs[:partials(len(freqs))]
+        sig = zeros(N)
+        tmp = empty(N)
+        for fk, a in zip(freqs, self.amps):
+            if fk > 0:
+                sine(2*np.pi*float(fk)/sr, N, out=tmp)
+                tmp *= a
+                sig += tmp
         env = adsr_env(sr, dur_s, **self.adsr)
-        sig = sig[:len(env)] * env * (velocity / 127.0)
-        return sig.astype(np.float32)
+        sig *= env
+        sig *= velocity / 127.0
+        return sig
@@ -1,5 +1,33 @@
 # src/tpaudio/synth/adsr.py
 import numpy as np
+from ..core.precision import zeros
+from ..core.rng import make_rng
+
+def _hp(x, hp_hz, rate) -> np.ndarray:
+    """HP de 1er orden: y[n] = α·(y[n-1] + x[n] - x[n-1]), α = exp(-2π·hp_hz/rate)."""
+    if not (hp_hz and hp_hz > 0):
+        return x
+    from scipy.signal import lfilter
+    alpha = np.exp(-2.0 * np.pi * float(hp_hz) / rate)
+    return lfilter([alpha, -alpha], [1.0, -alpha], x).astype(x.dtype, copy=False)
+
+
+def _kick_multirate(y, fs, sr, n, click_ms, click_mix, hp_hz, rng) -> np.ndarray:
+    """Parciales a 'fs' → sr, con el mismo click y HP que el camino a tasa completa
+    (el HP es lineal: se aplica a los parciales a 'fs' y al click a sr)."""
+    from ..core.multirate import upsample
+    hp = lambda x, rate: _hp(x, hp_hz, rate)
+
+    y = upsample(hp(y, fs), fs, sr, n)
+    if click_ms > 0 and click_mix > 0:
+        L = min(n, max(1, int(sr * (click_ms / 1000.0))))
+        c = np.zeros_like(y)
+        c[:L] = rng.standard_normal(L)
+        c[:L] *= np.exp(-np.linspace(0, 1, L, dtype=y.dtype) * 6.0)
+        y *= 1.0 - float(click_mix)
+        y += float(click_mix) * hp(c, sr)
+    return y
+
 
 def render_kick_additive(
     dur_s: float = 0.35,
@@ -14,6 +42,8 @@ def render_kick_additive(
     click_mix: float = 0.06,
     hp_hz: float = 22.0,
     drive: float = 0.9,
+    rng=None,
+    rate: int = None,
 ) -> np.ndarray:
     """
     Kick aditivo con 3–5 parciales inarmónicos y caída de frecuencia común.
@@ -21,49 +51,51 @@ def render_kick_additive(
     - Cada parcial k: y_k(t) = a_k * exp(-t/tau_a_k) * sin( 2π * ∫ (r_k f(t)) dt + φ_k )
     - 'click' inicial opcional (ruido corto con decaimiento exponencial)
     - HP 1er orden + soft-clip suave + fades anti-click + normalizado
+    'rng' (Generator o semilla, ver core/rng.py) da las fases y el ruido del click.
+    'rate': tasa interna de los parciales y el HP (ver core/multirate.py); el click
+    y la saturación van a 'sr'.
     """
-    N = int(sr * dur_s)
-    t = np.arange(N, dtype=np.float32) / sr
+    rng = make_rng(rng)
+    fs = sr if rate is None or rate >= sr else int(rate)
+    N = int(fs * dur_s)
+    t = np.arange(N, dtype=np.float64) / fs
 
-    # Caída de pitch (exponencial)
+    # Caída de pitch (exponencial); la fase integrada se acumula en float64
     tau_f = max(1e-6, tau_freq_ms / 1000.0)
     f_inst = f_end_hz + (f_start_hz - f_end_hz) * np.exp(-t / tau_f)
+    phase1 = 2.0 * np.pi * np.cumsum(f_inst) / fs      # parcial de razón 1
 
-    # Suma aditiva
-    y = np.zeros_like(t, dtype=np.float32)
+    # Suma aditiva (cada parcial k tiene fase r_k·phase1)
+    y = zeros(N)
     for a, r, tau_a_ms in zip(amps, ratios, tau_amp_ms):
-        env = np.exp(-t / max(1e-6, (tau_a_ms / 1000.0))).astype(np.float32)
-        phase = 2.0 * np.pi * np.cumsum(f_inst * float(r)) / sr
-        phi0 = np.random.rand() * 2.0 * np.pi
-        y += (a * env * np.sin(phase + phi0)).astype(np.float32)
+        env = np.exp(-t / max(1e-6, (tau_a_ms / 1000.0)))
+        phi0 = rng.random() * 2.0 * np.pi
+        y += a * env * np.sin(float(r) * phase1 + phi0)
 
-    # Click inicial (ruido con decaimiento rápido)
-    if click_ms > 0 and click_mix > 0:
-        L = max(1, int(sr * (click_ms / 1000.0)))
-        n = np.zeros_like(y, dtype=np.float32)
-        n[:L] = np.random.randn(L).astype(np.float32)
-        n[:L] *= np.exp(-np.linspace(0, 1, L, dtype=np.float32) * 6.0)
-        y = (1.0 - float(click_mix)) * y + float(click_mix) * n
+    if fs != sr:
+        # parciales (graves) a 'fs'; click y saturación a la tasa final
+        y = _kick_multirate(y, fs, sr, int(sr * dur_s), click_ms, click_mix, hp_hz, rng)
+    else:
+        # Click inicial (ruido con decaimiento rápido)
+        if click_ms > 0 and click_mix > 0:
+            L = min(N, max(1, int(sr * (click_ms / 1000.0))))
+            n = rng.standard_normal(L).astype(y.dtype)
+            n *= np.exp(-np.linspace(0, 1, L, dtype=y.dtype) * 6.0)
+            y *= 1.0 - float(click_mix)
+            y[:L] += float(click_mix) * n
 
-    # HP 1er orden (limpia DC/rumble)
-    if hp_hz and hp_hz > 0:
-        alpha = np.exp(-2.0 * np.pi * float(hp_hz) / sr)
-        yhp = np.zeros_like(y, dtype=np.float32)
-        xm1 = 0.0
-        ym1 = 0.0
-        for i, xi in enumerate(y):
-            yhp[i] = alpha * (ym1 + xi - xm1)
-            xm1, ym1 = xi, yhp[i]
-        y = yhp
+        # HP 1er orden (limpia DC/rumble)
+        y = _hp(y, hp_hz, sr)
 
     # Soft-clip suave
     if drive and drive > 0:
-        y = np.tanh(float(drive) * y).astype(np.float32)
+        y *= float(drive)
+        np.tanh(y, out=y)
 
     # Fades anti-click
     Lf = max(1, int(0.004 * sr))
     Lf = min(Lf, len(y))
-    fade = np.linspace(0, 1, Lf, dtype=np.float32)
+    fade = np.linspace(0, 1, Lf, dtype=y.dtype)
     y[:Lf] *= fade
     y[-Lf:] *= fade[::-1]
 
@@ -73,5 +105,5 @@ def render_kick_additive(
     # 🔥 BOOST: aumentar volumen final (post normalización)
     y /= (np.max(np.abs(y)) + 1e-9)
     y *= 1.5  # Aumenta 30% el nivel general (ajustá 1.2–1.5)
-    
-    return y.astype(np.float32)
+
+    return y
@@ -0,0 +1,13 @@
+import numpy as np
+from ..core.processor import NoteVoice
+
+
+class Synth:
+    """Interfaz mínima de un sintetizador por nota."""
+
+    def render_note(self, pitch: int, dur_s: float, velocity: int, sr: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def voice(self, pitch: int, dur_s: float, velocity: int) -> NoteVoice:
+        """La nota como fuente por bloques (protocolo Processor)."""
+        return NoteVoice(self.render_note, pitch, dur_s, velocity)
@@ -0,0 +1,50 @@
+"""
+Fábricas de los motores incluidos (ver registry.SYNTHS).
+
+Cada una recibe la PresetLibrary, el nombre de preset y (opcional) los samples
+cargados, y devuelve render_fn(pitch, dur, vel, sr[, rng]); los motores con
+aleatoriedad aceptan 'rng' (ver core/rng.py). El módulo de cada motor se
+importa dentro de su fábrica.
+"""
+
+
+def make_ks(presets, preset=None, samples=None):
+    ks = presets.ks_preset(preset)
+
+    def render_fn(pitch, dur, vel, sr, rng=None, _ks=ks):
+        return _ks.render(pitch + _ks.transpose, dur, vel, sr, rng=rng)
+    return render_fn
+
+
+def make_sample(presets, preset=None, samples=None):
+    from .sample_piano import render_note_sample
+    if samples is None:
+        raise ValueError("El motor 'sample' necesita los samples cargados (load_samples)")
+
+    def render_fn(pitch, dur, vel, sr, _s=samples):
+        return render_note_sample(_s, pitch, dur, vel, sr)
+    return render_fn
+
+
+def make_piano(presets, preset=None, samples=None):
+    from .piano_additive import render_note_piano_additive
+
+    def render_fn(pitch, dur, vel, sr, rng=None):
+        return render_note_piano_additive(pitch, dur, vel, sr, rng=rng)
+    return render_fn
+
+
+def make_modal(presets, preset=None, samples=None):
+    from .piano_modal import render_note_piano_modal
+
+    def render_fn(pitch, dur, vel, sr, rng=None):
+        return render_note_piano_modal(pitch, dur, vel, sr, rng=rng)
+    return render_fn
+
+
+def make_kick(presets, preset=None, samples=None):
+    return presets.kick(preset).render
+
+
+def make_additive(presets, preset=None, samples=None):
+    return presets.additive_preset(preset).render
@@ -1,62 +1,89 @@
 import numpy as np
+from ..constants import BLOCK
 from ..core.dsp import midi2freq
 from scipy.signal import lfilter
+from ..core.precision import as_audio, dtype, zeros
+from ..core.rng import make_rng
+from ..core.silence import threshold
+
+# Filtros de cuerpo (b, a) por nombre de preset
+KS_BODIES = {
+    "nylon": ([0.005, 0.0, -0.004, 0.0, 0.003], [1.0, -0.95, 0.90, -0.70, 0.50]),
+    "steel": ([0.006, -0.002, 0.0015], [1.0, -0.92, 0.85]),
+    "bass": ([0.004, 0.0035, 0.002], [1.0, -0.96, 0.94]),
+    "banjo": ([0.01, -0.004, 0.002], [1.0, -0.75, 0.60]),
+}
+
+
+def ks_loop_coeffs(f0: float, sr: int, rho: float = 0.998, stiffness: float = 0.0):
+    """
+    Coeficientes del lazo: y[m] = g·(y[m-L] + c1·y[m-1] + c2·y[m-2]).
+    Combina el delay fraccional (frac) con el filtro de dispersión (1 + a z^-1)/(1 - a z^-1).
+    Devuelve (L, c1, c2, g).
+    """
+    N_exact = sr / f0
+    N_int = int(np.floor(N_exact))
+    frac = N_exact - N_int
+    a_stiff = float(np.clip(stiffness, 0.0, 0.02))  # valores típicos: 0.001–0.01
+    c1 = (1 + a_stiff) * (1 - frac) - a_stiff
+    c2 = (1 + a_stiff) * frac
+    return max(2, N_int), c1, c2, 0.5 * rho
 
 
 def _ks_basic(f0: float, dur_s: float, sr: int,
               rho: float = 0.998,
               pick_pos: float = 0.20,
               noise_mix: float = 0.02,
-              stiffness: float = 0.0) -> np.ndarray:
+              stiffness: float = 0.0,
+              loop=None,
+              rng=None) -> np.ndarray:
     """
     Karplus–Strong extendido:
       - Delay fraccional (afinación precisa)
       - Filtro de pérdida (rho)
       - Filtro de dispersión física (stiffness)
       - Excitación por pick_position + forma triangular determinista
+    'loop' = (L, c1, c2, g) precalculado (ver presets.KSTable); si no, se calcula.
+    'rng' (Generator o semilla) da el ruido de la excitación.
+    El lazo corta (y la nota sale más corta) cuando toda la línea queda bajo el
+    umbral de core/silence.py: el lazo sólo decae, ya no vuelve a sonar.
     """
     if f0 <= 0:
-        return np.zeros(int(sr * dur_s), dtype=np.float32)
+        return zeros(int(sr * dur_s))
 
-    # Longitud fraccional del delay
-    N_exact = sr / f0
-    N_int = int(np.floor(N_exact))
-    frac = N_exact - N_int
-    L = max(2, N_int)
+    L, c1, c2, g = loop if loop is not None else ks_loop_coeffs(f0, sr, rho, stiffness)
     Nsamp = int(sr * dur_s)
 
     # Excitación determinista + pick position
-    buf = np.linspace(1.0, -1.0, L, dtype=np.float32)
+    buf = np.linspace(1.0, -1.0, L, dtype=dtype())
     M = max(1, min(L - 1, int(round(pick_pos * L))))
     buf = buf - np.roll(buf, M)
 
     if noise_mix > 0:
-        buf += noise_mix * np.random.randn(L).astype(np.float32)
+        buf += noise_mix * make_rng(rng).standard_normal(L).astype(buf.dtype)
     buf /= (np.max(np.abs(buf)) + 1e-9)
 
-    # Coeficiente del filtro de rigidez (stiffness)
-    a_stiff = float(np.clip(stiffness, 0.0, 0.02))  # valores típicos: 0.001–0.01
-
-    # Bucle KS extendido con interpolación fraccional + dispersión
-    y = np.zeros(Nsamp, dtype=np.float32)
+    # Bucle KS extendido: interpolación fraccional + dispersión + promedio y pérdida
+    y = zeros(Nsamp)
+    thr = threshold()      # relativo al pico de la excitación (1.0)
     i = 0
-    for n in range(Nsamp):
-        y[n] = buf[i]
-
-        # Interpolación fraccional
-        i_prev = (i - 1) % L
-        i_prev2 = (i - 2) % L
-        frac_sample = (1 - frac) * buf[i_prev] + frac * buf[i_prev2]
+    for n0 in range(0, Nsamp, BLOCK):
+        for n in range(n0, min(n0 + BLOCK, Nsamp)):
+            y[n] = buf[i]
+            buf[i] = g * (buf[i] + c1 * buf[(i - 1) % L] + c2 * buf[(i - 2) % L])
+            i = (i + 1) % L
+        if thr > 0.0 and np.max(np.abs(buf)) < thr:
+            return y[:n + 1]
 
-        # Filtro dispersivo (1 + a z^-1) / (1 - a z^-1)
-        disp_sample = (1 + a_stiff) * frac_sample - a_stiff * buf[i_prev]
-
-        # Promedio + pérdida + dispersión
-        buf[i] = rho * 0.5 * (buf[i] + disp_sample)
+    return y
 
-        i = (i + 1) % L
 
-    return y
+def _smooth(y: np.ndarray, a: float) -> np.ndarray:
+    """Pasabajos de un polo: y[n] = (1 - a)·x[n] + a·y[n-1], con y[0] = x[0]."""
+    if len(y) == 0:
+        return np.copy(y)
+    y_lp, _ = lfilter([1.0 - a], [1.0, -a], y, zi=[a * y[0]])
+    return y_lp.astype(y.dtype, copy=False)
 
 
 def render_note_ks(pitch: int, dur_s: float, velocity: int,
@@ -66,54 +93,60 @@ def render_note_ks(pitch: int, dur_s: float, velocity: int,
                    pick_pos: float = 0.20,
                    noise_mix: float = 0.02,
                    stiffness: float = 0.0,
-                   preset_name: str = None) -> np.ndarray:
+                   preset_name: str = None,
+                   loop=None,
+                   rng=None,
+                   rate: int = None) -> np.ndarray:
     """
     Karplus–Strong extendido con dispersión (stiffness) y afinación fraccional.
+    'loop' permite pasar los coeficientes del lazo ya calculados (tabla por pitch).
+    'rate': tasa interna del lazo y del suavizado (ver core/multirate.py); 'loop'
+    debe corresponder a esa tasa. El cuerpo y la saturación van a 'sr'.
     """
     f0 = midi2freq(pitch)
-    y = _ks_basic(f0, dur_s, sr, rho=rho,
+    fs = sr if rate is None or rate >= sr else int(rate)
+    y = _ks_basic(f0, dur_s, fs, rho=rho,
                   pick_pos=pick_pos,
                   noise_mix=noise_mix,
-                  stiffness=stiffness)
+                  stiffness=stiffness,
+                  loop=loop,
+                  rng=rng)
+    if len(y) == 0:             # nota de duración nula (algunos MIDI las traen)
+        return y
 
     # Escala por velocidad MIDI
     y *= (velocity / 127.0)
 
-    # Filtro de cuerpo según preset
-    if preset_name == "nylon":
-        b = [0.005, 0.0, -0.004, 0.0, 0.003]
-        a = [1.0, -0.95, 0.90, -0.70, 0.50]
-        y = lfilter(b, a, y).astype(np.float32)
-    elif preset_name == "steel":
-        b = [0.006, -0.002, 0.0015]
-        a = [1.0, -0.92, 0.85]
-        y = lfilter(b, a, y).astype(np.float32)
-    elif preset_name == "bass":
-        b = [0.004, 0.0035, 0.002]
-        a = [1.0, -0.96, 0.94]
-        y = lfilter(b, a, y).astype(np.float32)
-    elif preset_name == "banjo":
-        b = [0.01, -0.004, 0.002]
-        a = [1.0, -0.75, 0.60]
-        y = lfilter(b, a, y).astype(np.float32)
-
-    # Suavizado global (un polo)
-    if S is not None:
-        y_lp = np.copy(y)
-        a = float(np.clip(S, 0.0, 0.999))
-        for n in range(1, len(y)):
-            y_lp[n] = (1.0 - a) * y[n] + a * y_lp[n - 1]
-        y = y_lp
+    if fs != sr:
+        # cuerpo y suavizado son lineales (conmutan): el suavizado a 'fs' con el polo
+        # trasladado (a^(sr/fs), mismo corte en Hz) y el cuerpo, diseñado para sr, después
+        from ..core.multirate import upsample
+        if S is not None:
+            y = _smooth(y, float(np.clip(S, 0.0, 0.999)) ** (sr / fs))
+        y = upsample(y, fs, sr, int(sr * dur_s))
+        if preset_name in KS_BODIES:
+            b, a = KS_BODIES[preset_name]
+            y = as_audio(lfilter(b, a, y))
+    else:
+        # Filtro de cuerpo según preset
+        if preset_name in KS_BODIES:
+            b, a = KS_BODIES[preset_name]
+            y = as_audio(lfilter(b, a, y))
+
+        # Suavizado global (un polo)
+        if S is not None:
+            y = _smooth(y, float(np.clip(S, 0.0, 0.999)))
 
     # Fades anti-click
     Lf = max(1, int(0.004 * sr))
     Lf = min(Lf, len(y))
-    win = np.linspace(0.0, 1.0, Lf, dtype=np.float32)
+    win = np.linspace(0.0, 1.0, Lf, dtype=y.dtype)
     y[:Lf] *= win
     y[-Lf:] *= win[::-1]
 
     # Compresión suave + normalización
-    y = np.tanh(1.2 * y)
+    y *= 1.2
+    np.tanh(y, out=y)
     y /= np.max(np.abs(y)) + 1e-9
 
-    return y.astype(np.float32)
+    return y
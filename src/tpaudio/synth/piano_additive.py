@@ -1,7 +1,22 @@
 import numpy as np
+from functools import lru_cache
 from typing import Optional, Dict, Any
 from ..core.dsp import midi2freq
 from ..core.envelopes import adsr_env
+from ..core.precision import dtype, empty, sine, zeros
+from ..core.quality import partials
+from ..core.rng import make_rng
+
+
+@lru_cache(maxsize=32)
+def partial_table(n_partials: int, B: float, sr: int) -> np.ndarray:
+    """Parciales inarmónicos fk = k·f0·sqrt(1 + B·k²) para MIDI 0–127 (128 × n_partials).
+    Los que superan Nyquist quedan en 0 (y, como crecen con k, cortan la serie)."""
+    k = np.arange(1, n_partials + 1, dtype=np.float64)
+    tab = midi2freq(np.arange(128))[:, None] * (k * np.sqrt(1.0 + B * k ** 2))[None, :]
+    tab[tab >= sr / 2.0] = 0.0
+    tab.flags.writeable = False
+    return tab
 
 def render_note_piano_additive(
     pitch: int,
@@ -14,31 +29,38 @@ def render_note_piano_additive(
     partial_decay_base: float = 0.85,
     noise_mix: float = 0.08,
     adsr: Optional[Dict[str, Any]] = None,
+    rng=None,
 ) -> np.ndarray:
-    f0 = midi2freq(pitch)
+    # rng: fases de los parciales y ruido de martillo (sin rng, la semilla fija de siempre)
+    freqs = partial_table(int(n_partials), float(B), int(sr))[int(np.clip(pitch, 0, 127))]
     N = int(sr * dur_s)
-    t = np.arange(N, dtype=np.float32) / sr
-    fnyq = sr / 2.0
-    rng = np.random.default_rng(12345)
+    if N == 0:                  # nota de duración nula
+        return zeros(0)
+    t = np.arange(N, dtype=dtype()) / sr
+    rng = make_rng(rng, default=12345)
     v_scale = float(velocity) / 127.0
     bright_boost = 0.5 + 0.5 * v_scale
-    y = np.zeros(N, dtype=np.float32)
-    for k in range(1, n_partials + 1):
-        fk = k * f0 * np.sqrt(1.0 + B * (k ** 2))
-        if fk >= fnyq:
+    y = zeros(N)
+    env, osc = empty(N), empty(N)
+    for k in range(1, partials(n_partials) + 1):
+        fk = freqs[k - 1]
+        if fk <= 0.0:
             break
         ak = 1.0 / (k ** amp_decay_exp)
         ak *= (1.0 + bright_boost * 0.15 * (k - 1) / max(1, n_partials - 1))
         tau = (0.6 * dur_s) * (partial_decay_base ** (k - 1)) + 1e-6
-        env = np.exp(-t / tau).astype(np.float32)
-        phase = 2.0 * np.pi * fk * t + 2.0 * np.pi * rng.random()
-        y += (ak * np.sin(phase, dtype=np.float32) * env).astype(np.float32)
+        np.multiply(t, -1.0 / tau, out=env)
+        np.exp(env, out=env)
+        sine(2.0 * np.pi * fk / sr, N, 2.0 * np.pi * rng.random(), out=osc)
+        osc *= env
+        osc *= ak
+        y += osc
     if noise_mix > 0.0:
-        Lh = max(1, int(0.02 * sr))
-        hammer = rng.standard_normal(Lh).astype(np.float32)
+        Lh = min(N, max(1, int(0.02 * sr)))
+        hammer = rng.standard_normal(Lh).astype(dtype())
         for i in range(1, Lh):
             hammer[i] = 0.6 * hammer[i] + 0.4 * hammer[i - 1]
-        hammer *= np.linspace(1.0, 0.0, Lh, dtype=np.float32)
+        hammer *= np.linspace(1.0, 0.0, Lh, dtype=dtype())
         y[:Lh] += noise_mix * hammer
     y *= v_scale
     if adsr is None:
@@ -48,9 +70,9 @@ def render_note_piano_additive(
     y *= env
     Lf = max(1, int(0.004 * sr))
     Lf = min(Lf, len(y))
-    fade = np.linspace(0, 1, Lf, dtype=np.float32)
+    fade = np.linspace(0, 1, Lf, dtype=dtype())
     y[:Lf] *= fade
     y[-Lf:] *= fade[::-1]
     y /= (np.max(np.abs(y)) + 1e-9)
-    return y.astype(np.float32)
+    return y
 
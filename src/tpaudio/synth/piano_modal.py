@@ -0,0 +1,142 @@
+"""
+Piano modal: banco de resonadores excitado por un martillo.
+
+Cada parcial inarmónico de render_note_piano_additive (una senoide que decae
+exponencialmente) es la respuesta al impulso de un resonador de dos polos. Acá
+se usa la forma compleja de un polo, y[n] = p·y[n-1] + x[n] con p = r·e^{jθ}
+(la parte imaginaria es la senoide amortiguada), para los K parciales a la vez:
+
+  - los polos y las potencias p^0..p^(B-1) (B = BLOCK) se calculan una vez por
+    tecla (modal_bank, con caché); ninguna nota vuelve a evaluar exp() o sin()
+  - la excitación (martillo de pocos ms) se resuelve con una suma acumulada
+  - después la salida de cada bloque es Im((a·z·p) @ P): un producto matriz-
+    vector de K × B, y el estado z avanza con una multiplicación por p^B
+
+Como el estado es sólo z (K complejos), el mismo banco sirve para render por
+bloques (ModalVoice en vivo).
+"""
+import numpy as np
+from functools import lru_cache
+from scipy.signal import lfilter
+from typing import Optional, Dict, Any
+from ..constants import BLOCK
+from ..core.envelopes import adsr_env
+from ..core.precision import dtype, zeros
+from ..core.quality import partials
+from ..core.rng import make_rng
+from .piano_additive import partial_table
+
+TAU_MIN_S = 0.002     # piso del decaimiento (mantiene acotado 1/p^n en la excitación)
+
+
+class ModalBank:
+    """Coeficientes de una tecla: polos, amplitudes y tabla de potencias (K × BLOCK)."""
+
+    def __init__(self, poles: np.ndarray, amps: np.ndarray, block: int = BLOCK):
+        self.poles = poles
+        self.amps = amps
+        self.powers = poles[:, None] ** np.arange(block)          # p^0 .. p^(B-1)
+        for a in (self.poles, self.amps, self.powers):
+            a.flags.writeable = False
+
+    def __len__(self):
+        return len(self.poles)
+
+    @property
+    def block(self) -> int:
+        return self.powers.shape[1]
+
+
+@lru_cache(maxsize=128)
+def modal_bank(pitch: int, sr: int, n_partials: int = 30, B: float = 3e-4, amp_decay_exp: float = 1.2,
+               partial_decay_base: float = 0.85, decay_s: float = 0.9) -> ModalBank:
+    """Banco de la tecla 'pitch': parciales de partial_table, amplitud 1/k^amp_decay_exp
+    y decaimiento τk = decay_s·partial_decay_base^(k-1)."""
+    freqs = partial_table(int(n_partials), float(B), int(sr))[int(np.clip(pitch, 0, 127))]
+    K = int(np.count_nonzero(freqs))           # los ceros (sobre Nyquist) cortan la serie
+    k = np.arange(1, K + 1, dtype=np.float64)
+    tau = np.maximum(decay_s * partial_decay_base ** (k - 1), TAU_MIN_S)
+    poles = np.exp(-1.0 / (tau * sr) + 2j * np.pi * freqs[:K] / sr)
+    return ModalBank(poles, 1.0 / k ** amp_decay_exp)
+
+
+def hammer(velocity: int, sr: int) -> np.ndarray:
+    """Golpe de martillo (área 1): exponencial de contacto más corto cuanto más fuerte
+    (más brillo). Sin ceros en el espectro, a diferencia de un pulso de ancho fijo."""
+    v = float(velocity) / 127.0
+    th = (0.25 + 0.75 * (1.0 - v)) * 1e-3 * sr
+    h = np.exp(-np.arange(max(1, int(6 * th))) / th)
+    return h / np.sum(h)
+
+
+class ModalResonator:
+    """Estado de un banco excitado: render(n) entrega las n muestras siguientes."""
+
+    def __init__(self, bank: ModalBank, excitation: np.ndarray, amps: np.ndarray = None):
+        self.bank = bank
+        self.amps = bank.amps if amps is None else amps
+        P = bank.powers
+        h = np.asarray(excitation, dtype=np.float64)[:bank.block]
+        # y_k[n] = Σ_{m≤n} h[m]·p^(n-m) = p^n · Σ_{m≤n} h[m]·p^-m   (n < len(h))
+        Y = P[:, :len(h)] * np.cumsum(h / P[:, :len(h)], axis=1)
+        self._head = (self.amps @ Y).imag
+        self.z = Y[:, -1]                 # y_k en la última muestra entregada
+
+    def render(self, n: int, out: np.ndarray = None) -> np.ndarray:
+        if out is None:
+            out = zeros(n)
+        i = 0
+        if len(self._head):
+            i = min(n, len(self._head))
+            out[:i] = self._head[:i]
+            self._head = self._head[i:]
+        B, P = self.bank.block, self.bank.powers
+        while i < n:
+            m = min(B, n - i)
+            zp = self.z * self.bank.poles                  # y_k[i+j] = z·p·p^j
+            out[i:i + m] = ((self.amps * zp) @ P[:, :m]).imag
+            self.z = zp * P[:, m - 1]
+            i += m
+        return out
+
+
+def render_note_piano_modal(
+    pitch: int,
+    dur_s: float,
+    velocity: int,
+    sr: int = 48000,
+    n_partials: int = 30,
+    B: float = 3e-4,
+    amp_decay_exp: float = 1.2,
+    partial_decay_base: float = 0.85,
+    decay_s: float = 0.9,
+    noise_mix: float = 0.08,
+    adsr: Optional[Dict[str, Any]] = None,
+    rng=None,
+) -> np.ndarray:
+    # Misma cadena que render_note_piano_additive (ruido de martillo, ADSR, fades,
+    # normalización); cambia la síntesis de los parciales. rng: ruido de martillo.
+    bank = modal_bank(int(pitch), int(sr), partials(int(n_partials)), float(B), float(amp_decay_exp),
+                      float(partial_decay_base), float(decay_s))
+    N = int(sr * dur_s)
+    v_scale = float(velocity) / 127.0
+    k = np.arange(len(bank), dtype=np.float64)
+    amps = bank.amps * (1.0 + (0.5 + 0.5 * v_scale) * 0.15 * k / max(1, n_partials - 1))
+    y = ModalResonator(bank, hammer(velocity, sr), amps).render(N)
+    if noise_mix > 0.0 and N:
+        Lh = min(N, max(1, int(0.02 * sr)))
+        x = make_rng(rng, default=12345).standard_normal(Lh)
+        noise, _ = lfilter([0.6], [1.0, -0.4], x, zi=[0.4 * x[0]])    # el mismo suavizado, sin lazo
+        noise *= np.linspace(1.0, 0.0, Lh)
+        y[:Lh] += noise_mix * noise
+    y *= v_scale
+    if adsr is None:
+        adsr = dict(attack_ms=2, decay_ms=900, sustain=0.0, release_ms=250)
+    env = adsr_env(sr, dur_s, **adsr)
+    y *= env[:len(y)]
+    Lf = min(max(1, int(0.004 * sr)), len(y))
+    fade = np.linspace(0, 1, Lf, dtype=dtype())
+    y[:Lf] *= fade
+    y[-Lf:] *= fade[::-1]
+    y /= (np.max(np.abs(y)) + 1e-9)
+    return y
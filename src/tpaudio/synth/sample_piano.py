@@ -4,6 +4,7 @@ import numpy as np
 import soundfile as sf
 from typing import Optional, Dict, Any
 from ..core.envelopes import adsr_env
+from ..core.precision import as_audio, dtype, zeros
 
 # Ruta por defecto a tus samples
 DEFAULT_SAMPLE_DIR = r"C:\Users\HP\Documents\ASSD\TP2\tp-audio-full-starter\samples_piano_1"
@@ -34,11 +35,12 @@ def _vel_tag(filename: str) -> str:
     return "M"
 
 def _resample_1d(y: np.ndarray, new_len: int) -> np.ndarray:
-    if new_len <= 0: return np.zeros(1, dtype=np.float32)
-    if len(y) == new_len: return y.astype(np.float32)
+    # Sin copia si no hay que estirar: el llamador no modifica el resultado in-place
+    if new_len <= 0: return zeros(1)
+    if len(y) == new_len: return as_audio(y)
     x_old = np.linspace(0.0, 1.0, num=len(y))
     x_new = np.linspace(0.0, 1.0, num=new_len)
-    return np.interp(x_new, x_old, y).astype(np.float32)
+    return as_audio(np.interp(x_new, x_old, y))
 
 def load_samples(folder: Optional[str] = None):
     if folder is None:
@@ -55,10 +57,10 @@ def load_samples(folder: Optional[str] = None):
         except Exception:
             continue
         vel = _vel_tag(fname)
-        data, sr = sf.read(path, dtype="float32")
+        data, sr = sf.read(path, dtype=dtype().name)
         if data.ndim > 1:
-            data = data.mean(axis=1)
-        samples.setdefault(midi, []).append((vel, data.astype(np.float32), int(sr)))
+            data = data.mean(axis=1, dtype=data.dtype)
+        samples.setdefault(midi, []).append((vel, data, int(sr)))
     if not samples:
         raise RuntimeError(f"No se encontraron .wav válidos en {folder}")
     print(f"[INFO] {len(samples)} notas cargadas desde {folder}")
@@ -79,7 +81,8 @@ def render_note_sample(
     else:
         chosen = next((tpl for tpl in layers if tpl[0] == "L"), layers[0])
     _, y, sr_samp = chosen
-    ratio = 2 ** ((pitch - base_pitch) / 12.0)
+    # transposición y cambio de tasa (sample a sr_samp → salida a sr_out) en un solo remuestreo
+    ratio = 2 ** ((pitch - base_pitch) / 12.0) * sr_samp / sr_out
     y = _resample_1d(y, max(1, int(len(y) / ratio)))
     y = y / (np.max(np.abs(y)) + 1e-9)
     N_out = int(dur_s * sr_out)
@@ -91,8 +94,8 @@ def render_note_sample(
     y *= env
     y *= float(velocity) / 127.0
     Lf = max(1, int(0.003 * sr_out))
-    fade = np.linspace(0.0, 1.0, Lf, dtype=np.float32)
+    fade = np.linspace(0.0, 1.0, Lf, dtype=y.dtype)
     y[:Lf] *= fade
     y[-Lf:] *= fade[::-1]
     y /= (np.max(np.abs(y)) + 1e-9)
-    return y.astype(np.float32)
+    return y
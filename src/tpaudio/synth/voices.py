@@ -0,0 +1,282 @@
+"""
+Voces por bloques para síntesis en vivo.
+
+A diferencia de render_note_* (que necesitan la duración de la nota), estas
+voces suenan hasta recibir note_off() y luego hacen su release. Implementan el
+protocolo de processor.py (son fuentes: ignoran la entrada).
+"""
+import numpy as np
+from scipy.signal import lfilter, lfiltic
+
+from ..core.dsp import midi2freq
+from ..core.processor import BlockProcessor
+from ..core.rng import make_rng
+from .karplus import KS_BODIES, ks_loop_coeffs
+
+
+def adsr_block(pos: int, n: int, sr: int, attack_ms=10, decay_ms=60, sustain=0.6) -> np.ndarray:
+    """Tramo attack/decay/sustain de la envolvente para las muestras [pos, pos+n)."""
+    A = sr * attack_ms / 1000.0
+    D = sr * decay_ms / 1000.0
+    t = np.arange(pos, pos + n, dtype=np.float64)
+    return np.interp(t, [0.0, A, A + D], [0.0, 1.0, sustain]).astype(np.float32)
+
+
+class LiveVoice(BlockProcessor):
+    """Base de voz en vivo: _render(n) genera la señal cruda y esta clase aplica el
+    release lineal (desde el nivel actual) a partir de note_off()."""
+
+    def __init__(self, pitch: int, velocity: int, release_ms: float = 80.0):
+        self.pitch = int(pitch)
+        self.velocity = int(velocity)
+        self.release_ms = float(release_ms)
+        self.pos = 0
+        self.level = 0.0          # pico del último bloque (para elegir qué voz descartar)
+        self._rel_left = None     # muestras de release restantes (None = nota sostenida)
+        self._rel_len = 1
+        self.killed = False
+
+    def reset(self, fs: int) -> None:
+        super().reset(fs)
+        self.pos = 0
+        self._rel_left = None
+
+    @property
+    def releasing(self) -> bool:
+        return self._rel_left is not None
+
+    @property
+    def done(self) -> bool:
+        return self._rel_left is not None and self._rel_left <= 0
+
+    def note_off(self, release_ms: float = None):
+        if self._rel_left is None:
+            ms = self.release_ms if release_ms is None else release_ms
+            self._rel_len = self._rel_left = max(1, int(self.fs * ms / 1000.0))
+
+    def kill(self, fade_ms: float = 5.0):
+        """Corte rápido (sin click) para liberar CPU o robar la voz."""
+        self.killed = True
+        n = max(1, int(self.fs * fade_ms / 1000.0))
+        if self._rel_left is None or self._rel_left > n:
+            self._rel_len = self._rel_left = n
+
+    def _render(self, n: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def process_block(self, x, out: np.ndarray) -> np.ndarray:
+        n = out.shape[0]
+        if self.done:
+            out[:] = 0.0
+            return out
+        out[:] = self._render(n)
+        self.pos += n
+        if self._rel_left is not None:
+            g0 = self._rel_left / self._rel_len
+            k = min(n, self._rel_left)
+            out[:k] *= np.linspace(g0, g0 - k / self._rel_len, k, endpoint=False, dtype=np.float32)
+            out[k:] = 0.0
+            self._rel_left -= k
+        self.level = float(np.max(np.abs(out))) if n else 0.0
+        return out
+
+
+class KSVoice(LiveVoice):
+    """
+    Karplus–Strong por bloques, misma cadena que render_note_ks.
+    El lazo y[m] = g·(y[m-L] + c1·y[m-1] + c2·y[m-2]) se evalúa en tramos de a
+    lo sumo L muestras: y[m-L] ya es conocido, y lo que queda es un IIR de orden 2
+    (lfilter). La normalización por pico se estima sobre los primeros 50 ms.
+    """
+
+    def __init__(self, pitch, velocity, rho=0.998, S=0.50, pick_pos=0.20, noise_mix=0.02,
+                 stiffness=0.0, preset_name=None, release_ms=80.0, rng=None, loop=None):
+        super().__init__(pitch, velocity, release_ms)
+        self.loop = loop   # (L, c1, c2, g) de la tabla del preset
+        self.rho, self.S, self.pick_pos = rho, S, pick_pos
+        self.noise_mix, self.stiffness, self.preset_name = noise_mix, stiffness, preset_name
+        self.rng = rng
+
+    def reset(self, fs: int) -> None:
+        super().reset(fs)
+        L, c1, c2, g = self.loop or ks_loop_coeffs(midi2freq(self.pitch), fs, self.rho, self.stiffness)
+        self._L, self._g = L, g
+        self._a2 = np.array([1.0, -g * c1, -g * c2])
+
+        # Excitación (como _ks_basic)
+        buf = np.linspace(1.0, -1.0, L, dtype=np.float32)
+        M = max(1, min(L - 1, int(round(self.pick_pos * L))))
+        buf = buf - np.roll(buf, M)
+        if self.noise_mix > 0:
+            buf += self.noise_mix * make_rng(self.rng).standard_normal(L).astype(np.float32)
+        buf /= (np.max(np.abs(buf)) + 1e-9)
+
+        # Las primeras L salidas son la excitación; el lazo sigue desde ahí
+        self._pending = buf.astype(np.float64)
+        self._hist = self._pending.copy()
+        self._zi = lfiltic([1.0], self._a2, [buf[-1], buf[-2] if L > 1 else 0.0])
+
+        body = KS_BODIES.get(self.preset_name)
+        self._body = body
+        self._zb = np.zeros(max(len(body[0]), len(body[1])) - 1) if body else None
+        self._s = float(np.clip(self.S, 0.0, 0.999)) if self.S is not None else None
+        self._zs = np.zeros(1)
+        self._fade = max(1, int(0.004 * fs))
+        self._vel = self.velocity / 127.0
+
+        # Estimación del pico: se renderizan 50 ms y se guardan para entregarlos primero
+        self._gain = 1.0
+        head = self._chain(max(int(0.05 * fs), 1), 0)
+        self._gain = 1.0 / (np.max(np.abs(head)) + 1e-9)
+        self._head = (head * self._gain).astype(np.float32)
+
+    def _loop(self, n: int) -> np.ndarray:
+        y = np.empty(n)
+        i = 0
+        if len(self._pending):
+            k = min(n, len(self._pending))
+            y[:k] = self._pending[:k]
+            self._pending = self._pending[k:]
+            i = k
+        L = self._L
+        while i < n:
+            k = min(n - i, L)
+            y[i:i + k], self._zi = lfilter([1.0], self._a2, self._g * self._hist[:k], zi=self._zi)
+            self._hist = np.concatenate((self._hist[k:], y[i:i + k]))
+            i += k
+        return y
+
+    def _chain(self, n: int, pos: int) -> np.ndarray:
+        y = self._loop(n) * self._vel
+        if self._body is not None:
+            y, self._zb = lfilter(self._body[0], self._body[1], y, zi=self._zb)
+        if self._s is not None:
+            y, self._zs = lfilter([1.0 - self._s], [1.0, -self._s], y, zi=self._zs)
+        if pos < self._fade:
+            k = min(n, self._fade - pos)
+            y[:k] *= np.arange(pos, pos + k) / self._fade
+        return np.tanh(1.2 * y) * self._gain
+
+    def _render(self, n: int) -> np.ndarray:
+        if len(self._head):
+            k = min(n, len(self._head))
+            y = np.empty(n, dtype=np.float32)
+            y[:k] = self._head[:k]
+            self._head = self._head[k:]
+            if k < n:
+                y[k:] = self._chain(n - k, self.pos + k)
+            return y
+        return self._chain(n, self.pos)
+
+
+class SampleVoice(LiveVoice):
+    """Sample de piano (capa según velocidad, transpuesto) con ADSR en vivo.
+    'tables' es un dict compartido entre voces para no re-transponer el sample."""
+
+    def __init__(self, samples: dict, pitch, velocity, adsr=None, tables: dict = None):
+        adsr = dict(adsr or dict(attack_ms=5, decay_ms=500, sustain=0.4, release_ms=300))
+        super().__init__(pitch, velocity, adsr.pop("release_ms", 300))
+        self.samples, self.adsr = samples, adsr
+        self.tables = tables if tables is not None else {}
+
+    def reset(self, fs: int) -> None:
+        from .sample_piano import _resample_1d
+        super().reset(fs)
+        base = min(self.samples.keys(), key=lambda k: abs(k - self.pitch))
+        layer = "H" if self.velocity > 90 else "L"
+        key = (self.pitch, layer, fs)
+        y = self.tables.get(key)
+        if y is None:
+            layers = self.samples[base]
+            _, raw, _sr = next((tpl for tpl in layers if tpl[0] == layer), layers[0])
+            ratio = 2 ** ((self.pitch - base) / 12.0)
+            y = _resample_1d(raw, max(1, int(len(raw) / ratio)))
+            y = y / (np.max(np.abs(y)) + 1e-9)
+            self.tables[key] = y
+        self._y = y
+        self._vel = self.velocity / 127.0
+
+    def _render(self, n: int) -> np.ndarray:
+        seg = self._y[self.pos:self.pos + n]
+        out = np.zeros(n, dtype=np.float32)
+        out[:len(seg)] = seg
+        out *= adsr_block(self.pos, n, self.fs, **self.adsr) * self._vel
+        if self.pos + n >= len(self._y) and not self.releasing:
+            self.note_off(5.0)   # se acabó el sample
+        return out
+
+
+class AdditiveVoice(LiveVoice):
+    """Banco de osciladores: parciales (múltiplos de f0), amplitudes, decaimiento
+    exponencial opcional por parcial y ADSR. Descarta parciales sobre Nyquist."""
+
+    def __init__(self, pitch, velocity, ratios, amps, taus_s=None, adsr=None, phases=None):
+        adsr = dict(adsr or dict(attack_ms=12, decay_ms=60, sustain=0.6, release_ms=120))
+        super().__init__(pitch, velocity, adsr.pop("release_ms", 120))
+        self.ratios = np.asarray(ratios, dtype=np.float64)
+        self.amps = np.asarray(amps, dtype=np.float64)
+        self.taus_s = None if taus_s is None else np.asarray(taus_s, dtype=np.float64)
+        self.phases = phases
+        self.adsr = adsr
+
+    def reset(self, fs: int) -> None:
+        super().reset(fs)
+        f = self.ratios * midi2freq(self.pitch)
+        keep = f < fs / 2.0
+        self._w = (2.0 * np.pi * f[keep] / fs)[:, None]
+        self._a = self.amps[keep][:, None]
+        self._ph0 = (np.zeros(keep.sum()) if self.phases is None
+                     else np.asarray(self.phases, dtype=np.float64)[keep])[:, None]
+        self._k = None if self.taus_s is None else (-1.0 / (self.taus_s[keep] * fs))[:, None]
+        self._vel = self.velocity / 127.0
+
+    def _render(self, n: int) -> np.ndarray:
+        t = np.arange(self.pos, self.pos + n, dtype=np.float64)[None, :]
+        amp = self._a if self._k is None else self._a * np.exp(self._k * t)
+        y = np.sum(amp * np.sin(self._w * t + self._ph0), axis=0)
+        if self.adsr.get("sustain", 0.6) <= 0.0 and not self.releasing:
+            if self.pos + n >= self.fs * (self.adsr.get("attack_ms", 12) + self.adsr.get("decay_ms", 60)) / 1000.0:
+                self.note_off(5.0)   # envolvente sin sustain: la voz ya calló
+        return (y * adsr_block(self.pos, n, self.fs, **self.adsr) * self._vel).astype(np.float32)
+
+
+class ModalVoice(LiveVoice):
+    """Piano modal por bloques (ver piano_modal.py): el banco de resonadores de la
+    tecla, excitado por el martillo, decae solo; la voz se apaga a -60 dB del parcial
+    más largo o con note_off()."""
+
+    def __init__(self, pitch, velocity, release_ms=250.0, **bank_params):
+        super().__init__(pitch, velocity, release_ms)
+        self.bank_params = bank_params
+
+    def reset(self, fs: int) -> None:
+        from .piano_modal import ModalResonator, hammer, modal_bank
+        super().reset(fs)
+        bank = modal_bank(self.pitch, fs, **self.bank_params)
+        self._res = ModalResonator(bank, hammer(self.velocity, fs), bank.amps / np.sum(bank.amps))
+        self._end = int(np.log(1e-3) / np.log(np.max(np.abs(bank.poles)))) if len(bank) else 0
+        self._vel = self.velocity / 127.0
+
+    def _render(self, n: int) -> np.ndarray:
+        y = self._res.render(n, out=np.empty(n, dtype=np.float32))
+        if self.pos + n >= self._end and not self.releasing:
+            self.note_off(5.0)
+        return y * np.float32(self._vel)
+
+
+def piano_additive_voice(pitch, velocity, n_partials=30, B=3e-4, amp_decay_exp=1.2,
+                         partial_decay_base=0.85, nominal_dur_s=1.5, rng=None):
+    """Equivalente en vivo de render_note_piano_additive (sin ruido de martillo):
+    la constante de decaimiento usa una duración nominal en lugar de la de la nota."""
+    rng = rng or np.random.default_rng(12345)
+    k = np.arange(1, n_partials + 1, dtype=np.float64)
+    v = velocity / 127.0
+    amps = (1.0 / k ** amp_decay_exp) * (1.0 + (0.5 + 0.5 * v) * 0.15 * (k - 1) / max(1, n_partials - 1))
+    return AdditiveVoice(
+        pitch, velocity,
+        ratios=k * np.sqrt(1.0 + B * k ** 2),
+        amps=amps / np.sum(amps),
+        taus_s=0.6 * nominal_dur_s * partial_decay_base ** (k - 1) + 1e-6,
+        adsr=dict(attack_ms=2, decay_ms=900, sustain=0.0, release_ms=250),
+        phases=2.0 * np.pi * rng.random(n_partials),
+    )
@@ -0,0 +1,34 @@
+import numpy as np
+import soundfile as sf
+from src.tpaudio.core.audio_io import AudioWriter, write_wav
+
+def test_writer_blocks_and_formats(tmp_path):
+    sr = 48000
+    x = (0.5 * np.sin(2 * np.pi * 440 * np.arange(sr) / sr)).astype(np.float32)
+    for name, bits, sub in [("a.wav", None, "FLOAT"), ("b.flac", 16, "PCM_16"), ("c.rf64", 24, "PCM_24")]:
+        path = tmp_path / name
+        with AudioWriter(path, sr, bits=bits, queue_size=2, seed=0) as w:
+            for i in range(0, len(x), 1000):
+                w.write(x[i:i + 1000])
+        y, fs = sf.read(path, dtype="float32")
+        assert fs == sr and sf.info(str(path)).subtype == sub and len(y) == len(x)
+        assert np.max(np.abs(y - x)) < 1e-3
+
+def test_write_wav_clips(tmp_path):
+    write_wav(tmp_path / "c.wav", np.array([2.0, -3.0, 0.25]), 8000)
+    y, _ = sf.read(tmp_path / "c.wav")
+    assert np.allclose(y, [1.0, -1.0, 0.25])
+
+def test_write_stems(tmp_path):
+    from src.tpaudio.core.audio_io import write_stems
+    stems = {0: np.full(10, 0.5, dtype=np.float32), "bajo 1": np.full(4, -0.25, dtype=np.float32)}
+    paths = write_stems(str(tmp_path), stems, 8000)
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["track00.wav", "bajo_1.wav"]
+    y, _ = sf.read(paths[1])
+    assert len(y) == 10 and np.allclose(y, [-0.25] * 4 + [0.0] * 6)
+    (path,) = write_stems(str(tmp_path), stems, 8000, multichannel=True)
+    y, _ = sf.read(path)
+    assert y.shape == (10, 2) and np.allclose(y[:, 0], 0.5) and np.allclose(y[4:, 1], 0.0)
+    stems64 = {k: v.astype(np.float64) for k, v in stems.items()}            # precisión float64
+    (path,) = write_stems(str(tmp_path / "f64"), stems64, 8000, multichannel=True, bits=24)
+    assert np.allclose(sf.read(path)[0][:, 0], 0.5, atol=1e-6)
@@ -0,0 +1,11 @@
+import numpy as np
+from src.tpaudio.bench.cases import Case
+from src.tpaudio.bench.run import measure, compare
+
+def test_measure_and_compare():
+    r = measure(Case("zeros", lambda: np.zeros(48000, dtype=np.float32)), repeat=1, warmup=0)
+    assert r["audio_s"] == 1.0 and r["rtf"] > 0 and r["peak_mb"] is not None
+    base = {"cases": {"a": {"rtf": 10.0, "peak_mb": 5.0}, "b": {"rtf": 10.0, "peak_mb": 5.0}}}
+    cur = {"cases": {"a": {"rtf": 9.5, "peak_mb": 5.2}, "b": {"rtf": 5.0, "peak_mb": 9.0}}}
+    regs = compare(cur, base, tolerance=0.1)
+    assert {(n, m) for n, m, _, _ in regs} == {("b", "rtf"), ("b", "peak_mb")}
@@ -0,0 +1,25 @@
+import numpy as np
+from src.tpaudio.effects.graph import compile_fx_graph
+from src.tpaudio.effects.delay import Delay
+from src.tpaudio.constants import SR
+
+def test_shared_bus_runs_once():
+    fx = {"tracks": {0: [{"type": "delay", "time_ms": 10, "mix": 0.5}],
+                     "*": {"sends": {"verb": 0.2}}},
+          "buses": {"verb": [{"type": "reverb", "mix": 1.0}]},
+          "master": [{"type": "limiter", "ceiling_dbfs": -1.0}]}
+    g = compile_fx_graph(fx)
+    assert isinstance(g.strip(0).inserts[0], Delay)
+    calls = []
+    rv = g.buses["verb"][0]
+    orig = rv.process
+    rv.process = lambda x, fs: calls.append(1) or orig(x, fs)
+    tracks = {i: np.ones(int(0.1 * SR), dtype=np.float32) for i in range(1, 5)}
+    y = g.process(tracks, SR)
+    assert len(calls) == 1
+    assert y.dtype == np.float32 and np.max(np.abs(y)) <= 10 ** (-1 / 20) + 1e-6
+
+def test_exclude_drops_bus_and_sends():
+    g = compile_fx_graph({"tracks": {"*": {"sends": {"verb": 0.3}}},
+                          "buses": {"verb": [{"type": "reverb"}]}}, exclude=("reverb",))
+    assert not g.buses and not g.default.sends
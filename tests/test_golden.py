@@ -0,0 +1,41 @@
+import os
+import numpy as np
+from src.tpaudio.bench.cases import Case
+from src.tpaudio.bench.golden import Tolerances, check, metrics, run
+from src.tpaudio.constants import SR
+
+t = np.arange(SR // 2) / SR
+TONE = (0.5 * np.sin(2 * np.pi * 440.0 * t)).astype(np.float32)
+
+def test_metrics():
+    assert check(metrics(TONE, TONE), Tolerances()) == []
+    sharp = (0.5 * np.sin(2 * np.pi * 440.0 * 2 ** (5 / 1200) * t)).astype(np.float32)
+    assert {k for k, _, _ in check(metrics(TONE, sharp), Tolerances())} >= {"cents", "snr_db"}
+    noisy = TONE + 1e-4 * np.random.default_rng(0).standard_normal(len(TONE)).astype(np.float32)
+    m = metrics(TONE, noisy)
+    assert 60 < m["snr_db"] < 80 and m["cents"] < 0.1
+    assert "snr_db" in [k for k, _, _ in check(m, Tolerances(min_snr_db=90))]
+
+def test_run_update_and_diff(tmp_path):
+    ref, diff = str(tmp_path / "ref"), str(tmp_path / "diff")
+    run([Case("tono/a4", lambda: TONE)], ref, update=True)
+    assert run([Case("tono/a4", lambda: TONE)], ref)["tono/a4"]["failures"] == []
+    r = run([Case("tono/a4", lambda: 0.9 * TONE), Case("otro", lambda: TONE)], ref, diff_dir=diff)
+    assert r["tono/a4"]["failures"] and r["otro"]["failures"] == ["missing"]
+    assert os.path.exists(os.path.join(diff, "tono__a4.diff.wav"))
+    # tolerancia propia del caso
+    loose = Case("tono/a4", lambda: 0.9 * TONE, tol={"max_abs": 0.1, "min_snr_db": 10})
+    assert run([loose], ref)["tono/a4"]["failures"] == []
+
+def test_committed_references():
+    # golden/: referencias de antes de las optimizaciones (ver bench/golden.py)
+    import contextlib, io
+    from src.tpaudio.bench.golden import GOLDEN_DIR, golden_cases, golden_midi_files
+    from src.tpaudio.bench.run import PROJECT_ROOT
+    from src.tpaudio.presets import load_compiled_presets
+    with contextlib.redirect_stdout(io.StringIO()):
+        presets = load_compiled_presets(os.path.join(PROJECT_ROOT, "presets", "instruments.yml"))
+    cases = golden_cases(presets, os.path.join(PROJECT_ROOT, "samples_piano_1"), golden_midi_files())
+    assert len(cases) == 30
+    bad = {k: r["failures"] for k, r in run(cases, GOLDEN_DIR).items() if r["failures"]}
+    assert bad == {}
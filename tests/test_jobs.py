@@ -0,0 +1,83 @@
+import threading
+import numpy as np
+import soundfile as sf
+from src.tpaudio.constants import PEAK_DBFS
+from src.tpaudio.core.jobs import RenderJob, RenderWorker, run_job
+from src.tpaudio.core.mixer import peak_gain
+from src.tpaudio.core.timeline import lay_notes_on_timeline
+from src.tpaudio.effects.graph import FxGraph
+from src.tpaudio.effects.delay import Delay
+
+SR = 8000
+
+def _tone(pitch, dur, vel, sr):
+    return 0.2 * np.sin(2 * np.pi * 440 * np.arange(int(dur * sr)) / sr).astype(np.float32)
+
+def _notes(n):
+    return [(0, 0.1 * i, 0.3, 60, 100) for i in range(n)]
+
+def test_run_job_matches_offline_graph(tmp_path):
+    out = tmp_path / "a.wav"
+    tracks = {0: (_notes(5), _tone), 1: (_notes(3), _tone)}
+    events = []
+    job = RenderJob(tracks, str(out), FxGraph(master=[Delay(time_ms=50, feedback=0.3, mix=0.3)]), sr=SR, block=256)
+    run_job(job, lambda kind, **d: events.append((kind, d)))
+    y, _ = sf.read(out, dtype="float32")
+
+    # el mismo timeline y la misma normalización que el CLI (session.render)
+    lay = lambda notes: lay_notes_on_timeline(notes, _tone, sr=SR)
+    ref = FxGraph(master=[Delay(time_ms=50, feedback=0.3, mix=0.3)]).process({0: lay(tracks[0][0]), 1: lay(tracks[1][0])}, SR)
+    ref *= peak_gain(ref, PEAK_DBFS)
+    assert len(y) >= len(ref) and np.allclose(y[:len(ref)], ref, atol=1e-5)
+    assert [d["stage"] for k, d in events if k == "stage"] == ["synth", "effects", "write"]
+    assert ("progress", dict(stage="synth", track=1, done=3, total=3)) in events
+
+def test_cancel_stops_and_removes_file(tmp_path):
+    started = threading.Event()
+    def slow(pitch, dur, vel, sr):
+        started.set()
+        threading.Event().wait(0.02)
+        return _tone(pitch, dur, vel, sr)
+    w = RenderWorker()
+    job = w.submit(RenderJob({0: (_notes(200), slow)}, str(tmp_path / "c.wav"), sr=SR))
+    assert started.wait(5)
+    w.cancel()
+    assert w.join(5)
+    kinds = [k for _id, k, _d in w.poll()]
+    assert kinds[0] == "queued" and kinds[-1] == "cancelled"
+    assert job.cancelled and not (tmp_path / "c.wav").exists()
+
+def test_jobs_are_queued_in_order(tmp_path):
+    w = RenderWorker()
+    jobs = [w.submit(RenderJob(lambda: {0: (_notes(3), _tone)}, str(tmp_path / f"{i}.wav"), sr=SR))
+            for i in range(3)]
+    assert w.join(10)
+    ev = w.poll()
+    assert [d["position"] for _id, k, d in ev if k == "queued"] == [0, 1, 2]
+    assert [i for i, k, _d in ev if k == "done"] == [j.id for j in jobs]
+    assert all((tmp_path / f"{i}.wav").exists() for i in range(3))
+    w.shutdown()
+
+def test_track_jobs_render_in_processes(tmp_path):
+    from src.tpaudio.core.parallel import TrackJob
+    from src.tpaudio.presets import PresetLibrary
+    events = []
+    specs = [TrackJob(k, [(k, 0.1 * i, 0.2, 60 + i, 90) for i in range(4)], "additive") for k in range(2)]
+    job = RenderJob(specs, str(tmp_path / "p.wav"), presets=PresetLibrary(), workers=2, block=512)
+    run_job(job, lambda kind, **d: events.append((kind, d)))
+    assert 0.45 * 48000 < sf.info(str(tmp_path / "p.wav")).frames <= 0.5 * 48000    # hasta la cola real
+    assert ("progress", dict(stage="synth", track=1, done=4, total=4)) in events
+
+def test_skipped_silence_keeps_lfo_phase(tmp_path):
+    from src.tpaudio.core.stream import stream_tracks
+    from src.tpaudio.effects.flanger import Flanger
+    notes = [(0, 0.2, 0.3, 60, 100), (0, 3.5, 0.3, 60, 100)]          # 3.3 s de hueco
+    graph = lambda: FxGraph(master=[Flanger(rate_hz=0.7, mix=0.5)])
+    ref = graph().process({0: lay_notes_on_timeline(notes, _tone, sr=SR)}, SR)
+    job = RenderJob({0: (notes, _tone)}, str(tmp_path / "f.wav"), graph(), sr=SR, block=256,
+                    normalize=None, bits="float", overview=False)
+    run_job(job)
+    y, _ = sf.read(tmp_path / "f.wav", dtype="float32")
+    s = np.concatenate(list(stream_tracks({0: (notes, _tone)}, SR, block=256, graph=graph())))
+    n = len(ref)
+    assert np.max(np.abs(y[:n] - ref)) < 1e-5 and np.max(np.abs(s[:n] - ref)) < 1e-5
@@ -3,3 +3,6 @@ from src.tpaudio.constants import SR
 def test_ks_note():
     y = render_note_ks(69, 0.2, 100, SR)
     assert y.ndim == 1 and y.size > 0
+
+def test_ks_zero_duration():
+    assert render_note_ks(60, 0.0, 100, SR).size == 0
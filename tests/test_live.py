@@ -0,0 +1,41 @@
+import numpy as np
+import mido
+from src.tpaudio.live import LiveEngine, make_voice_factory
+from src.tpaudio.synth.karplus import _ks_basic
+from src.tpaudio.synth.voices import KSVoice, AdditiveVoice
+from src.tpaudio.core.dsp import midi2freq
+
+def test_ks_voice_loop_matches_offline():
+    ref = _ks_basic(midi2freq(57), 0.3, 48000, rho=0.997, noise_mix=0, stiffness=0.002)
+    v = KSVoice(57, 127, rho=0.997, noise_mix=0, stiffness=0.002, S=None)
+    v.reset(48000)
+    v._pending, v._hist = ref[:v._L].astype(np.float64), ref[:v._L].astype(np.float64)
+    from scipy.signal import lfiltic
+    v._zi = lfiltic([1.0], v._a2, [ref[v._L - 1], ref[v._L - 2]])
+    y = np.concatenate([v._loop(200) for _ in range(60)])
+    assert np.max(np.abs(y - ref[:len(y)])) < 1e-5
+
+def test_note_off_releases_voice():
+    e = LiveEngine(make_voice_factory("additive"), block=256)
+    e.handle(mido.Message("note_on", note=69, velocity=100))
+    y = np.concatenate([e.render_block().copy() for _ in range(20)])
+    assert len(e.voices) == 1 and np.max(np.abs(y)) > 0.01
+    e.handle(mido.Message("note_on", note=69, velocity=0))   # note_on vel 0 = note_off
+    for _ in range(40):
+        e.render_block()
+    assert not e.voices
+
+def test_voice_shedding_over_budget():
+    class Slow(AdditiveVoice):
+        def _render(self, n):
+            import time
+            time.sleep(0.002)
+            return super()._render(n)
+    e = LiveEngine(lambda p, v: Slow(p, v, [1, 2], [1.0, 0.5]), block=256, budget=0.5)
+    for p in range(60, 68):
+        e.note_on(p)
+    for _ in range(30):
+        e.render_block()
+    st = e.stats()
+    assert st["overruns"] > 0 and st["voices_shed"] > 0 and len(e.voices) < 8
+    assert st["block_ms"] <= 10.0
@@ -0,0 +1,28 @@
+import numpy as np
+from src.tpaudio.registry import make_renderer
+from src.tpaudio.synth.piano_modal import ModalResonator, hammer, modal_bank
+from src.tpaudio.synth.voices import ModalVoice
+
+def test_bank_is_sum_of_damped_sinusoids():
+    bank = modal_bank(60, 48000)
+    res = ModalResonator(bank, [1.0])
+    y = np.concatenate([res.render(n) for n in (700, 1024, 3000, 5)])    # bloques irregulares
+    n = np.arange(len(y))
+    ref = sum(a * np.abs(p) ** n * np.sin(np.angle(p) * n) for a, p in zip(bank.amps, bank.poles))
+    assert np.max(np.abs(y - ref)) < 1e-5
+
+def test_modal_engine():
+    rf = make_renderer("piano_modal")
+    y = rf(45, 0.5, 100, 48000, seed=(1, 0, 0))
+    assert rf.uses_rng and y.dtype == np.float32 and 23900 < y.shape[0] <= 24000
+    assert np.isclose(np.max(np.abs(y)), 1.0, atol=1e-3)
+    assert np.array_equal(y, rf(45, 0.5, 100, 48000, seed=(1, 0, 0)))
+    assert np.all(np.isfinite(rf(127, 0.01, 1, 48000)))
+
+def test_live_voice_matches_bank():
+    v = ModalVoice(64, 90)
+    v.reset(48000)
+    y = np.concatenate([v.process_block(None, np.empty(256, dtype=np.float32)).copy() for _ in range(10)])
+    bank = modal_bank(64, 48000)
+    ref = ModalResonator(bank, hammer(90, 48000), bank.amps / np.sum(bank.amps)).render(2560) * 90 / 127
+    assert np.max(np.abs(y - ref)) < 1e-6
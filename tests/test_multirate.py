@@ -0,0 +1,31 @@
+import dataclasses
+import numpy as np
+import pytest
+from src.tpaudio.core.multirate import auto_rate, internal_rate, upsample
+from src.tpaudio.presets import KickPreset, KSPreset, PresetError, compile_presets
+
+def test_auto_rate():
+    assert auto_rate(600.0, 48000) == 12000
+    assert auto_rate(7000.0, 48000) == 16000
+    assert auto_rate(15000.0, 48000) == 48000
+    assert internal_rate(None, 100.0, 48000) == 48000
+    assert internal_rate(96000, 100.0, 48000) == 48000
+    y = upsample(np.ones(100, dtype=np.float32), 12000, 48000, 390)
+    assert y.shape == (390,) and y.dtype == np.float32
+
+def test_kick_at_internal_rate_matches_full_rate():
+    full = KickPreset(name="k")
+    low = dataclasses.replace(full, rate="auto")
+    a = full.render(36, 0.35, 120, 48000, rng=3)
+    b = low.render(36, 0.35, 120, 48000, rng=3)
+    assert a.shape == b.shape
+    A, B = np.abs(np.fft.rfft(a)), np.abs(np.fft.rfft(b))
+    assert np.linalg.norm(A - B) / np.linalg.norm(A) < 0.05
+
+def test_ks_rate_and_validation():
+    y = KSPreset(name="bass", rate=24000).render(40, 0.3, 100, 48000, rng=1)
+    assert y.shape == (14400,) and np.all(np.isfinite(y))
+    with pytest.raises(PresetError):
+        compile_presets({"ks": {"b": {"rate": 100}}})
+    with pytest.raises(PresetError):
+        compile_presets({"drums": {"k": {"rate": "fast"}}})
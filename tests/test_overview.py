@@ -0,0 +1,47 @@
+import numpy as np
+import soundfile as sf
+from src.tpaudio.analysis.overview import OverviewBuilder, Overview, build_overview, load_overview, overview_path
+from src.tpaudio.core.audio_io import AudioWriter
+
+def test_pyramids_match_bruteforce():
+    sr = 8000
+    x = np.random.default_rng(1).uniform(-0.8, 0.8, 100_003).astype(np.float32)
+    b = OverviewBuilder(sr, levels=(64, 1024), nperseg=256, col=512, n_bands=32)
+    for i in range(0, len(x), 777):          # bloques que no caen en los buckets
+        b.push(x[i:i + 777])
+    ov = b.finish()
+    for f in (64, 1024):
+        mn, mx, rms = ov.levels[f]
+        k = -(-len(x) // f)
+        assert len(mn) == k
+        pad = np.pad(x, (0, k * f - len(x)), constant_values=np.nan).reshape(k, f)
+        assert np.array_equal(mn, np.nanmin(pad, 1)) and np.array_equal(mx, np.nanmax(pad, 1))
+        assert np.allclose(rms, np.sqrt(np.nanmean(pad ** 2, 1)), rtol=1e-5)
+    assert ov.spec_db.shape == (32, -(-len(x) // 512))
+    t, mn, mx, rms = ov.waveform(1.0, 2.0, width=10)
+    assert len(t) >= 10 and t[0] >= 1.0 - 1024 / sr and t[-1] <= 2.0 + 1024 / sr
+
+def test_writer_saves_overview(tmp_path):
+    sr = 48000
+    x = (0.5 * np.sin(2 * np.pi * 750 * np.arange(3 * sr) / sr)).astype(np.float32)
+    path = tmp_path / "o.wav"
+    with AudioWriter(path, sr, overview=True) as w:
+        for i in range(0, len(x), 5000):
+            w.write(x[i:i + 5000])
+    ov = load_overview(path, build=False)
+    assert ov is not None and ov.n_samples == len(x)
+    assert np.allclose(ov.levels[4096][1][:-1], 0.5, atol=1e-3)
+    assert np.allclose(ov.levels[256][2][1:-1], 0.5 / np.sqrt(2), atol=1e-3)
+    _t, f, S = ov.spectrogram(0.5, 2.5)
+    assert abs(f[np.argmax(S.mean(axis=1))] - 750) < 80
+    # desde el archivo da lo mismo que lo acumulado al escribir
+    ref = build_overview(str(path))
+    assert np.array_equal(ref.levels[65536][0], ov.levels[65536][0])
+    assert np.array_equal(ref.spec_db, ov.spec_db)
+
+def test_overview_rebuilt_when_missing(tmp_path):
+    path = tmp_path / "n.wav"
+    sf.write(path, np.zeros(10000, dtype=np.float32), 8000)
+    assert load_overview(path, build=False) is None
+    ov = load_overview(path)
+    assert isinstance(Overview.load(overview_path(path)), Overview) and ov.duration == 1.25
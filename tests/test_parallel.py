@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from src.tpaudio.core.parallel import TrackJob, render_tracks, Cancelled, shutdown_pool
+from src.tpaudio.core.timeline import lay_notes_on_timeline
+from src.tpaudio.effects.graph import FxGraph, TrackStrip
+from src.tpaudio.effects.delay import Delay
+from src.tpaudio.presets import PresetLibrary
+from src.tpaudio.registry import make_renderer
+
+def _notes(ti, n, p0):
+    return [(ti, 0.15 * i, 0.2, p0 + i % 5, 90) for i in range(n)]
+
+def _jobs():
+    strip = TrackStrip(inserts=[Delay(time_ms=40, feedback=0.3, mix=0.3)], gain=0.5)
+    return [TrackJob(0, _notes(0, 6, 60), "additive", strip=strip),
+            TrackJob("pno", _notes(1, 4, 48), "piano"),
+            TrackJob(2, [], "additive")]
+
+def test_parallel_matches_sequential():
+    lib = PresetLibrary()
+    par = render_tracks(_jobs(), lib, workers=2)
+    seq = render_tracks(_jobs(), lib, workers=1)
+    assert set(par) == {0, "pno"}           # pistas sin notas se omiten
+    for k in par:
+        assert par[k].dtype == np.float32 and np.array_equal(par[k], seq[k])
+    ref = lay_notes_on_timeline(_notes(0, 6, 60), make_renderer("additive", None, lib))
+    ref = FxGraph._run_strip(TrackStrip(inserts=[Delay(time_ms=40, feedback=0.3, mix=0.3)], gain=0.5), ref, 48000)
+    assert np.allclose(par[0], ref, atol=1e-6)
+
+def test_cancel_and_errors():
+    with pytest.raises(Cancelled):
+        calls = iter([False, True])
+        render_tracks(_jobs(), PresetLibrary(), workers=2, cancelled=lambda: next(calls, True))
+    with pytest.raises(ValueError):
+        render_tracks([TrackJob(0, _notes(0, 2, 60), "nope"), TrackJob(1, _notes(1, 2, 60), "piano")],
+                      PresetLibrary(), workers=2)
+    shutdown_pool()
+
+def test_time_windows_match_whole_track():
+    from src.tpaudio.core.parallel import _windows
+    from src.tpaudio.effects.flanger import Flanger
+    from src.tpaudio.effects.limiter import Limiter
+    w = _windows(104, 10, 1.0)           # el resto (4 < 5) se suma a la última
+    assert len(w) == 10 and w[-2:] == [(80, 90), (90, 104)]
+    assert _windows(12, 10, 1.0) == [(0, 12)] and _windows(100, 10, None) == [(0, 100)]
+    notes = [(0, 0.11 * i, 0.3 + 0.2 * (i % 3), 50 + i % 12, 90) for i in range(30)]
+    lib = PresetLibrary()
+    inserts = lambda: [Delay(time_ms=40, feedback=0.4, mix=0.3), Flanger(), Limiter(ceiling_dbfs=-12)]
+    for strip in (None, TrackStrip(inserts=inserts(), gain=0.5)):
+        jobs = lambda: [TrackJob(0, notes, "piano", strip=strip)]
+        seq = np.asarray(render_tracks(jobs(), lib, workers=1)[0])
+        calls = []
+        par = render_tracks(jobs(), lib, workers=2, segment_s=0.5, progress=lambda *a: calls.append(a))[0]
+        assert len(par) == len(seq) and calls[-1][1:] == (30, 30)
+        if strip is None:
+            assert np.array_equal(par, seq)              # síntesis por ventanas: mismo audio bit a bit
+        else:
+            assert np.allclose(par, seq, atol=1e-6)      # inserts con pre-roll
+    shutdown_pool()
@@ -0,0 +1,49 @@
+import numpy as np
+import soundfile as sf
+from src.tpaudio.core.playback import RingBuffer, PlaybackEngine, FileSinkBackend, NullBackend
+from src.tpaudio.core.stream import stream_tracks
+from src.tpaudio.effects.graph import FxGraph
+from src.tpaudio.effects.delay import Delay
+
+def test_ring_wraparound():
+    rb = RingBuffer(8)
+    out = np.zeros(8, dtype=np.float32)
+    for k in range(5):
+        x = np.arange(6, dtype=np.float32) + 10 * k
+        assert rb.write(x) == 6 and rb.write(x) == 2
+        assert rb.read(out) == 8
+        assert np.array_equal(out, np.concatenate([x, x[:2]]))
+
+def _tone(pitch, dur, vel, sr):
+    return 0.2 * np.sin(2 * np.pi * 440 * np.arange(int(dur * sr)) / sr)
+
+def test_play_to_file_matches_stream(tmp_path):
+    sr, block = 8000, 256
+    notes = [(0, 0.0, 0.3, 60, 100), (0, 0.25, 0.5, 64, 100)]
+    ref = np.concatenate(list(stream_tracks({0: (notes, _tone)}, sr, block)))
+    graph = FxGraph(master=[Delay(time_ms=50, feedback=0.3, mix=0.3)])
+    ref_fx = np.concatenate(list(stream_tracks({0: (notes, _tone)}, sr, block, FxGraph(master=[Delay(time_ms=50, feedback=0.3, mix=0.3)]))))
+    assert len(ref_fx) > len(ref)   # la cola del delay se sigue entregando
+
+    path = tmp_path / "p.wav"
+    eng = PlaybackEngine(FileSinkBackend(path, sr, block), sr, block, prefill_blocks=2)
+    eng.play(stream_tracks({0: (notes, _tone)}, sr, block, graph))
+    assert eng.wait(10)
+    eng.stop()
+    y, _ = sf.read(path, dtype="float32")
+    assert np.allclose(y[:len(ref_fx)], ref_fx, atol=1e-6)
+    st = eng.stats()
+    assert st["underruns"] == 0 and st["frames_played"] == len(ref_fx)
+    assert st["time_to_first_sound_s"] is not None and st["latency_max_s"] >= 0
+
+def test_underruns_counted():
+    import time
+    def slow():
+        for _ in range(4):
+            time.sleep(0.05)
+            yield np.ones(64, dtype=np.float32)
+    eng = PlaybackEngine(NullBackend(8000, 64, realtime=True), 8000, 64, prefill_blocks=1)
+    eng.play(slow())
+    assert eng.wait(5)
+    eng.stop()
+    assert eng.stats()["underruns"] > 0 and eng.frames_played == 256
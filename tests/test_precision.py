@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from src.tpaudio.core import precision
+from src.tpaudio.core.parallel import TrackJob, render_tracks
+from src.tpaudio.core.timeline import lay_notes_on_timeline
+from src.tpaudio.effects.graph import FxGraph, TrackStrip
+from src.tpaudio.effects.delay import Delay
+from src.tpaudio.effects.flanger import Flanger
+from src.tpaudio.effects.reverb import Reverb
+from src.tpaudio.presets import PresetLibrary
+from src.tpaudio.registry import make_renderer
+
+NOTES = [(0, 0.1 * i, 0.3, 55 + i, 100) for i in range(6)]
+
+def _render():
+    rf = make_renderer("additive", None, PresetLibrary())
+    y = lay_notes_on_timeline(NOTES, rf)
+    graph = FxGraph(tracks={"0": TrackStrip(inserts=[Delay(time_ms=30, feedback=0.3, mix=0.3)])},
+                    master=[Flanger(), Reverb(mix=0.2)])
+    return graph.process({0: y}, 48000)
+
+@pytest.mark.parametrize("engine", ["additive", "piano", "modal", "ks", "kick"])
+def test_engines_follow_precision(engine):
+    lib = PresetLibrary()
+    assert make_renderer(engine, None, lib)(60, 0.1, 100, 48000).dtype == np.float32
+    with precision.precision("float64"):
+        assert make_renderer(engine, None, lib)(60, 0.1, 100, 48000).dtype == np.float64
+    assert precision.get_precision() == "float32"
+
+def test_float32_pipeline_matches_float64_reference():
+    y32 = _render()
+    with precision.precision("float64"):
+        y64 = _render()
+    assert y32.dtype == np.float32 and y64.dtype == np.float64
+    assert np.max(np.abs(y32 - y64)) < 1e-4 * np.max(np.abs(y64))
+
+def test_as_audio_does_not_copy_and_phase_is_float64():
+    x = np.zeros(8, dtype=np.float32)
+    assert precision.as_audio(x) is x
+    w, start = 2 * np.pi * 3520.0 / 48000, 48000 * 600      # 10 minutos
+    ref = np.sin(w * np.arange(start, start + 64, dtype=np.float64))
+    assert np.max(np.abs(precision.sine(w, 64, start=start) - ref)) < 1e-6
+    with pytest.raises(ValueError):
+        precision.set_precision("float16")
+
+def test_alloc_debug_counts_by_site():
+    with precision.alloc_debug() as stats:
+        _render()
+        n = stats.totals()
+        precision.as_audio(np.zeros(4, dtype=np.float32))
+        assert stats.totals() == n                  # sin conversión: no cuenta
+    assert precision.alloc_stats() is None
+    assert n["allocs"] > 0 and n["copies"] == 0
+    assert stats.sites["timeline.lay_notes_on_timeline"]["allocs"] == 1
+
+def test_float64_stems_in_shared_memory():
+    jobs = [TrackJob(k, [(k, 0.1 * i, 0.2, 60 + i, 90) for i in range(3)], "additive") for k in range(2)]
+    with precision.precision("float64"):
+        par = render_tracks(jobs, PresetLibrary(), workers=2)
+        seq = render_tracks(jobs, PresetLibrary(), workers=1)
+    for k in seq:
+        assert par[k].dtype == np.float64 and np.array_equal(par[k], seq[k])
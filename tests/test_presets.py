@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from src.tpaudio.presets import PresetError, compile_presets, load_compiled_presets
+from src.tpaudio.synth.karplus import ks_loop_coeffs
+from src.tpaudio.core.dsp import midi2freq
+
+YAML = """
+ks:
+  nylon: {rho: 0.9965, pick_pos: 0.18, S: 0.45, noise_mix: 0.0, stiffness: 0.001, transpose: -12}
+drums:
+  kick_additive:
+    kind: additive
+    params: {dur_s: 0.3, amps: [1.0, 0.5], ratios: [1.0, 1.6], tau_amp_ms: [120, 90]}
+"""
+
+def test_ks_table_matches_per_note():
+    lib = compile_presets({"ks": {"nylon": {"rho": 0.997, "stiffness": 0.004}}})
+    ks = lib.ks_preset("nylon")
+    tab = ks.table(48000)
+    for p in (21, 60, 108):
+        assert tab.loop(p) == pytest.approx(ks_loop_coeffs(midi2freq(p), 48000, 0.997, 0.004))
+    assert lib.ks_preset("steel").name == "steel"   # sin YAML: defaults + cuerpo por nombre
+
+@pytest.mark.parametrize("raw", [
+    {"ks": {"x": {"rho": 1.5}}},
+    {"ks": {"x": {"rhoo": 0.99}}},
+    {"drums": {"k": {"params": {"amps": [1.0], "ratios": [1.0, 2.0], "tau_amp_ms": [10]}}}},
+])
+def test_invalid_presets_fail_at_load(raw):
+    with pytest.raises(PresetError):
+        compile_presets(raw)
+
+def test_pickle_cache_next_to_yaml(tmp_path):
+    path = tmp_path / "instruments.yml"
+    path.write_text(YAML, encoding="utf-8")
+    a = load_compiled_presets(str(path))
+    assert not a.from_cache and (tmp_path / "instruments.yml.pkl").exists()
+    b = load_compiled_presets(str(path))
+    assert b.from_cache and b.ks["nylon"].transpose == -12
+    y = b.ks["nylon"].render(60, 0.2, 100, 48000)
+    assert y.shape == (9600,) and np.all(np.isfinite(y))
+    assert b.kick().render(36, 0.2, 127, 48000).shape == (9600,)
+
+def test_unreadable_cache_is_recompiled(tmp_path):
+    path = tmp_path / "instruments.yml"
+    path.write_text(YAML, encoding="utf-8")
+    # caché escrito bajo otro paquete: la clase referida no se puede importar
+    (tmp_path / "instruments.yml.pkl").write_bytes(b"cno_such_pkg.presets\nPresetLibrary\n.")
+    a = load_compiled_presets(str(path))
+    assert not a.from_cache and a.ks["nylon"].transpose == -12
+    assert load_compiled_presets(str(path)).from_cache
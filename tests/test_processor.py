@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from src.tpaudio.core.processor import Processor, NoteVoice, process_blocks
+from src.tpaudio.effects.flanger import Flanger
+from src.tpaudio.effects.reverb import Reverb
+from src.tpaudio.effects.delay import Delay
+from src.tpaudio.effects.limiter import Limiter
+from src.tpaudio.synth.karplus import render_note_ks
+from src.tpaudio.constants import SR
+
+EFFECTS = [Flanger(feedback=0.6), Reverb(), Delay(time_ms=5, feedback=0.5), Limiter(ceiling_dbfs=-6)]
+
+@pytest.mark.parametrize("fx", EFFECTS, ids=lambda f: type(f).__name__)
+@pytest.mark.parametrize("block", [1, 7, 256, 5000])
+def test_blockwise_equals_whole(fx, block):
+    x = np.random.default_rng(0).standard_normal(4000).astype(np.float32)
+    whole = fx.process(x, SR)
+    assert isinstance(fx, Processor)
+    y = process_blocks(fx, x, SR, block)
+    assert np.allclose(y, whole, atol=1e-6)
+    assert fx.tail_length >= 0 and fx.latency == 0
+
+def test_note_voice_blocks():
+    rf = lambda p, d, v, sr: render_note_ks(p, d, v, sr, noise_mix=0.0)
+    v = NoteVoice(rf, 57, 0.05, 100)
+    y = process_blocks(v, np.zeros(int(0.06 * SR), dtype=np.float32), SR, 100)
+    ref = rf(57, 0.05, 100, SR)
+    assert np.allclose(y[:len(ref)], ref) and not np.any(y[len(ref):]) and v.done
+
+def test_limiter_matches_sample_recursion():
+    rng = np.random.default_rng(1)
+    x = (0.3 * rng.standard_normal(100000)).astype(np.float32)
+    x[::7000] *= 6
+    c, rel = 10 ** (-6 / 20), np.exp(-1 / (80e-3 * SR))
+    gain, ref = 1.0, np.empty_like(x)
+    for i, v in enumerate(x):            # ataque instantáneo, recuperación exponencial
+        gain = min(1.0 - (1.0 - gain) * rel, c / (abs(float(v)) + 1e-12))
+        ref[i] = v * gain
+    assert np.allclose(Limiter(ceiling_dbfs=-6).process(x, SR), ref, atol=1e-6)
+
+@pytest.mark.parametrize("fx", EFFECTS, ids=lambda f: type(f).__name__)
+def test_tail_length_requires_reset(fx):
+    fresh = type(fx)()
+    if not isinstance(fx, Limiter):        # el limitador no tiene cola (sí warmup)
+        with pytest.raises(RuntimeError, match="reset"):
+            fresh.tail_length
+    with pytest.raises(RuntimeError, match="reset"):
+        fresh.warmup
+    fresh.reset(SR)
+    assert fresh.tail_length >= 0 and fresh.warmup >= 0
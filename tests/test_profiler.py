@@ -0,0 +1,20 @@
+import numpy as np
+from src.tpaudio.core.profiler import Profiler, NULL_PROFILER
+
+def test_profiler_report():
+    p = Profiler(memory=False)
+    rf = lambda pitch, dur, vel, sr: np.zeros(10, dtype=np.float32)
+    with p.span("synth"):
+        w = p.wrap_render(rf, 3, "ks")
+        w(60, 0.1, 100, 48000); w(62, 0.1, 100, 48000)
+    p.cache("notes", True); p.cache("notes", False)
+    rep = p.report()
+    assert rep["stages"]["synth"]["calls"] == 1
+    assert rep["tracks"]["3"]["notes"] == 2 and rep["engines"]["ks"]["notes"] == 2
+    assert rep["caches"]["notes"]["hit_rate"] == 0.5
+
+def test_null_profiler_is_transparent():
+    rf = lambda *a: None
+    assert NULL_PROFILER.wrap_render(rf, 0, "ks") is rf
+    with NULL_PROFILER.span("x"):
+        pass
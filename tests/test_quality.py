@@ -0,0 +1,48 @@
+import numpy as np
+from src.tpaudio.bench.golden import peak_hz
+from src.tpaudio.core import quality
+from src.tpaudio.core.parallel import TrackJob, render_tracks, shutdown_pool
+from src.tpaudio.core.timeline import lay_notes_on_timeline
+from src.tpaudio.effects.reverb import Reverb
+from src.tpaudio.presets import PresetLibrary
+from src.tpaudio.registry import make_renderer
+from src.tpaudio.synth.piano_additive import render_note_piano_additive
+from src.tpaudio.synth.sample_piano import render_note_sample
+
+NOTES = [(0, 0.0, 0.3, 69, 100), (0, 1.0, 0.3, 69, 100)]
+
+def test_timeline_uses_sr():
+    rf = make_renderer("additive", None, PresetLibrary())
+    y = lay_notes_on_timeline(NOTES, rf, sr=22050)
+    assert len(y) < 1.4 * 22050 and np.array_equal(y[22050:22050 + 100], y[:100])
+    assert abs(peak_hz(y[:6000], 22050) - 440.0) < 2.0
+
+def test_sample_engine_converts_sample_rate():
+    t = np.arange(44100) / 44100
+    samples = {69: [("M", np.sin(2 * np.pi * 440.0 * t).astype(np.float32), 44100)]}
+    for sr in (48000, 22050):
+        y = render_note_sample(samples, 69, 0.5, 100, sr)
+        assert len(y) == sr // 2 and abs(peak_hz(y, sr) - 440.0) < 2.0
+
+def test_draft_quality():
+    full = render_note_piano_additive(48, 0.3, 100, 22050)
+    with quality.quality("draft") as q:
+        assert q.sr == 22050 and quality.partials(30) == 8
+        draft = render_note_piano_additive(48, 0.3, 100, 22050)
+        short = Reverb()
+        short.reset(48000)
+    assert len(draft) == len(full) and not np.allclose(draft, full)
+    long = Reverb()
+    long.reset(48000)
+    assert len(short._ir) < 0.5 * len(long._ir) and short.tail_length < long.tail_length
+    assert quality.get_quality() is quality.FULL
+
+def test_draft_parallel_matches_sequential():
+    jobs = lambda: [TrackJob(0, NOTES, "piano"), TrackJob(1, NOTES, "additive")]
+    with quality.quality("draft"):
+        par = render_tracks(jobs(), PresetLibrary(), workers=2, sr=22050)
+        seq = render_tracks(jobs(), PresetLibrary(), workers=1, sr=22050)
+    shutdown_pool()
+    for k in seq:
+        assert np.array_equal(par[k], np.asarray(seq[k]))
+    assert len(seq[0]) < 1.4 * 22050
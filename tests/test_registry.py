@@ -0,0 +1,30 @@
+import subprocess
+import sys
+import importlib.metadata
+import pytest
+from src.tpaudio.registry import Registry, SYNTHS, make_renderer
+from src.tpaudio.effects.graph import make_effect
+
+def test_cli_import_is_lazy():
+    code = ("import sys; import src.tpaudio.main; "
+            "print(sorted(m for m in ('scipy', 'matplotlib', 'soundfile', 'mido') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+def test_builtin_and_aliases():
+    assert {"ks", "sample", "piano", "kick", "additive"} <= set(SYNTHS.names())
+    assert SYNTHS.resolve("kick_adsr") == "kick" and "piano_sample" in SYNTHS
+    y = make_renderer("ks", "nylon")(60, 0.1, 100, 48000)
+    assert 4700 < y.shape[0] <= 4800          # sin la cola en silencio (fade final)
+    assert type(make_effect({"type": "delay", "time_ms": 10})).__name__ == "Delay"
+    with pytest.raises(ValueError):
+        SYNTHS.get("no_existe")
+
+def test_entry_point_plugins(monkeypatch):
+    ep = importlib.metadata.EntryPoint(name="gain", value="src.tpaudio.effects.limiter:Limiter",
+                                       group="tpaudio.effects")
+    monkeypatch.setattr(importlib.metadata, "entry_points", lambda group=None: [ep] if group == ep.group else [])
+    reg = Registry("Efecto", "tpaudio.effects")
+    reg.register("delay", ".effects.delay:Delay")
+    assert reg.names() == ["delay", "gain"]
+    assert reg.get("gain").__name__ == "Limiter"
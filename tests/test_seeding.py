@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from src.tpaudio.core.parallel import TrackJob, render_tracks
+from src.tpaudio.core.rng import note_seed
+from src.tpaudio.core.stream import stream_tracks
+from src.tpaudio.core.timeline import lay_notes_on_timeline
+from src.tpaudio.presets import PresetLibrary
+from src.tpaudio.registry import make_renderer
+
+@pytest.mark.parametrize("engine", ["ks", "kick"])
+def test_same_seed_same_audio(engine):
+    rf = make_renderer(engine, None, PresetLibrary())
+    assert rf.uses_rng
+    a = rf(60, 0.2, 100, 48000, seed=note_seed(7, 0, 3))
+    b = rf(60, 0.2, 100, 48000, seed=note_seed(7, 0, 3))
+    c = rf(60, 0.2, 100, 48000, seed=note_seed(8, 0, 3))
+    assert np.array_equal(a, b) and not np.array_equal(a, c)
+    assert np.array_equal(rf(60, 0.2, 100, 48000), rf(60, 0.2, 100, 48000))
+
+def test_engines_without_noise_ignore_seed():
+    assert not make_renderer("additive", None, PresetLibrary()).uses_rng
+
+def test_workers_do_not_change_audio():
+    jobs = [TrackJob(k, [(k, 0.05 * i, 0.2, 50 + i, 90) for i in range(4)], "ks", seed=3) for k in range(3)]
+    par = render_tracks(jobs, PresetLibrary(), workers=2)
+    seq = render_tracks(jobs, PresetLibrary(), workers=1)
+    for k in seq:
+        assert np.array_equal(par[k], seq[k])
+
+def test_stream_matches_offline_with_unsorted_notes():
+    rf = make_renderer("ks", None, PresetLibrary())
+    notes = [(0, 0.2, 0.1, 62, 90), (0, 0.0, 0.1, 60, 90), (0, 0.1, 0.1, 64, 90)]
+    ref = lay_notes_on_timeline(notes, rf, seed=5, key=0)
+    y = np.concatenate(list(stream_tracks({0: (notes, rf)}, 48000, seed=5)))
+    n = min(len(y), len(ref))
+    assert np.allclose(y[:n], ref[:n], atol=1e-6) and not np.any(ref[n:])
@@ -0,0 +1,100 @@
+import http.client
+import json
+import time
+import mido
+import pytest
+from src.tpaudio.server import Client, RenderServer
+
+def _midi(path, n=8):
+    mid = mido.MidiFile()
+    for ti in range(2):
+        tr = mido.MidiTrack()
+        mid.tracks.append(tr)
+        for i in range(n):
+            tr.append(mido.Message("note_on", note=60 + ti * 7 + i % 3, velocity=90, time=0 if i == 0 else 60))
+            tr.append(mido.Message("note_off", note=60 + ti * 7 + i % 3, velocity=0, time=120))
+    mid.save(str(path))
+    return str(path)
+
+@pytest.fixture
+def server(tmp_path):
+    s = RenderServer(port=0, workers=1, max_jobs=1, out_dir=str(tmp_path / "out"), roots=[str(tmp_path)],
+                     presets=str(tmp_path / "none.yml"), effects=None).start_background()
+    yield s
+    s.stop()
+
+def test_render_reuses_warm_caches(server, tmp_path):
+    c = Client(server.address)
+    midi = _midi(tmp_path / "a.mid")
+    before = c.status()["caches"]["notes"]          # contadores del proceso (otros tests)
+    ids = [c.submit(midi=midi, synth="additive") for _ in range(2)]
+    assert [c.wait(i)["state"] for i in ids] == ["done", "done"]
+    assert c.result(ids[1])[:4] == b"RIFF"
+    st = c.status()
+    assert st["counters"]["midi_hits"] >= 1 and st["counters"]["presets_hits"] >= 1
+    notes = {k: st["caches"]["notes"][k] - before[k] for k in ("hits", "misses")}
+    assert notes["hits"] >= notes["misses"]
+
+def test_errors_and_cancel(server, tmp_path):
+    c = Client(server.address)
+    assert c.request("POST", "/jobs", {"synth": "additive"})[0] == 202     # falla al armarse
+    assert c.request("GET", "/jobs/999")[0] == 404
+    assert c.request("POST", "/jobs", [1, 2])[0] == 400
+    midi = _midi(tmp_path / "b.mid", n=400)
+    first = c.submit(midi=midi, synth="piano", out="long.wav")
+    second = c.submit(midi=midi, synth="additive")
+    assert c.cancel(second)["state"] == "cancelled"          # todavía en cola
+    while c.job(first)["state"] == "queued":
+        time.sleep(0.01)
+    c.cancel(first)
+    assert c.wait(first)["state"] == "cancelled"
+    assert c.request("GET", f"/jobs/{first}/result")[0] == 409
+    assert c.wait(1)["state"] == "error" and "midi" in c.job(1)["error"]
+
+def _raw(server, body, **headers):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+    try:
+        conn.request("POST", "/jobs", body=body, headers=headers)
+        r = conn.getresponse()
+        return r.status, json.loads(r.read())
+    finally:
+        conn.close()
+
+def test_client_paths_are_confined(server, tmp_path):
+    c = Client(server.address)
+    midi = _midi(tmp_path / "c.mid")
+    victim = tmp_path / "victim.txt"
+    victim.write_text("x")
+    for bad in ({"out": str(victim)}, {"out": "../victim.txt"}, {"out": "a/../../victim.txt"},
+                {"presets": "/etc/passwd"}, {"sample_dir": "/"}, {"midi": "/etc/hosts"}):
+        status, data = c.request("POST", "/jobs", dict({"midi": midi, "synth": "additive"}, **bad))
+        assert status == 403, (bad, data)
+    assert victim.read_text() == "x"
+    job = c.submit(midi="c.mid", synth="additive", out="sub/mix.wav")
+    assert c.wait(job)["state"] == "done" and (tmp_path / "out" / "sub" / "mix.wav").exists()
+
+def test_rejects_browser_requests(server, tmp_path):
+    body = json.dumps({"midi": _midi(tmp_path / "d.mid"), "synth": "additive"})
+    assert _raw(server, body, **{"Content-Type": "text/plain"})[0] == 400
+    assert _raw(server, body, **{"Content-Type": "application/json", "Origin": "https://evil.example"})[0] == 403
+    assert _raw(server, body, **{"Content-Type": "application/json", "Host": "evil.example"})[0] == 403
+    assert _raw(server, body, **{"Content-Type": "application/json; charset=utf-8",
+                                 "Origin": f"http://localhost:{server.port}"})[0] == 202
+    assert len(server.jobs) == 1            # sólo el último pasó los controles
+
+def test_internal_error_is_500(server, tmp_path):
+    c = Client(server.address)
+    job = c.submit(midi=_midi(tmp_path / "e.mid"), synth="additive", out="e.wav")
+    assert c.wait(job)["state"] == "done"
+    (tmp_path / "out" / "e.wav").unlink()
+    status, data = c.request("GET", f"/jobs/{job}/result")
+    assert status == 500 and "FileNotFoundError" in data["error"]
+    assert c.status()["counters"]["jobs_done"] >= 1
+
+def test_unix_socket(tmp_path):
+    sock = str(tmp_path / "tp.sock")
+    s = RenderServer(socket_path=sock, workers=1, presets=None, effects=None).start_background()
+    try:
+        assert Client(sock).status()["workers"] == 1
+    finally:
+        s.stop()
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from src.tpaudio.core.jobs import run_job
+import soundfile as sf
+from src.tpaudio.session import RenderSession, parse_bits
+
+NOTES = [(ti, 0.1 * i, 0.2, 55 + 5 * ti + i, 90) for ti in range(2) for i in range(4)]
+
+@pytest.fixture
+def session(tmp_path):
+    s = RenderSession(str(tmp_path / "none.yml"), workers=1)
+    yield s
+
+def test_mappings_are_equivalent(session):
+    a = session.render(NOTES, "additive", fx={})
+    b = session.render(NOTES, {0: ("additive", None), 1: ("additive", None)}, fx={})
+    c = session.render(NOTES, ["a:additive:0", "b:additive:1"], fx={})
+    assert np.array_equal(a, b) and np.allclose(a, c, atol=1e-6)
+    assert np.isclose(np.max(np.abs(a)), 10 ** (-1 / 20), atol=1e-4)
+    with pytest.raises(ValueError):
+        session.render(NOTES, "nope")
+    with pytest.raises(ValueError):
+        session.render(NOTES, ["sin-tracks"])
+
+def test_repeated_renders_reuse_caches(session, tmp_path):
+    import mido
+    mid = mido.MidiFile()
+    tr = mido.MidiTrack()
+    mid.tracks.append(tr)
+    for i in range(4):
+        tr.append(mido.Message("note_on", note=60 + i, velocity=90, time=0))
+        tr.append(mido.Message("note_off", note=60 + i, velocity=0, time=240))
+    mid.save(str(tmp_path / "a.mid"))
+    y1 = session.render(str(tmp_path / "a.mid"), "piano")
+    y2 = session.render(str(tmp_path / "a.mid"), "piano")
+    assert np.array_equal(y1, y2)
+    assert session.stats["midi_hits"] == 1 and session.stats["presets_hits"] >= 1
+    assert session.cache_info()["notes"]["hits"] >= 4
+
+def test_background_job(session, tmp_path):
+    out = str(tmp_path / "o.wav")
+    ref = session.render(NOTES, "additive")            # misma normalización por defecto
+    run_job(session.job(NOTES, "additive", out, overview=False))
+    y, _sr = sf.read(out, dtype="float32")
+    n = min(len(y), len(ref))          # el render por bloques deja sonar la cola de la reverb
+    assert np.max(np.abs(y[:n] - ref[:n])) < 1e-3
+
+def test_stems_are_the_mix_buffers(session):
+    stems = {}
+    y = session.render(NOTES, "additive", fx={}, stems=stems)
+    assert set(stems) == {0, 1}
+    mix = np.zeros(max(len(y), *map(len, stems.values())), dtype=y.dtype)
+    for s in stems.values():
+        mix[:len(s)] += s
+    assert np.allclose(mix[:len(y)], y, atol=1e-6)      # sin efectos: la mezcla es la suma de stems
+    assert np.max(np.abs(mix[len(y):]), initial=0.0) < 1e-4     # la mezcla termina en su cola audible
+
+def test_parse_bits():
+    assert [parse_bits(s) for s in ("16", "24", "float")] == [16, 24, "float"]
+    with pytest.raises(ValueError):
+        parse_bits("f32")
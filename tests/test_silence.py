@@ -0,0 +1,36 @@
+import numpy as np
+from src.tpaudio.core import silence
+from src.tpaudio.core.sparse import SparseTrack
+from src.tpaudio.effects.delay import Delay
+from src.tpaudio.effects.graph import FxGraph, TrackStrip
+from src.tpaudio.synth.karplus import render_note_ks
+
+def test_tail_end():
+    y = np.zeros(5000, dtype=np.float32)
+    y[100], y[3000] = 1.0, 1e-6          # 1e-6 ≈ -120 dBFS
+    assert silence.tail_end(y) == 101 and len(silence.trim_tail(y)) == 101
+    assert silence.tail_end(np.zeros(10)) == 0
+    with silence.silence(None):
+        assert silence.tail_end(y) == 5000
+    with silence.silence(-130):
+        assert silence.tail_end(y) == 3001
+
+def test_ks_loop_stops_below_threshold():
+    kw = dict(rho=0.99, S=None, noise_mix=0.0)
+    with silence.silence("off"):
+        full = render_note_ks(84, 3.0, 100, 48000, **kw)
+    y = render_note_ks(84, 3.0, 100, 48000, **kw)
+    assert len(full) == 144000 and len(y) < len(full) // 2
+    Lf = int(0.004 * 48000)                  # sólo cambia el fade final
+    assert np.array_equal(y[:-Lf], full[:len(y) - Lf])
+    assert np.max(np.abs(full[len(y):])) < 1e-4
+
+def test_sparse_inserts_skip_silent_gaps():
+    x = np.zeros(48000 * 20, dtype=np.float32)
+    x[:480] = x[48000 * 19:48000 * 19 + 480] = 0.5
+    sp = SparseTrack(len(x), [(0, x[:480].copy()), (48000 * 19, x[48000 * 19:48000 * 19 + 480].copy())])
+    strip = TrackStrip(inserts=[Delay(time_ms=50, feedback=0.3, mix=0.5)])
+    y = FxGraph._run_strip(strip, sp, 48000)
+    ref = FxGraph._run_strip(strip, x, 48000)
+    assert isinstance(y, SparseTrack) and len(y.segments) == 2 and y.nbytes < ref.nbytes // 20
+    assert len(y) == len(ref) and np.allclose(np.asarray(y), ref, atol=1e-5)
@@ -9,3 +9,16 @@ def test_spec(tmp_path):
     png=tmp_path/'s.png'
     save_spectrogram(x, sr, str(png))
     assert png.exists()
+
+def test_streaming_stft_matches_scipy(tmp_path):
+    import soundfile as sf
+    from scipy.signal import stft
+    from src.tpaudio.analysis.spectrogram import stft_frames, spectrogram
+    sr = 8000
+    x = np.random.default_rng(0).standard_normal(sr + 77).astype('float32')
+    _, _, Z = stft(x, sr, nperseg=256, noverlap=128, boundary=None, padded=True)
+    wav = tmp_path / 'n.wav'; sf.write(wav, x, sr, subtype='FLOAT')
+    M = np.concatenate([m for _, m in stft_frames(str(wav), nperseg=256, hop=128, blocksize=1000)])
+    assert np.allclose(M, np.abs(Z.T[:len(M)]), atol=1e-6)
+    t, f, S = spectrogram(str(wav), nperseg=256, hop=128, width=10, scale='mel', n_bins=32)
+    assert S.shape[0] == 32 and S.shape[1] == len(t) <= 10